@@ -0,0 +1,75 @@
+"""
+Benchmark of the archive extraction (FileUtils.extract_archive_staged), serial vs process pool
+(settings["extract_workers"]).
+
+A synthetic zip archive (--members members of --member-size MB of compressible data, like mod
+textures and buffers) is generated in a temporary directory, or --archive is used (eg. a large
+GameBanana zip or multi-block 7z). Each worker count extracts it --repeat times into a fresh directory.
+
+Run from the backend directory:
+    python benchmarks/extract_benchmark.py --members 64 --member-size 4 --workers 1,2,4 --repeat 3
+
+Only zip archives and 7z archives with several solid blocks, of at least 32MB, use the process pool.
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.utils import FileUtils  # noqa: E402
+
+
+def generate_zip(file_path: Path, members: int, member_size: int):
+    rng = random.Random(0)
+    with zipfile.ZipFile(file_path, 'w', compression=zipfile.ZIP_DEFLATED) as zip_ref:
+        for i in range(members):
+            # Half random, half zeros: compresses about 2:1.
+            content = rng.randbytes(member_size // 2) + bytes(member_size - member_size // 2)
+            zip_ref.writestr(f"mod/textures/texture{i}.dds", content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=64)
+    parser.add_argument("--member-size", type=float, default=4, help="MB per member")
+    parser.add_argument("--workers", default=f"1,2,{os.cpu_count() or 1}", help="comma separated worker counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tmp-dir", default=None, help="where to extract (eg. on the drive to measure)")
+    parser.add_argument("--archive", default=None, help="use this archive instead of generating one")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.tmp_dir) as tmp_dir:
+        tmp_path = Path(tmp_dir)
+        if args.archive:
+            archive_path = Path(args.archive)
+        else:
+            archive_path = tmp_path / "benchmark.zip"
+            start = time.perf_counter()
+            generate_zip(archive_path, args.members, int(args.member_size * 1024 * 1024))
+            print(f"Generated {archive_path.stat().st_size / 1024 ** 2:.1f}MB archive in {time.perf_counter() - start:.1f}s")
+
+        print(f"{'workers':>8} {'used':>6} {'seconds':>9} {'MB/s':>8}")
+        try:
+            for workers in dict.fromkeys(int(value) for value in args.workers.split(",")):
+                seconds, report = [], None
+                for _ in range(args.repeat):
+                    extract_path = tmp_path / "extracted"
+                    report = FileUtils.extract_archive_staged(archive_path, extract_path, workers=workers)
+                    seconds.append(report["seconds"])
+                    shutil.rmtree(extract_path)
+                median = statistics.median(seconds)
+                print(f"{workers:>8} {report['workers']:>6} {median:>9.3f} {report['bytes'] / 1024 ** 2 / median:>8.1f}")
+        finally:
+            FileUtils.shutdown_process_pool()
+
+
+if __name__ == "__main__":
+    main()
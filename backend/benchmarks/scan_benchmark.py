@@ -0,0 +1,102 @@
+"""
+Benchmark of the mods folder scan (ModService.rescan_mods), serial vs threaded (settings["scan_workers"]).
+
+A synthetic mods directory (--mods mods spread over --characters character folders and the other
+categories, each with a metadata.json, a preview image and --files mod files) is generated in a
+temporary directory, or --mods-root is used (a copy of a real mods folder: rescans write metadata.json
+files). Each worker count is timed on:
+- a full scan: the fingerprint cache is cleared, every metadata.json is read again.
+- an unchanged rescan: only the folder fingerprints are computed.
+
+Run from the backend directory:
+    python benchmarks/scan_benchmark.py --mods 2000 --workers 1,2,4,8 --repeat 5
+
+The OS file cache is warm after the first run: threads mostly pay off on cold caches and slow drives
+(HDD, network shares), run it on such a drive (--tmp-dir) to measure them.
+"""
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services import app_service as app_service_module  # noqa: E402
+from services import categories  # noqa: E402
+from services.app_service import AppService  # noqa: E402
+
+
+def generate_mods(mods_dir: Path, mods: int, characters: int, files: int):
+    character_names = [f"Character {i}" for i in range(characters)]
+    categories.subcategories["Characters"] = character_names
+    parents = [mods_dir / "Characters" / name for name in character_names]
+    parents += [mods_dir / category for category in categories.get_categories() if category != "Characters"]
+    for i in range(mods):
+        parent = parents[i % len(parents)]
+        mod_dir = parent / f"mod {i}"
+        mod_dir.mkdir(parents=True)
+        is_character = parent.parent.name == "Characters"
+        metadata = {
+            "id": f"mod-{i}",
+            "name": mod_dir.name,
+            "category": "Characters" if is_character else parent.name,
+            "character": parent.name if is_character else None,
+            "images": [{"local": True, "filename": f"{mod_dir.relative_to(mods_dir).as_posix()}/preview.png", "caption": None}],
+            "created_at": 1700000000 + i,
+            "updated_at": 1700000000 + i,
+            "enabled": True,
+            "installed_versions": [],
+            "gamebanana": None,
+        }
+        (mod_dir / "metadata.json").write_text(json.dumps(metadata, indent=2))
+        (mod_dir / "preview.png").write_bytes(b"\x89PNG\r\n\x1a\n" + bytes(1024))
+        for j in range(files):
+            (mod_dir / f"file{j}.buf").write_bytes(bytes(4096))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mods", type=int, default=2000)
+    parser.add_argument("--characters", type=int, default=40)
+    parser.add_argument("--files", type=int, default=4, help="mod files per mod")
+    parser.add_argument("--workers", default="1,2,4,8", help="comma separated worker counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tmp-dir", default=None, help="where to generate the mods (eg. on the drive to measure)")
+    parser.add_argument("--mods-root", default=None, help="use this mods folder instead of generating one")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.tmp_dir) as tmp_dir:
+        tmp_path = Path(tmp_dir)
+        appdata_dir = tmp_path / "appdata"
+        app_service_module.appdirs.user_data_dir = lambda *a, **kw: str(appdata_dir)
+        app_service = AppService.get()
+        if args.mods_root:
+            mods_root = Path(args.mods_root)
+            categories.subcategories["Characters"] = sorted(
+                path.name for path in (mods_root / "NiceWuWaModsSelector" / "Characters").iterdir() if path.is_dir()
+            )
+        else:
+            mods_root = tmp_path / "Mods"
+            start = time.perf_counter()
+            generate_mods(mods_root / "NiceWuWaModsSelector", args.mods, args.characters, args.files)
+            print(f"Generated {args.mods} mods in {time.perf_counter() - start:.1f}s")
+        app_service.settings["mods_dir"] = str(mods_root)
+
+        from services.mod_service import ModService
+        mod_service = ModService.get()
+        print(f"{'workers':>8} {'full scan (ms)':>16} {'unchanged (ms)':>16}")
+        for workers in [int(value) for value in args.workers.split(",")]:
+            full, unchanged = [], []
+            for _ in range(args.repeat):
+                mod_service.fingerprints.entries = {}
+                full.append(mod_service.rescan_mods(workers)["timings"]["total_ms"])
+                unchanged.append(mod_service.rescan_mods(workers)["timings"]["total_ms"])
+            print(f"{workers:>8} {statistics.median(full):>16.1f} {statistics.median(unchanged):>16.1f}")
+        mod_service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pathlib import Path
+from email.utils import formatdate, parsedate_to_datetime
 import os
+import asyncio
+import multiprocessing
 from typing import Optional
 import webview
 import threading
@@ -14,12 +17,27 @@ import win32process
 import win32con
 import win32api
 
-from models import Mod, ModCategory, GameBananaInstallRequest, Character, CharacterResponse, GameBananaCategory
+from models import Mod, ModCategory, ModBatchToggleRequest, GameBananaInstallRequest, ArchiveInspectRequest, Character, CharacterResponse, GameBananaCategory
 from services.mod_service import ModService
 from services.gamebanana_service import GameBananaService
 from services.app_service import AppService
 from services.game_detection_service import GameDetectionService
 from services.game_state_monitor import GameStateMonitor
+from services.worker_pool import WorkerPool, run_blocking
+from services.loop_monitor import EventLoopLagMonitor
+from services.mods_watcher import ModsWatcher
+from services.content_store import ContentStore
+from services.download_cache import DownloadCache
+from services.install_jobs import InstallJobQueue
+from services.upload_service import UploadService
+from services.update_checker import UpdateChecker
+from services.archive_inspector import ArchiveInspector
+from services.thumbnail_service import ThumbnailService
+from services.remote_image_cache import RemoteImageCache
+from services.character_atlas import CharacterAtlas
+from services.image_info import ImageInfoService
+from services.http_client import HttpClient
+from services.utils import FileUtils
 from services.character_list import get_characters_list
 from services.categories import get_categories, get_character_categories, mount_character_subcategories
 
@@ -44,15 +62,34 @@ class ModsDirRequest(BaseModel):
 async def lifespan(app: FastAPI):
     """Initialize data on startup and cleanup on shutdown"""
     # Startup
-    await get_characters_list()
+    characters = await get_characters_list()
     await mount_character_subcategories()
     global app_service, mod_service, gamebanana_service, game_detection_service, game_state_monitor
     app_service = AppService.get()
     mod_service = ModService.get()
     gamebanana_service = GameBananaService.get()
+    EventLoopLagMonitor.get().start()
+    if app_service.settings.get("watch_mods_dir", False):
+        ModsWatcher.get().start(asyncio.get_running_loop())
+    InstallJobQueue.get().start()
+    if app_service.settings.get("check_updates", True):
+        UpdateChecker.get().start()
+    CharacterAtlas.get().start(characters.characters)
+    ImageInfoService.get().start()
     yield
     # Shutdown
-    pass
+    await UpdateChecker.get().stop()
+    await InstallJobQueue.get().stop()
+    await CharacterAtlas.get().stop()
+    await ImageInfoService.get().stop()
+    await RemoteImageCache.get().stop()
+    # Joins the watcher threads, which may be waiting for a sync on the loop.
+    await run_blocking(ModsWatcher.get().stop)
+    EventLoopLagMonitor.get().stop()
+    WorkerPool.get().shutdown()
+    FileUtils.shutdown_process_pool()
+    mod_service.shutdown()
+    await HttpClient.get().close()
 
 app = FastAPI(
     title="NiceWuWaModsSelector API",
@@ -109,24 +146,55 @@ async def read_root():
     return {"message": "Welcome to NiceWuWaModsSelector API"}
 
 # Mod Management Endpoints
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check if the If-None-Match header of a request matches the given ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
 @app.get("/api/mods")
-async def get_mods(category: Optional[ModCategory] = None, character: Optional[str] = None):
-    """Get all mods, optionally filtered by category and/or character"""
+async def get_mods(
+    request: Request,
+    category: Optional[ModCategory] = None,
+    character: Optional[str] = None,
+    enabled: Optional[bool] = None,
+    updated_since: Optional[int] = None,
+    fields: Optional[str] = None,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+):
+    """Get all mods, optionally filtered by category and/or character, enabled state and update time.
+    Supports a `fields` projection (comma separated, 'thumbnail' is the first image), `sort` (name, created_at,
+    updated_at, enabled; '-' prefix for descending), cursor pagination (`cursor`/`limit`) and If-None-Match."""
     global mod_service
-    return await mod_service.get_mods(category, character)
+    etag = mod_service.get_mods_etag(category, character, enabled, updated_since, fields, sort, cursor, limit)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    content = await mod_service.get_mods_json(category, character, enabled, updated_since, field_list, sort, cursor, limit)
+    return Response(content=content, media_type="application/json", headers={"ETag": etag})
 
 @app.post("/api/mods")
-async def create_mod(
-    file: UploadFile = File(...),
-    name: str = Form(...),
-    category: ModCategory = Form(...),
-    wuwa_version: str = Form(...),
-    character: Optional[str] = Form(None),
-    preview_image: Optional[UploadFile] = File(None)
-):
-    """Add a new mod"""
+async def create_mod(request: Request):
+    """Add a new mod from an uploaded archive (multipart/form-data, streamed to disk).
+    Form fields: `file`, `name`, `category`, `character` (optional) and `preview_image` (optional file)."""
     global mod_service
-    return await mod_service.add_mod(file, name, category, wuwa_version, character, preview_image)
+    fields, files = await UploadService.get().receive(request)
+    try:
+        if "file" not in files:
+            raise HTTPException(status_code=400, detail="Missing 'file'")
+        name = fields.get("name") or Path(files["file"].filename).stem
+        try:
+            category = ModCategory(fields.get("category", ModCategory.OTHER.value))
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid category: {fields.get('category')}")
+        return await mod_service.add_mod(files["file"], name, category, fields.get("character") or None, files.get("preview_image"))
+    finally:
+        for uploaded_file in files.values():
+            uploaded_file.unlink()
 
 @app.delete("/api/mods/{mod_id}")
 async def delete_mod(mod_id: str):
@@ -140,14 +208,88 @@ async def toggle_mod(mod_id: str, exclusive: bool = False):
     global mod_service
     return await mod_service.toggle_mod(mod_id, exclusive)
 
+@app.post("/api/mods/rescan")
+async def rescan_mods():
+    """Rescan the mods directory, only re-reading mods that changed on disk"""
+    global mod_service
+    return await mod_service.rescan()
+
+@app.post("/api/mods/toggle-batch")
+async def toggle_mods(request: ModBatchToggleRequest):
+    """Set the enabled state of several mods at once. Returns all the affected mods."""
+    global mod_service
+    return await mod_service.toggle_mods(request.states, request.exclusive)
+
 # GameBanana Integration
 @app.post("/api/mods/gamebanana")
 async def install_from_gamebanana(request: GameBananaInstallRequest):
-    """Install selected files from a GameBanana mod"""
+    """Queue the install of selected files from a GameBanana mod, returns the install job"""
     ## print("install_from_gamebanana: mod_data: ", request.modData)
     ## print("install_from_gamebanana: selected_files: ", request.selectedFiles)
+    return await InstallJobQueue.get().submit(request.modData, request.selectedFiles)
+
+@app.post("/api/mods/{mod_id}/update")
+async def update_from_gamebanana(mod_id: str, request: GameBananaInstallRequest):
+    """Queue the update of a mod installed from GameBanana to the selected files (only changed files are written)"""
+    return await InstallJobQueue.get().submit(request.modData, request.selectedFiles, update_mod_id=mod_id)
+
+@app.get("/api/mods/updates")
+async def get_mod_updates():
+    """Get the mods installed from GameBanana with newer files available (from the last update check)"""
+    return {
+        "last_check": UpdateChecker.get().last_check,
+        "updates": UpdateChecker.get().get_updates(),
+    }
+
+@app.post("/api/mods/updates/check")
+async def check_mod_updates(force: bool = False):
+    """Check the mods installed from GameBanana for updates (only the ones not checked recently unless force)"""
+    return await UpdateChecker.get().check(force)
+
+@app.post("/api/archives/gamebanana/inspect")
+async def inspect_gamebanana_archive(request: ArchiveInspectRequest):
+    """Get the content of a GameBanana file before installing it: member tree, total uncompressed size,
+    .ini files and preview images (only the archive headers are read)"""
+    return await ArchiveInspector.get().inspect_gamebanana_file(request.file)
+
+@app.post("/api/archives/inspect")
+async def inspect_uploaded_archive(request: Request):
+    """Get the content of an archive dropped in the UI (multipart/form-data `file`) before adding it as a mod"""
+    fields, files = await UploadService.get().receive(request)
+    try:
+        if "file" not in files:
+            raise HTTPException(status_code=400, detail="Missing 'file'")
+        return await ArchiveInspector.get().inspect_upload(files["file"])
+    finally:
+        for uploaded_file in files.values():
+            uploaded_file.unlink()
+
+@app.get("/api/archives/{archive_id}/members/{name:path}")
+async def get_archive_image(archive_id: str, name: str):
+    """Get a preview image of an inspected archive (only that member is decompressed)"""
+    content, media_type = await ArchiveInspector.get().read_preview_image(archive_id, name)
+    return Response(content=content, media_type=media_type, headers={"Cache-Control": "private, max-age=3600"})
+
+@app.get("/api/jobs")
+async def get_install_jobs():
+    """Get the install jobs (state, progress and error)"""
+    return InstallJobQueue.get().get_statuses()
+
+@app.get("/api/jobs/{job_id}")
+async def get_install_job(job_id: str):
+    """Get the state, progress and error of an install job"""
+    return InstallJobQueue.get().get_status(job_id)
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_install_job(job_id: str):
+    """Cancel a queued or running install job"""
+    return await InstallJobQueue.get().cancel(job_id)
+
+@app.get("/api/downloads")
+async def get_downloads():
+    """Get the progress (bytes done/total and throughput) of the GameBanana file downloads"""
     global gamebanana_service
-    return await gamebanana_service.install_from_url(request.modData, request.selectedFiles)
+    return list(gamebanana_service.downloads.values())
 
 # Settings
 @app.get("/api/settings")
@@ -167,8 +309,9 @@ async def verify_mods_dir(request: ModsDirRequest):
 @app.put("/api/settings")
 async def update_settings(settings: dict):
     """Update application settings"""
-    global app_service
-    return app_service.update_settings(settings)
+    global mod_service
+    if await mod_service.apply_settings(settings):
+        await ModsWatcher.get().restart()
 
 @app.post("/api/browse-folder")
 async def browse_folder():
@@ -189,35 +332,103 @@ async def browse_folder():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _not_modified_since(request: Request, stat_result: os.stat_result) -> bool:
+    """Check if a file wasn't modified after the If-Modified-Since header of a request"""
+    if_modified_since = request.headers.get("if-modified-since")
+    if not if_modified_since or request.headers.get("if-none-match"):
+        return False
+    try:
+        return int(stat_result.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
 @app.get("/api/image/{filepath:path}")
-async def get_image(filepath: str):
-    """Get an image from an arbitrary filepath"""
+async def get_image(request: Request, filepath: str, w: Optional[int] = None, format: str = "webp"):
+    """Get an image from an arbitrary filepath.
+    With `w`, a thumbnail of (at least) that width is returned instead, as `format` (webp or jpeg).
+    Responses have a strong ETag (inode, mtime and size of the image) and Last-Modified, conditional
+    requests get a 304 and Range requests are supported."""
     try:
-        global app_service
+        global app_service, mod_service
         # Normalize the path to use the correct directory separator
         filepath = filepath.replace('/', os.sep).replace('\\', os.sep)
         
         # Construct the full path by joining with mods_dir
         image_path = app_service.mods_dir / filepath
 
-        # Security check: Ensure the file exists and is a file (not a directory)
-        if not image_path.exists() or not image_path.is_file():
-            raise HTTPException(status_code=404, detail=f"Image not found: {image_path}")
-            
         # Security check: Ensure it's an image file
         allowed_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'}
         if image_path.suffix.lower() not in allowed_extensions:
             raise HTTPException(status_code=400, detail="Invalid file type. Only images are allowed.")
-        
-        return FileResponse(str(image_path))
+
+        # Security check: Ensure the file exists and is a file (not a directory)
+        stat_result = mod_service.image_stats.stat(image_path)
+        if stat_result is None:
+            raise HTTPException(status_code=404, detail=f"Image not found: {image_path}")
+
+        etag = f"{stat_result.st_ino:x}-{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"
+        if w is not None:
+            etag += f"-{ThumbnailService.bucket(w)}-{format}"
+        headers = {
+            "ETag": f'"{etag}"',
+            "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+            "Cache-Control": f"private, max-age={app_service.settings.get('image_max_age', 60)}, must-revalidate",
+        }
+        if _etag_matches(request, headers["ETag"]) or _not_modified_since(request, stat_result):
+            return Response(status_code=304, headers=headers)
+
+        if w is not None:
+            thumbnail_path, media_type = await ThumbnailService.get().get_thumbnail(image_path, w, format, stat_result)
+            return FileResponse(str(thumbnail_path), media_type=media_type, headers=headers)
+        return FileResponse(str(image_path), headers=headers, stat_result=stat_result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/remote-image")
+async def get_remote_image(url: str):
+    """Get a remote image (GameBanana mod preview or prydwen.gg character image) through the local image cache"""
+    file_path, media_type = await RemoteImageCache.get().fetch(url)
+    # Remote images are content-addressed by URL, they never change.
+    return FileResponse(file_path, media_type=media_type, headers={"Cache-Control": "public, max-age=604800, immutable"})
+
+@app.get("/api/stats")
+async def get_stats():
+    """Get runtime stats of the backend caches"""
+    global mod_service
+    return {
+        "mods_listing_cache": mod_service.listing_cache.stats(),
+        "event_loop_lag": EventLoopLagMonitor.get().stats(),
+        "content_store": ContentStore.get().stats(),
+        "download_cache": DownloadCache.get().stats(),
+        "thumbnails": ThumbnailService.get().stats(),
+        "image_stats": mod_service.image_stats.stats(),
+        "remote_images": RemoteImageCache.get().stats(),
+        "image_info": ImageInfoService.get().stats(),
+    }
+
 @app.get("/api/characters", response_model=CharacterResponse)
 async def get_characters():
     """Get character data from cache or fetch if not available"""
     return await get_characters_list()
 
+@app.get("/api/characters/atlas")
+async def get_characters_atlas():
+    """Get the coordinate map of the character icons sprite atlas: {id: [x, y, width, height]}.
+    The atlas is built when the character list changes."""
+    characters = await get_characters_list()
+    atlas = await CharacterAtlas.get().build(characters.characters)
+    return {**atlas, "image": f"/api/characters/atlas/{atlas['version']}.webp"}
+
+@app.get("/api/characters/atlas/{version}.webp")
+async def get_characters_atlas_image(version: str):
+    """Get a character icons sprite atlas image (versioned, never changes)"""
+    image_file = CharacterAtlas.get().image_file(version)
+    if "/" in version or "\\" in version or not image_file.exists():
+        raise HTTPException(status_code=404, detail="Character atlas not found")
+    return FileResponse(str(image_file), media_type="image/webp", headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
 @app.get("/api/game/status")
 async def get_game_status():
     """Get the current status of the game window"""
@@ -267,6 +478,9 @@ def on_loaded():
 
 
 if __name__ == "__main__":
+    # Archive extraction worker processes re-run this module when frozen (PyInstaller).
+    multiprocessing.freeze_support()
+
     # Start the FastAPI server in a separate thread
     server_thread = threading.Thread(target=start_server, daemon=True)
     server_thread.start()
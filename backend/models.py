@@ -19,6 +19,11 @@ class Image(BaseModel):
     local: bool
     filename: str
     caption: Optional[str] = None
+    # Computed in the background (see ImageInfoService)
+    width: Optional[int] = None
+    height: Optional[int] = None
+    color: Optional[str] = None
+    placeholder: Optional[str] = None
 
 class InstalledVersion(BaseModel):
     id: int
@@ -56,6 +61,14 @@ class Mod(BaseModel):
                 return v
         return v
 
+class ModToggleState(BaseModel):
+    mod_id: str
+    enabled: bool
+
+class ModBatchToggleRequest(BaseModel):
+    states: List[ModToggleState]
+    exclusive: bool = False
+
 class Settings(BaseModel):
     mods_dir: str
 
@@ -85,6 +98,16 @@ class GameBananaInstallRequest(BaseModel):
             
         return valid_ids
 
+class ArchiveInspectRequest(BaseModel):
+    file: Dict
+
+    @validator('file')
+    def validate_file(cls, v):
+        missing = [key for key in ('_idRow', '_sFile', '_tsDateAdded', '_nFilesize', '_sDownloadUrl') if key not in v]
+        if missing:
+            raise ValueError(f'file is missing {", ".join(missing)}')
+        return v
+
 class GameBananaCategory(BaseModel):
     cat_id: int
     cat_url: str
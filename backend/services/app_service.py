@@ -7,6 +7,7 @@ from .utils import FileUtils
 
 default_settings = {
     "mods_dir": str(Path(appdirs.user_data_dir(roaming=True)) / "XXMI Launcher" / "WWMI" / "Mods"),
+    "use_sqlite_store": False,
 }
 
 
@@ -82,18 +83,23 @@ class AppService:
             print(f"Error saving settings: {e}")
             raise
 
-    def update_settings(self, settings: dict):
-        """Update settings"""
+    def update_settings(self, settings: dict) -> bool:
+        """Update settings. Returns True if the mods metadata must be reloaded (see ModService.apply_settings)"""
+        reload_mods = False
         if "mods_dir" in settings:
             if not self.verify_mods_dir(settings["mods_dir"]):
                 # trying to set an invalid dirpath!
                 settings["mods_dir"] = ''
-            else:
-                # Ensure mods dir exists.
-                FileUtils.ensure_directory(self.mods_dir, parents=False)
-                # Reload mods metadata.
-                from .mod_service import ModService
-                ModService.get().init()
+            elif settings["mods_dir"] != self.settings.get("mods_dir"):
+                # Only reload mods metadata when the mods dir actually changed.
+                reload_mods = True
+        if "use_sqlite_store" in settings and settings["use_sqlite_store"] != self.settings.get("use_sqlite_store", False):
+            reload_mods = True
 
         self.settings.update(settings)
         self.save_settings()
+
+        if reload_mods:
+            # Ensure mods dir exists.
+            FileUtils.ensure_directory(self.mods_dir, parents=False)
+        return reload_mods
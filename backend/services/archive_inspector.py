@@ -0,0 +1,118 @@
+import asyncio
+import mimetypes
+import os
+import shutil
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Tuple
+
+from fastapi import HTTPException
+
+from .app_service import AppService
+from .download_cache import DownloadCache
+from .upload_service import UploadedFile
+from .utils import FileUtils
+from .worker_pool import run_blocking
+
+
+class ArchiveInspector:
+    """
+    This class is used to preview the content of an archive before installing it
+    (a GameBanana file or an archive dropped in the UI), reading only the archive headers.
+
+    Inspected archives get an id so their preview images can then be decompressed one by one,
+    on demand. GameBanana files are downloaded into the download cache (so installing them
+    afterwards doesn't download them again) and kept in use while inspected, dropped archives
+    are kept in the 'inspected_archives' dir of the app data dir. Up to settings["max_inspected_archives"]
+    archives of each kind are kept (default 8), the oldest ones are released first.
+    """
+
+    _instance = None
+
+    @staticmethod
+    def get():
+        if ArchiveInspector._instance is None:
+            ArchiveInspector._instance = ArchiveInspector()
+        return ArchiveInspector._instance
+
+    def __init__(self) -> None:
+        self.upload_dir = AppService.get().appdata_dir / 'inspected_archives'
+        if self.upload_dir.exists():
+            shutil.rmtree(self.upload_dir, ignore_errors=True)
+        FileUtils.ensure_directory(self.upload_dir, parents=False)
+        # archive id -> archive path
+        self.archives: Dict[str, Path] = {}
+        self.uploads: OrderedDict[str, Path] = OrderedDict()
+        # archive id -> GameBanana file data
+        self.gamebanana_files: OrderedDict[str, Dict] = OrderedDict()
+        # (archive path, mtime, size) -> inspection
+        self._inspections: OrderedDict[Tuple, dict] = OrderedDict()
+
+    @property
+    def max_archives(self) -> int:
+        return max(1, AppService.get().settings.get("max_inspected_archives", 8))
+
+    async def _inspect(self, archive_id: str, archive_path: Path) -> dict:
+        st = archive_path.stat()
+        key = (str(archive_path), st.st_mtime_ns, st.st_size)
+        inspection = self._inspections.get(key)
+        if inspection is None:
+            inspection = await run_blocking(FileUtils.inspect_archive, archive_path)
+            self._inspections[key] = inspection
+            while len(self._inspections) > 64:
+                self._inspections.popitem(last=False)
+        self.archives[archive_id] = archive_path
+        return {"archive_id": archive_id, **inspection}
+
+    async def inspect_gamebanana_file(self, file_data: Dict) -> dict:
+        """Inspect a GameBanana file, downloaded into the download cache if needed"""
+        from .gamebanana_service import GameBananaService
+        gamebanana_service = GameBananaService.get()
+        download_cache = DownloadCache.get()
+        archive_id = f"gb-{download_cache.key(file_data)}"
+        archive_path = await gamebanana_service._download_cached(file_data, asyncio.Semaphore(1))
+        if archive_id in self.gamebanana_files:
+            # Already in use by the previous inspection.
+            await download_cache.release(file_data)
+            self.gamebanana_files.move_to_end(archive_id)
+        else:
+            self.gamebanana_files[archive_id] = file_data
+        while len(self.gamebanana_files) > self.max_archives:
+            old_id, old_file_data = self.gamebanana_files.popitem(last=False)
+            self.archives.pop(old_id, None)
+            await download_cache.release(old_file_data)
+        return await self._inspect(archive_id, archive_path)
+
+    async def inspect_upload(self, upload: UploadedFile) -> dict:
+        """Inspect an uploaded archive, kept to read its preview images"""
+        archive_id = f"upload-{uuid.uuid4().hex}"
+        archive_path = self.upload_dir / f"{archive_id}{upload.path.suffix}"
+        await run_blocking(shutil.move, upload.path, archive_path)
+        self.uploads[archive_id] = archive_path
+        while len(self.uploads) > self.max_archives:
+            old_id, old_path = self.uploads.popitem(last=False)
+            self.archives.pop(old_id, None)
+            try:
+                os.unlink(old_path)
+            except FileNotFoundError:
+                pass
+        try:
+            inspection = await self._inspect(archive_id, archive_path)
+        except Exception:
+            self.uploads.pop(archive_id, None)
+            os.unlink(archive_path)
+            raise
+        inspection["archive"] = upload.filename
+        return inspection
+
+    async def read_preview_image(self, archive_id: str, name: str) -> Tuple[bytes, str]:
+        """Decompress a single image of an inspected archive. Returns the (content, media type)."""
+        archive_path = self.archives.get(archive_id)
+        if archive_path is None or not archive_path.exists():
+            raise HTTPException(status_code=404, detail="Archive not found, inspect it again")
+        media_type = mimetypes.guess_type(name)[0]
+        if not media_type or not media_type.startswith("image/"):
+            raise HTTPException(status_code=400, detail=f"Not an image: {name}")
+        content = await run_blocking(FileUtils.read_archive_member, archive_path, name, pool="archive")
+        return content, media_type
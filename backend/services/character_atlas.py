@@ -0,0 +1,146 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from PIL import Image, ImageOps
+
+from .app_service import AppService
+from .remote_image_cache import RemoteImageCache
+from .utils import FileUtils
+from .worker_pool import run_blocking
+
+
+class CharacterAtlas:
+    """
+    This class is used to pack the character icons into a single sprite atlas image,
+    so the character selector renders from one request instead of one per character.
+
+    The atlas image ('{version}.webp') and its coordinate map ('atlas.json') are saved in the
+    'character_atlas' dir of the app data dir, with a version derived from the characters and their
+    icon URLs: they are only rebuilt when the character list changes. Icons come from the RemoteImageCache.
+    """
+
+    _instance = None
+
+    TILE_SIZE = 128
+    # Bump to rebuild the atlases made by a previous layout.
+    LAYOUT_VERSION = 1
+
+    @staticmethod
+    def get():
+        if CharacterAtlas._instance is None:
+            CharacterAtlas._instance = CharacterAtlas()
+        return CharacterAtlas._instance
+
+    def __init__(self) -> None:
+        self.atlas_dir = AppService.get().appdata_dir / 'character_atlas'
+        FileUtils.ensure_directory(self.atlas_dir, parents=False)
+        self.map_file = self.atlas_dir / 'atlas.json'
+        self.atlas: Optional[dict] = None
+        if self.map_file.exists():
+            atlas = FileUtils.read_json(self.map_file)
+            if self.image_file(atlas["version"]).exists():
+                self.atlas = atlas
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def image_file(self, version: str) -> Path:
+        return self.atlas_dir / f"{version}.webp"
+
+    @classmethod
+    def version(cls, characters: List) -> str:
+        """Get the version of the atlas of a character list, changes with the characters and their icons"""
+        icons = [(character.id, character.icon) for character in characters]
+        return hashlib.sha1(json.dumps([cls.LAYOUT_VERSION, cls.TILE_SIZE, icons]).encode('utf-8')).hexdigest()[:16]
+
+    @classmethod
+    def _build(cls, icon_files: List[Tuple[str, Path]], image_file: Path) -> Tuple[int, int, Dict[str, list]]:
+        """Pack the icons (one tile per distinct icon file) into the atlas image.
+        Returns the atlas (width, height) and the {icon file: [x, y]} tile positions."""
+        files = list(dict.fromkeys(str(icon_file) for _, icon_file in icon_files))
+        columns = max(1, math.ceil(math.sqrt(len(files))))
+        rows = max(1, math.ceil(len(files) / columns))
+        width, height = columns * cls.TILE_SIZE, rows * cls.TILE_SIZE
+        atlas = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+        positions = {}
+        for index, icon_file in enumerate(files):
+            x, y = (index % columns) * cls.TILE_SIZE, (index // columns) * cls.TILE_SIZE
+            with Image.open(icon_file) as icon:
+                # Same framing as the 'object-cover' icons of the UI.
+                tile = ImageOps.fit(icon.convert('RGBA'), (cls.TILE_SIZE, cls.TILE_SIZE), Image.Resampling.LANCZOS)
+            atlas.paste(tile, (x, y))
+            positions[icon_file] = [x, y]
+        tmp_file = image_file.with_suffix('.webp.tmp')
+        atlas.save(tmp_file, 'WEBP', quality=90, method=4)
+        os.replace(tmp_file, image_file)
+        return width, height, positions
+
+    async def build(self, characters: List) -> dict:
+        """Get the atlas of a character list, (re)built if the list changed"""
+        version = self.version(characters)
+        async with self._lock:
+            if self.atlas is not None and self.atlas.get("characters_version") == version:
+                return self.atlas
+            remote_images = RemoteImageCache.get()
+            results = await asyncio.gather(
+                *(remote_images.fetch(character.icon) for character in characters), return_exceptions=True
+            )
+            icon_files = []
+            for character, result in zip(characters, results):
+                if isinstance(result, Exception):
+                    print(f"Failed to get the icon of {character.name}: {str(result)}")
+                else:
+                    icon_files.append((character.id, Path(result[0])))
+            if not icon_files:
+                raise HTTPException(status_code=502, detail="Failed to get the character icons")
+
+            # Missing icons: the atlas isn't saved, so it is built again on the next start.
+            complete = len(icon_files) == len(characters)
+            image_version = version if complete else f"{version}-partial"
+            width, height, positions = await run_blocking(
+                self._build, icon_files, self.image_file(image_version), pool="image"
+            )
+            atlas = {
+                "version": image_version,
+                "characters_version": version,
+                "tile_size": self.TILE_SIZE,
+                "width": width,
+                "height": height,
+                "sprites": {
+                    character_id: [*positions[str(icon_file)], self.TILE_SIZE, self.TILE_SIZE]
+                    for character_id, icon_file in icon_files
+                },
+            }
+            if complete:
+                await run_blocking(FileUtils.write_json, self.map_file, atlas, atomic=True)
+            self.atlas = atlas
+            await run_blocking(self._remove_old_images, image_version)
+            print(f"Built character atlas: {len(icon_files)} characters, {width}x{height}")
+            return atlas
+
+    def _remove_old_images(self, version: str):
+        for file_path in self.atlas_dir.glob('*.webp'):
+            if file_path.stem != version:
+                file_path.unlink()
+
+    def start(self, characters: List):
+        """Build the atlas of a character list in the background (if it changed)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._build_in_background(characters))
+
+    async def _build_in_background(self, characters: List):
+        try:
+            await self.build(characters)
+        except Exception as e:
+            print(f"Failed to build the character atlas: {str(e)}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,148 @@
+import hashlib
+import os
+import shutil
+import stat
+import threading
+from pathlib import Path
+
+from .app_service import AppService
+from .utils import FileUtils
+
+
+class ContentStore:
+    """
+    This class is used to deduplicate the files of the installed mods.
+
+    Extracted files are hashed (SHA-256) into a content-addressed store under the app data dir,
+    and identical files are hardlinked into each mod directory instead of being stored twice
+    (eg. several variants of the same model, or a mod installed for both Rovers).
+
+    Only files of at least settings["dedup_min_size"] bytes are deduplicated, and editable text
+    files (.ini, .json, .txt) never are, since hardlinked files share their content. Blobs are copies
+    (never the first mod's own file) and read-only, so that editing a mod file in place can't
+    change the content of the other mods: the links are replaced instead (see FileUtils.replace_file).
+    """
+
+    _instance = None
+
+    EXCLUDED_SUFFIXES = {'.ini', '.json', '.txt'}
+
+    @staticmethod
+    def get():
+        if ContentStore._instance is None:
+            ContentStore._instance = ContentStore()
+        return ContentStore._instance
+
+    def __init__(self) -> None:
+        app_service = AppService.get()
+        self.enabled = app_service.settings.get("dedup_mod_files", False)
+        self.min_size = app_service.settings.get("dedup_min_size", 64 * 1024)
+        self.store_dir = app_service.appdata_dir / "content_store"
+        self.report_file = self.store_dir / "report.json"
+        self._lock = threading.Lock()
+        FileUtils.ensure_directory(self.store_dir, parents=False)
+        self.report: dict[str, int] = FileUtils.read_json(self.report_file) if self.report_file.exists() else {}
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.store_dir / digest[:2] / digest
+
+    @staticmethod
+    def hash_file(file_path: Path) -> str:
+        sha256 = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def dedupe_dir(self, mod_dir: Path) -> dict:
+        """Hardlink the files of a mod directory that are already in the store, and add the other ones.
+        Returns {"files": deduplicated files, "bytes_saved": bytes saved in this mod}."""
+        files = 0
+        bytes_saved = 0
+        for file_path in mod_dir.rglob('*'):
+            if not file_path.is_file() or file_path.is_symlink() or file_path.suffix.lower() in self.EXCLUDED_SUFFIXES:
+                continue
+            st = file_path.stat()
+            if st.st_size < self.min_size:
+                continue
+
+            blob_path = self._blob_path(self.hash_file(file_path))
+            try:
+                with self._lock:
+                    if not blob_path.exists():
+                        # New content: copied into the store, the mod file becomes a link to the copy.
+                        self._add_blob(file_path, blob_path)
+                        self._link(blob_path, file_path)
+                        continue
+                    if os.stat(blob_path).st_ino == st.st_ino:
+                        continue
+                    self._make_read_only(blob_path)
+                    self._link(blob_path, file_path)
+            except OSError as e:
+                # Eg. the mods dir is on another volume than the app data dir (no cross-device hardlinks).
+                print(f"Failed to deduplicate {file_path}: {str(e)}")
+                return {"files": files, "bytes_saved": bytes_saved, "error": str(e)}
+            files += 1
+            bytes_saved += st.st_size
+
+        key = self._report_key(mod_dir)
+        with self._lock:
+            self.report[key] = self.report.get(key, 0) + bytes_saved
+            FileUtils.write_json(self.report_file, self.report)
+        print(f"Deduplicated {files} files ({bytes_saved} bytes) in {mod_dir}")
+        return {"files": files, "bytes_saved": bytes_saved}
+
+    @staticmethod
+    def _make_read_only(blob_path: Path):
+        mode = os.stat(blob_path).st_mode
+        if mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH):
+            os.chmod(blob_path, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+    def _add_blob(self, file_path: Path, blob_path: Path):
+        blob_path.parent.mkdir(exist_ok=True)
+        tmp_path = blob_path.with_name(blob_path.name + '.tmp')
+        shutil.copyfile(file_path, tmp_path)
+        self._make_read_only(tmp_path)
+        os.replace(tmp_path, blob_path)
+
+    @staticmethod
+    def _link(blob_path: Path, file_path: Path):
+        tmp_path = file_path.with_name(file_path.name + '.dedup')
+        os.link(blob_path, tmp_path)
+        FileUtils.replace_file(tmp_path, file_path)
+
+    def _report_key(self, mod_dir: Path) -> str:
+        try:
+            rel_path = mod_dir.relative_to(AppService.get().mods_dir)
+        except ValueError:
+            rel_path = mod_dir
+        name = rel_path.name[9:] if rel_path.name.startswith("DISABLED_") else rel_path.name
+        return (rel_path.parent / name).as_posix()
+
+    def forget_mod(self, mod_dir: Path):
+        """Remove a (deleted) mod from the report"""
+        with self._lock:
+            if self.report.pop(self._report_key(mod_dir), None) is not None:
+                FileUtils.write_json(self.report_file, self.report)
+
+    def collect_garbage(self) -> int:
+        """Remove the blobs no longer linked from any mod, and make the other ones read-only again
+        (replacing a read-only link may have cleared it). Returns the freed bytes."""
+        freed = 0
+        with self._lock:
+            for blob_path in self.store_dir.glob('*/*'):
+                st = blob_path.stat()
+                if st.st_nlink <= 1:
+                    FileUtils.remove_file(blob_path)
+                    freed += st.st_size
+                else:
+                    self._make_read_only(blob_path)
+        return freed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "bytes_saved": sum(self.report.values()),
+                "bytes_saved_by_mod": dict(self.report),
+            }
@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+
+from .app_service import AppService
+from .utils import FileUtils
+from .worker_pool import run_blocking
+
+
+class DownloadCache:
+    """
+    This class is used to keep the archives downloaded from GameBanana, so reinstalling,
+    repairing or installing a file again (eg. for another character) doesn't download it again.
+
+    Entries are keyed by the GameBanana file id, date added and size ('{_idRow}_{_tsDateAdded}_{_nFilesize}'),
+    so a re-uploaded file is a new entry. Archives are hashed (SHA-256) when stored, checked against the
+    GameBanana MD5 checksum when there is one, and verified again on every hit.
+
+    The cache is bounded by settings["download_cache_max_size"] bytes (0 disables it),
+    evicting the least recently used entries first.
+    """
+
+    _instance = None
+
+    @staticmethod
+    def get():
+        if DownloadCache._instance is None:
+            DownloadCache._instance = DownloadCache()
+        return DownloadCache._instance
+
+    def __init__(self) -> None:
+        self.cache_dir = AppService.get().appdata_dir / 'downloaded_mods'
+        self.index_file = self.cache_dir / 'cache_index.json'
+        FileUtils.ensure_directory(self.cache_dir, parents=False)
+        # key -> {"file", "size", "sha256", "last_used"}
+        self.entries: Dict[str, dict] = FileUtils.read_json(self.index_file) if self.index_file.exists() else {}
+        # key -> number of installs using the entry (never evicted while in use).
+        self._in_use: Dict[str, int] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._index_lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    @property
+    def max_size(self) -> int:
+        return AppService.get().settings.get("download_cache_max_size", 2 * 1024 ** 3)
+
+    @staticmethod
+    def key(file_data: Dict) -> str:
+        return f"{file_data['_idRow']}_{file_data['_tsDateAdded']}_{file_data['_nFilesize']}"
+
+    def entry_path(self, file_data: Dict) -> Path:
+        """Get the path the archive of a GameBanana file is downloaded to"""
+        return self.cache_dir / self.key(file_data) / file_data['_sFile']
+
+    def lock(self, file_data: Dict) -> asyncio.Lock:
+        """Get the lock serializing the lookups and downloads of a GameBanana file"""
+        return self._locks.setdefault(self.key(file_data), asyncio.Lock())
+
+    @staticmethod
+    def hash_file(file_path: Path) -> tuple:
+        """Get the (SHA-256, MD5) hex digests of a file"""
+        sha256 = hashlib.sha256()
+        md5 = hashlib.md5()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha256.update(chunk)
+                md5.update(chunk)
+        return sha256.hexdigest(), md5.hexdigest()
+
+    async def _save_index(self):
+        async with self._index_lock:
+            await run_blocking(FileUtils.write_json, self.index_file, dict(self.entries), atomic=True)
+
+    async def get_file(self, file_data: Dict) -> Optional[Path]:
+        """Get the cached archive of a GameBanana file, None on a miss.
+        A hit is marked as in use until release() is called."""
+        key = self.key(file_data)
+        entry = self.entries.get(key)
+        file_path = self.entry_path(file_data)
+        if entry is not None and file_path.exists() and file_path.stat().st_size == entry["size"]:
+            self._in_use[key] = self._in_use.get(key, 0) + 1
+            sha256, _ = await run_blocking(self.hash_file, file_path, pool="archive")
+            if sha256 == entry["sha256"]:
+                entry["last_used"] = time.time()
+                self.hits += 1
+                self.bytes_saved += entry["size"]
+                await self._save_index()
+                print(f"Download cache hit: {key}")
+                return file_path
+            print(f"Download cache entry corrupted, downloading again: {key}")
+            self._in_use[key] -= 1
+        if entry is not None:
+            self.entries.pop(key, None)
+            await self._save_index()
+        self.misses += 1
+        return None
+
+    async def put_file(self, file_data: Dict, file_path: Path):
+        """Add a downloaded archive to the cache, marking it as in use until release() is called.
+        Raises if it doesn't match the GameBanana MD5 checksum."""
+        key = self.key(file_data)
+        sha256, md5 = await run_blocking(self.hash_file, file_path, pool="archive")
+        expected_md5 = file_data.get('_sMd5Checksum')
+        if expected_md5 and md5 != expected_md5.lower():
+            await run_blocking(shutil.rmtree, self.cache_dir / key, ignore_errors=True)
+            raise HTTPException(status_code=500, detail=f"Checksum mismatch for downloaded file: {file_data['_sFile']}")
+        self._in_use[key] = self._in_use.get(key, 0) + 1
+        if self.max_size <= 0:
+            return
+        self.entries[key] = {
+            "file": file_data['_sFile'],
+            "size": file_path.stat().st_size,
+            "sha256": sha256,
+            "last_used": time.time(),
+        }
+        await self._save_index()
+
+    async def release(self, file_data: Dict):
+        """Mark an archive as no longer in use, and evict entries over the cache size limit"""
+        key = self.key(file_data)
+        if self._in_use.get(key, 0) > 1:
+            self._in_use[key] -= 1
+        else:
+            self._in_use.pop(key, None)
+        if key not in self.entries and key not in self._in_use:
+            # Not cached (the cache is disabled): clean up the downloaded file.
+            await run_blocking(shutil.rmtree, self.cache_dir / key, ignore_errors=True)
+        await self.evict()
+
+    async def evict(self):
+        """Remove the least recently used entries not in use until the cache fits in its size limit"""
+        total = sum(entry["size"] for entry in self.entries.values())
+        evicted = False
+        for key, entry in sorted(self.entries.items(), key=lambda item: item[1]["last_used"]):
+            if total <= max(self.max_size, 0):
+                break
+            if key in self._in_use:
+                continue
+            await run_blocking(shutil.rmtree, self.cache_dir / key, ignore_errors=True)
+            del self.entries[key]
+            total -= entry["size"]
+            evicted = True
+            print(f"Evicted download cache entry: {key}")
+        if evicted:
+            await self._save_index()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": sum(entry["size"] for entry in self.entries.values()),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "bytes_saved": self.bytes_saved,
+        }
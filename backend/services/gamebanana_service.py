@@ -1,14 +1,32 @@
-import re
-import httpx
+import asyncio
+import shutil
+import threading
 from pathlib import Path
 from typing import Dict, List, Optional
 from fastapi import HTTPException
-import json
+import time
 import uuid
-from datetime import datetime
 
 from .app_service import AppService
 from .utils import FileUtils
+from .worker_pool import run_blocking
+from .content_store import ContentStore
+from .download_cache import DownloadCache
+from .http_client import get_http_client
+from .remote_image_cache import RemoteImageCache, gamebanana_image_url
+
+
+# Files of a mod extracted from its GameBanana archives: {member name: [size, CRC-32, GameBanana file id]}.
+MANIFEST_FILENAME = "files_manifest.json"
+
+
+def _read_manifest(mod_dir: Path) -> Optional[Dict[str, list]]:
+    manifest_path = mod_dir / MANIFEST_FILENAME
+    return FileUtils.read_json(manifest_path)["files"] if manifest_path.exists() else None
+
+
+def _write_manifest(mod_dir: Path, files: Dict[str, list]):
+    FileUtils.write_json(mod_dir / MANIFEST_FILENAME, {"files": files}, atomic=True)
 
 
 class GameBananaService:
@@ -26,11 +44,19 @@ class GameBananaService:
         self.headers = {
             "User-Agent": "NiceWuWaModsSelector/1.0"
         }
-        self.download_dir = AppService.get().appdata_dir / 'downloaded_mods'
-        FileUtils.ensure_directory(self.download_dir, parents=False)
+        self.download_cache = DownloadCache.get()
+        self.download_chunk_size = 256 * 1024
+        # Download progress by file name.
+        self.downloads: Dict[str, dict] = {}
 
-    async def install_from_url(self, mod_data: Dict, selected_files: List[int]) -> Dict:
-        """Install selected files from a GameBanana mod"""
+    async def install_from_url(self, mod_data: Dict, selected_files: List[int], progress: Optional[Dict] = None) -> Dict:
+        """Install selected files from a GameBanana mod.
+        The install stage and files done are tracked in the given progress dict, if any."""
+        from .mod_service import ModService
+        if progress is None:
+            progress = {}
+        mod_service = ModService.get()
+        installing_dirs = set()
         try:
             # Map category names
             category = mod_data['_aSuperCategory']['_sName']
@@ -47,56 +73,81 @@ class GameBananaService:
             if category == "Characters":
                 mod_dir = mod_dir / character
             mod_dir = mod_dir / mod_name
+            # Ignored by the mods watcher until it is indexed.
+            mod_dirpaths = {mod_dir, mod_dir.with_name('DISABLED_' + mod_name)}
+            if mod_dirpaths & mod_service.installing_dirs:
+                raise HTTPException(status_code=409, detail=f"Mod already being installed: {mod_name}")
+            installing_dirs = mod_dirpaths
+            mod_service.installing_dirs.update(installing_dirs)
+            created_mod_dir = not mod_dir.exists()
             mod_dir.mkdir(parents=True, exist_ok=True)
 
             print(f"Created mod directory: {mod_dir}")
 
-            # Download and install selected files
-            installed_versions = []
-            for file_id in selected_files:
-                file_data = next((f for f in mod_data['_aFiles'] if f['_idRow'] == file_id), None)
-                if not file_data:
-                    print(f"File not found: {file_id}")
-                    continue
+            # Download the selected files concurrently (up to max_concurrent_downloads), and extract them
+            # in order as they complete, so extraction overlaps with the next files' downloads.
+            files_data = self._get_files_data(mod_data, selected_files)
+            progress.update(stage="downloading", files=[f['_sFile'] for f in files_data], files_done=0, files_total=len(files_data))
 
-                print(f"Processing file: {file_data['_sFile']}")
+            settings = AppService.get().settings
+            semaphore = asyncio.Semaphore(settings.get("max_concurrent_downloads", 3))
+            extract_workers = settings.get("extract_workers", 1)
+            download_tasks = [asyncio.create_task(self._download_cached(file_data, semaphore)) for file_data in files_data]
 
-                # Download file
-                download_path = self.download_dir / file_data['_sFile']
-                try:
-                    await self.download_file(file_data['_sDownloadUrl'], download_path)
-                    print(f"Downloaded file to: {download_path}")
-                except Exception as e:
-                    print(f"Failed to download file: {str(e)}")
-                    raise HTTPException(status_code=500, detail=f"Failed to download file: {str(e)}")
+            installed_versions = []
+            manifest = await run_blocking(_read_manifest, mod_dir) or {}
+            try:
+                for file_data, download_task in zip(files_data, download_tasks):
+                    print(f"Processing file: {file_data['_sFile']}")
 
-                # Extract file
-                try:
-                    if FileUtils.is_valid_archive(download_path):
+                    # Download file
+                    try:
+                        download_path = await download_task
+                        print(f"Downloaded file to: {download_path}")
+                    except Exception as e:
+                        print(f"Failed to download file: {str(e)}")
+                        raise HTTPException(status_code=500, detail=f"Failed to download file: {str(e)}")
+
+                    # Validate and extract file (single pass, into a staging directory moved into place)
+                    try:
                         print(f"Extracting archive: {download_path}")
-                        FileUtils.extract_archive(download_path, mod_dir)
+                        progress["stage"] = "extracting"
+                        report = await self._run_cancellable(
+                            FileUtils.extract_archive_staged, download_path, mod_dir, workers=extract_workers
+                        )
                         print(f"Extracted to: {mod_dir}")
-                        installed_versions.append({
-                            "id": file_data['_idRow'],
-                            "date": file_data['_tsDateAdded'],
-                            "name": file_data['_sFile'],
-                            "url": file_data['_sDownloadUrl'],
-                            "description": file_data['_sDescription'],
-                            "size": file_data['_nFilesize']
-                        })
-                    else:
-                        print(f"Invalid archive: {download_path}")
-                        raise HTTPException(status_code=400, detail=f"Invalid archive format: {file_data['_sFile']}")
-                except Exception as e:
-                    print(f"Failed to extract archive: {str(e)}")
-                    raise HTTPException(status_code=500, detail=f"Failed to extract archive: {str(e)}")
-                finally:
-                    # Clean up downloaded file
-                    try:
-                        download_path.unlink()
-                        print(f"Cleaned up downloaded file: {download_path}")
+                        # Sizes and CRCs read by the extraction, the archive isn't opened again.
+                        members = report.pop("files")
+                        if download_path.name in self.downloads:
+                            self.downloads[download_path.name]["extraction"] = report
+                        manifest.update({name: [size, crc, file_data['_idRow']] for name, (size, crc) in members.items()})
+                        installed_versions.append(self._installed_version(file_data))
+                        progress["files_done"] += 1
+                        progress["stage"] = "downloading"
+                    except HTTPException:
+                        raise
                     except Exception as e:
-                        print(f"Failed to clean up downloaded file: {str(e)}")
+                        print(f"Failed to extract archive: {str(e)}")
+                        raise HTTPException(status_code=500, detail=f"Failed to extract archive: {str(e)}")
+            except (Exception, asyncio.CancelledError):
+                # Don't leave an unindexed mod directory behind (failed or cancelled install).
+                if created_mod_dir:
+                    await asyncio.shield(run_blocking(shutil.rmtree, mod_dir, ignore_errors=True))
+                elif mod_dir.exists() and not any(mod_dir.iterdir()):
+                    mod_dir.rmdir()
+                raise
+            finally:
+                await self._release_downloads(files_data, download_tasks)
+
+            await run_blocking(_write_manifest, mod_dir, manifest)
+            progress["stage"] = "finalizing"
+
+            # Hardlink the files already installed by other mods.
+            if ContentStore.get().enabled:
+                try:
+                    await run_blocking(ContentStore.get().dedupe_dir, mod_dir, pool="archive")
+                except Exception as e:
+                    print(f"Failed to deduplicate mod files: {str(e)}")
 
             # Process images from GameBanana
             images = []
@@ -108,6 +159,8 @@ class GameBananaService:
                         # "filename_100": img.get('_sFile100', img['_sFile']),
                         "caption": img.get('_sCaption', '')
                     })
+                # Cached locally, so the UI can show them right away (and offline).
+                RemoteImageCache.get().prefetch(gamebanana_image_url(img['filename']) for img in images)
 
             # Create metadata.json
             metadata = {
@@ -127,23 +180,23 @@ class GameBananaService:
                 }
             }
 
-            # Save metadata
-            try:
-                with open(mod_dir / "metadata.json", 'w') as f:
-                    json.dump(metadata, f, indent=2)
-                print(f"Saved metadata to: {mod_dir / 'metadata.json'}")
-            except Exception as e:
-                print(f"Failed to save metadata: {str(e)}")
-                raise HTTPException(status_code=500, detail=f"Failed to save metadata: {str(e)}")
+            # Not interleaved with the watcher syncs and the other mutations of the mods.
+            async with mod_service._mutations_lock:
+                # Save metadata
+                try:
+                    await run_blocking(FileUtils.write_json, mod_dir / "metadata.json", metadata)
+                    print(f"Saved metadata to: {mod_dir / 'metadata.json'}")
+                except Exception as e:
+                    print(f"Failed to save metadata: {str(e)}")
+                    raise HTTPException(status_code=500, detail=f"Failed to save metadata: {str(e)}")
 
-            # Reload mods
-            try:
-                from .mod_service import ModService
-                ModService.get().add_mod_metadata(metadata)
-                print("Updated mods metadata")
-            except Exception as e:
-                print(f"Failed to update mods metadata: {str(e)}")
-                raise HTTPException(status_code=500, detail=f"Failed to update mods metadata: {str(e)}")
+                # Reload mods
+                try:
+                    mod_service.add_mod_metadata(metadata)
+                    print("Updated mods metadata")
+                except Exception as e:
+                    print(f"Failed to update mods metadata: {str(e)}")
+                    raise HTTPException(status_code=500, detail=f"Failed to update mods metadata: {str(e)}")
 
             return metadata
 
@@ -152,16 +205,259 @@ class GameBananaService:
         except Exception as e:
             print(f"Failed to install mod: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Failed to install mod: {str(e)}")
+        finally:
+            mod_service.installing_dirs.difference_update(installing_dirs)
+
+    def _get_files_data(self, mod_data: Dict, selected_files: List[int]) -> List[Dict]:
+        """Get the GameBanana data of the selected files of a mod"""
+        files_data = []
+        for file_id in selected_files:
+            file_data = next((f for f in mod_data['_aFiles'] if f['_idRow'] == file_id), None)
+            if not file_data:
+                print(f"File not found: {file_id}")
+                continue
+            files_data.append(file_data)
+        return files_data
+
+    @staticmethod
+    def _installed_version(file_data: Dict) -> Dict:
+        return {
+            "id": file_data['_idRow'],
+            "date": file_data['_tsDateAdded'],
+            "name": file_data['_sFile'],
+            "url": file_data['_sDownloadUrl'],
+            "description": file_data['_sDescription'],
+            "size": file_data['_nFilesize']
+        }
+
+    async def _download_cached(self, file_data: Dict, semaphore: asyncio.Semaphore) -> Path:
+        """Download a GameBanana file, reusing the archive from the download cache when possible"""
+        async with self.download_cache.lock(file_data):
+            download_path = await self.download_cache.get_file(file_data)
+            if download_path is not None:
+                return download_path
+            download_path = self.download_cache.entry_path(file_data)
+            download_path.parent.mkdir(exist_ok=True)
+            async with semaphore:
+                await self.download_file(file_data['_sDownloadUrl'], download_path)
+            await self.download_cache.put_file(file_data, download_path)
+            return download_path
 
-    async def download_file(self, download_url: str, save_path: Path) -> bool:
-        """Download a file from GameBanana"""
-        async with httpx.AsyncClient() as client:
+    async def _release_downloads(self, files_data: List[Dict], download_tasks: List[asyncio.Task]):
+        """Stop the pending downloads (if an install step failed), and release the downloaded files:
+        kept in the download cache, or cleaned up. Failed downloads keep their '.part' file to be resumed."""
+        for download_task in download_tasks:
+            download_task.cancel()
+        await asyncio.gather(*download_tasks, return_exceptions=True)
+        for file_data, download_task in zip(files_data, download_tasks):
+            if download_task.cancelled() or download_task.exception() is not None:
+                continue
             try:
-                response = await client.get(download_url, headers=self.headers, follow_redirects=True)
-                response.raise_for_status()
-                
-                with open(save_path, 'wb') as f:
-                    f.write(response.content)
-                return True
+                await self.download_cache.release(file_data)
             except Exception as e:
+                print(f"Failed to clean up downloaded file: {str(e)}")
+
+    @staticmethod
+    async def _run_cancellable(func, *args, **kwargs):
+        """Run a blocking archive step taking a `cancel_event` in the "archive" pool. If the await is cancelled,
+        the event is set and the step waited for, so it doesn't write to the mod directory after the cancellation."""
+        cancel_event = threading.Event()
+        future = asyncio.ensure_future(run_blocking(func, *args, cancel_event=cancel_event, pool="archive", **kwargs))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            cancel_event.set()
+            await asyncio.gather(future, return_exceptions=True)
+            raise
+
+    @staticmethod
+    def _apply_delta(
+        mod_dir: Path, archives: List[tuple], old_manifest: Optional[Dict[str, list]], workers: int,
+        cancel_event: Optional[threading.Event] = None
+    ) -> tuple:
+        """Update a mod directory to the content of some archives [(path, GameBanana file id)], writing only the
+        new or changed files (by size and CRC-32) and removing the files of the old manifest that disappeared.
+        Without an old manifest, files are compared against the CRC-32 of the files on disk, and none is removed.
+        Stops before the next write once `cancel_event` is set (409).
+        Returns the (new manifest, report)."""
+        start_time = time.perf_counter()
+        manifest: Dict[str, list] = {}
+        for archive_path, file_id in archives:
+            for name, (size, crc) in FileUtils.list_archive_members(archive_path).items():
+                # Later archives overwrite the files of the previous ones, as on install.
+                manifest[name] = [size, crc, file_id]
+
+        report = {"written": 0, "written_bytes": 0, "unchanged": 0, "unchanged_bytes": 0, "removed": 0}
+        for archive_path, file_id in archives:
+            changed = set()
+            for name, (size, crc, source_id) in manifest.items():
+                if source_id != file_id:
+                    continue
+                target = FileUtils._safe_member_path(mod_dir, name)
+                old = old_manifest.get(name) if old_manifest is not None else None
+                if not target.is_file() or target.stat().st_size != size:
+                    unchanged = False
+                elif old_manifest is not None:
+                    unchanged = old is not None and old[0] == size and old[1] == crc
+                else:
+                    unchanged = FileUtils.crc32_file(target) == crc
+                if unchanged:
+                    report["unchanged"] += 1
+                    report["unchanged_bytes"] += size
+                else:
+                    changed.add(name)
+                    report["written"] += 1
+                    report["written_bytes"] += size
+            if changed:
+                FileUtils.extract_archive_staged(
+                    archive_path, mod_dir, workers=workers, only=changed, cancel_event=cancel_event
+                )
+
+        FileUtils._check_cancelled(cancel_event)
+        for name in (old_manifest or {}).keys() - manifest.keys():
+            target = FileUtils._safe_member_path(mod_dir, name)
+            if not target.is_file():
+                continue
+            FileUtils.remove_file(target)
+            report["removed"] += 1
+            # Remove the directories left empty.
+            parent = target.parent
+            while parent != mod_dir and not any(parent.iterdir()):
+                parent.rmdir()
+                parent = parent.parent
+
+        report["seconds"] = round(time.perf_counter() - start_time, 3)
+        return manifest, report
+
+    async def update_from_url(self, mod_id: str, mod_data: Dict, selected_files: List[int], progress: Optional[Dict] = None) -> Dict:
+        """Update an installed mod to the selected files of its GameBanana page (delta update).
+        Only the new or changed files are written, and the files that disappeared are removed.
+        The update stage, files done and delta report are tracked in the given progress dict, if any."""
+        from .mod_service import ModService
+        if progress is None:
+            progress = {}
+        mod_service = ModService.get()
+        mod = mod_service.mods_metadata_id.get(mod_id)
+        if mod is None:
+            raise HTTPException(status_code=404, detail="Mod not found")
+        mod_dir = mod_service.get_mod_dirpath(mod)
+        if not mod_dir.exists():
+            raise HTTPException(status_code=404, detail=f"Mod directory not found: {mod_dir.name}")
+
+        print(f"Updating mod: {mod['name']}")
+        files_data = self._get_files_data(mod_data, selected_files)
+        if not files_data:
+            raise HTTPException(status_code=400, detail="No files selected")
+        progress.update(stage="downloading", files=[f['_sFile'] for f in files_data], files_done=0, files_total=len(files_data))
+
+        settings = AppService.get().settings
+        semaphore = asyncio.Semaphore(settings.get("max_concurrent_downloads", 3))
+        download_tasks = [asyncio.create_task(self._download_cached(file_data, semaphore)) for file_data in files_data]
+        try:
+            try:
+                download_paths = await asyncio.gather(*download_tasks)
+            except HTTPException:
+                raise
+            except Exception as e:
+                print(f"Failed to download file: {str(e)}")
                 raise HTTPException(status_code=500, detail=f"Failed to download file: {str(e)}")
+            progress.update(stage="extracting", files_done=len(files_data))
+
+            # Serialized with the other mutations: the mod can't be toggled (renamed) or deleted while it is updated.
+            async with mod_service._mutations_lock:
+                mod = mod_service.mods_metadata_id.get(mod_id)
+                if mod is None:
+                    raise HTTPException(status_code=404, detail="Mod not found")
+                mod_dir = mod_service.get_mod_dirpath(mod)
+                if not mod_dir.exists():
+                    raise HTTPException(status_code=404, detail=f"Mod directory not found: {mod_dir.name}")
+
+                old_manifest = await run_blocking(_read_manifest, mod_dir)
+                archives = [(path, file_data['_idRow']) for path, file_data in zip(download_paths, files_data)]
+                workers = settings.get("extract_workers", 1)
+                try:
+                    manifest, report = await self._run_cancellable(self._apply_delta, mod_dir, archives, old_manifest, workers)
+                except HTTPException:
+                    raise
+                except Exception as e:
+                    print(f"Failed to update mod files: {str(e)}")
+                    raise HTTPException(status_code=500, detail=f"Failed to update mod files: {str(e)}")
+                await run_blocking(_write_manifest, mod_dir, manifest)
+                print(f"Updated mod files: {report}")
+                progress.update(stage="finalizing", delta=report)
+
+                if ContentStore.get().enabled:
+                    try:
+                        await run_blocking(ContentStore.get().dedupe_dir, mod_dir, pool="archive")
+                        await run_blocking(ContentStore.get().collect_garbage, pool="archive")
+                    except Exception as e:
+                        print(f"Failed to deduplicate mod files: {str(e)}")
+
+                mod["installed_versions"] = [self._installed_version(file_data) for file_data in files_data]
+                mod["updated_at"] = mod_data.get('_tsDateModified') or int(time.time())
+                mod_service.update_mod_metadata(mod)
+        finally:
+            await self._release_downloads(files_data, download_tasks)
+        return mod
+
+    async def download_file(self, download_url: str, save_path: Path, restart_on_416: bool = True) -> bool:
+        """Download a file from GameBanana, streaming it to disk in chunks.
+        The file is downloaded to a '.part' file first, which is resumed (HTTP Range) on the next attempt
+        if the download is interrupted. If the server rejects the range (416), the download is restarted
+        once from the beginning. Progress is tracked in self.downloads by file name."""
+        part_path = save_path.with_name(save_path.name + '.part')
+        progress = {
+            "file": save_path.name,
+            "status": "downloading",
+            "bytes_done": 0,
+            "bytes_total": None,
+            "bytes_per_second": 0.0,
+            "resumed_from": 0,
+            "error": None,
+        }
+        self.downloads[save_path.name] = progress
+        client = get_http_client()
+        try:
+            offset = part_path.stat().st_size if part_path.exists() else 0
+            # Byte counts are checked against Content-Length and used as Range offsets: no content decoding.
+            headers = {**self.headers, "Accept-Encoding": "identity"}
+            if offset > 0:
+                headers["Range"] = f"bytes={offset}-"
+
+            async with client.stream("GET", download_url, headers=headers, follow_redirects=True) as response:
+                if response.status_code == 416 and offset > 0 and restart_on_416:
+                    # The partial file is not valid for this resource anymore.
+                    await run_blocking(part_path.unlink)
+                    return await self.download_file(download_url, save_path, restart_on_416=False)
+                response.raise_for_status()
+                if response.status_code != 206:
+                    # The server ignored the range request, start over.
+                    offset = 0
+                content_length = response.headers.get("Content-Length")
+                if content_length is not None:
+                    progress["bytes_total"] = offset + int(content_length)
+                progress["bytes_done"] = progress["resumed_from"] = offset
+
+                start_time = time.perf_counter()
+                f = await run_blocking(open, part_path, 'ab' if offset > 0 else 'wb')
+                try:
+                    async for chunk in response.aiter_raw(self.download_chunk_size):
+                        await run_blocking(f.write, chunk)
+                        progress["bytes_done"] += len(chunk)
+                        elapsed = time.perf_counter() - start_time
+                        if elapsed > 0:
+                            progress["bytes_per_second"] = round((progress["bytes_done"] - offset) / elapsed, 1)
+                finally:
+                    await asyncio.shield(run_blocking(f.close))
+
+            if progress["bytes_total"] is not None and progress["bytes_done"] != progress["bytes_total"]:
+                raise IOError(f"Incomplete download: {progress['bytes_done']}/{progress['bytes_total']} bytes")
+            await run_blocking(part_path.replace, save_path)
+            progress["status"] = "done"
+            return True
+        except HTTPException:
+            raise
+        except Exception as e:
+            progress["status"] = "failed"
+            progress["error"] = str(e)
+            raise HTTPException(status_code=500, detail=f"Failed to download file: {str(e)}")
@@ -0,0 +1,55 @@
+from typing import Optional
+
+import httpx
+
+from .app_service import AppService
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HttpClient:
+    """
+    This class is used to share one long-lived, pooled httpx.AsyncClient between the services,
+    so connections are kept alive and reused instead of paying a TCP/TLS handshake per request.
+    HTTP/2 is used when settings["http2"] is enabled and the 'h2' package is installed.
+    """
+
+    _instance = None
+
+    @staticmethod
+    def get():
+        if HttpClient._instance is None:
+            HttpClient._instance = HttpClient()
+        return HttpClient._instance
+
+    def __init__(self) -> None:
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            settings = AppService.get().settings
+            self._client = httpx.AsyncClient(
+                http2=settings.get("http2", False) and HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=settings.get("http_max_connections", 16),
+                    max_keepalive_connections=settings.get("http_max_keepalive_connections", 8),
+                    keepalive_expiry=30.0,
+                ),
+                timeout=httpx.Timeout(30.0, connect=10.0),
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client"""
+    return HttpClient.get().client
@@ -0,0 +1,156 @@
+import asyncio
+import base64
+import io
+from pathlib import Path
+from typing import List, Optional, Set
+
+from PIL import Image, ImageOps
+
+from .app_service import AppService
+from .remote_image_cache import RemoteImageCache, gamebanana_image_url
+from .worker_pool import run_blocking
+
+# Longest side of the placeholders, they are blurred by the UI.
+PLACEHOLDER_SIZE = 8
+
+
+def compute_image_info(image_path: Path) -> dict:
+    """Get the width, height, dominant colour ('#rrggbb') and tiny placeholder (WebP data URI) of an image"""
+    with Image.open(image_path) as image:
+        # Let JPEG decoding downscale by itself, the size is read from the header before that.
+        width, height = image.size
+        image.draft('RGB', (64, 64))
+        orientation = image.getexif().get(0x0112)
+        small = ImageOps.exif_transpose(image).convert('RGB')
+    if orientation in (5, 6, 7, 8):
+        width, height = height, width
+    small.thumbnail((64, 64))
+
+    # Most frequent colour of a reduced palette.
+    quantized = small.quantize(colors=5, method=Image.Quantize.MEDIANCUT)
+    _, index = max(quantized.getcolors())
+    r, g, b = quantized.getpalette()[index * 3:index * 3 + 3]
+
+    placeholder = small.copy()
+    placeholder.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    buffer = io.BytesIO()
+    placeholder.save(buffer, 'WEBP', quality=60)
+    return {
+        "width": width,
+        "height": height,
+        "color": f"#{r:02x}{g:02x}{b:02x}",
+        "placeholder": f"data:image/webp;base64,{base64.b64encode(buffer.getvalue()).decode('ascii')}",
+    }
+
+
+class ImageInfoService:
+    """
+    This class is used to add the width, height, dominant colour and a tiny placeholder to the images
+    of the mods metadata, so the UI can lay out and paint the mods grid before the images load.
+
+    Images without that info are processed incrementally in the background, in the "image" worker
+    pool: on startup, and whenever mods are added or changed on disk (schedule()). Remote GameBanana
+    images are read from the RemoteImageCache. Images that fail are retried on the next start.
+    """
+
+    _instance = None
+
+    @staticmethod
+    def get():
+        if ImageInfoService._instance is None:
+            ImageInfoService._instance = ImageInfoService()
+        return ImageInfoService._instance
+
+    def __init__(self) -> None:
+        self._event = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # (mod id, image filename) of the images that failed
+        self._failed: Set[tuple] = set()
+        self.computed = 0
+        self.failed = 0
+
+    def _pending_mod_ids(self) -> List[str]:
+        from .mod_service import ModService
+        return [
+            mod_id for mod_id, mod in ModService.get().mods_metadata_id.items()
+            if any(
+                image.get("width") is None and (mod_id, image["filename"]) not in self._failed
+                for image in mod.get("images") or []
+            )
+        ]
+
+    async def _image_path(self, mod: dict, image: dict) -> Path:
+        if not image["local"]:
+            file_path, _ = await RemoteImageCache.get().fetch(gamebanana_image_url(image["filename"]))
+            return Path(file_path)
+        image_path = AppService.get().mods_dir / image["filename"]
+        if not image_path.is_file():
+            # The filename may point to the mod directory before it was enabled/disabled.
+            from .mod_service import ModService
+            image_path = ModService.get().get_mod_dirpath(mod) / Path(image["filename"]).name
+        if not image_path.is_file():
+            raise FileNotFoundError(image["filename"])
+        return image_path
+
+    async def _process_mod(self, mod_id: str, semaphore: asyncio.Semaphore):
+        from .mod_service import ModService
+        mod_service = ModService.get()
+        mod = mod_service.mods_metadata_id.get(mod_id)
+        if mod is None:
+            return
+        images_info = {}
+        for image in list(mod.get("images") or []):
+            key = (mod_id, image["filename"])
+            if image.get("width") is not None or key in self._failed:
+                continue
+            try:
+                async with semaphore:
+                    image_path = await self._image_path(mod, image)
+                    images_info[image["filename"]] = await run_blocking(compute_image_info, image_path, pool="image")
+                self.computed += 1
+            except Exception as e:
+                self._failed.add(key)
+                self.failed += 1
+                print(f"Failed to compute image info of {image['filename']}: {str(e)}")
+        if images_info:
+            await mod_service.set_images_info(mod_id, images_info)
+
+    async def process_pending(self) -> int:
+        """Compute the info of the images that don't have it yet. Returns the number of mods processed."""
+        mod_ids = self._pending_mod_ids()
+        if mod_ids:
+            semaphore = asyncio.Semaphore(AppService.get().settings.get("image_workers", 2) * 2)
+            await asyncio.gather(*(self._process_mod(mod_id, semaphore) for mod_id in mod_ids))
+            print(f"Computed image info: {len(mod_ids)} mods")
+        return len(mod_ids)
+
+    def schedule(self):
+        """Process the images without info in the background (eg. after mods are added)"""
+        self._event.set()
+
+    async def _process_loop(self):
+        while True:
+            await self._event.wait()
+            self._event.clear()
+            try:
+                await self.process_pending()
+            except Exception as e:
+                print(f"Failed to compute image info: {str(e)}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._process_loop())
+        self.schedule()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "computed": self.computed,
+            "failed": self.failed,
+            "pending_mods": len(self._pending_mod_ids()),
+        }
@@ -0,0 +1,205 @@
+import asyncio
+import json
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+from .app_service import AppService
+from .utils import FileUtils
+from .worker_pool import run_blocking
+
+
+FINISHED_STATES = ("done", "failed", "cancelled")
+
+# Finished jobs kept for the status endpoint (and persisted).
+MAX_FINISHED_JOBS = 100
+
+
+class InstallJobQueue:
+    """
+    This class is used to run the GameBanana installs in the background.
+
+    Installs (and updates) are queued as jobs (queued -> running -> done/failed/cancelled) and run by settings["install_workers"] workers (default 2).
+    Each job exposes its state, progress (stage, files and bytes done) and error, and can be cancelled.
+    The jobs are persisted to 'install_jobs.json' in the app data dir, so the installs that were
+    queued or running when the app was closed are resumed on the next start.
+    """
+
+    _instance = None
+
+    @staticmethod
+    def get():
+        if InstallJobQueue._instance is None:
+            InstallJobQueue._instance = InstallJobQueue()
+        return InstallJobQueue._instance
+
+    def __init__(self) -> None:
+        self.jobs_file = AppService.get().appdata_dir / "install_jobs.json"
+        jobs = FileUtils.read_json(self.jobs_file) if self.jobs_file.exists() else []
+        # job id -> job, in submission order.
+        self.jobs: Dict[str, dict] = {job["id"]: job for job in jobs}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._save_lock: Optional[asyncio.Lock] = None
+        self._stopping = False
+
+    def start(self):
+        """Start the workers on the running event loop, and resume the unfinished jobs"""
+        if self._workers:
+            return
+        self._stopping = False
+        self._queue = asyncio.Queue()
+        self._save_lock = asyncio.Lock()
+        for job in self.jobs.values():
+            if job["status"] in ("queued", "running"):
+                if job["status"] == "running":
+                    print(f"Resuming install job {job['id']} ({job['name']})")
+                job["status"] = "queued"
+                self._queue.put_nowait(job["id"])
+        workers = max(1, AppService.get().settings.get("install_workers", 2))
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(workers)]
+
+    async def stop(self):
+        """Stop the workers, the running jobs are queued again to be resumed on the next start"""
+        self._stopping = True
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        await self._save()
+
+    async def _save(self):
+        # Serialized on the loop: the jobs are mutated by the running installs.
+        text = json.dumps(list(self.jobs.values()), indent=2)
+        async with self._save_lock:
+            await run_blocking(FileUtils.write_text, self.jobs_file, text, atomic=True)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job["status"] in FINISHED_STATES]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    async def submit(self, mod_data: Dict, selected_files: List[int], update_mod_id: Optional[str] = None) -> dict:
+        """Queue the install of some files of a GameBanana mod, or the (delta) update of an installed mod
+        to these files if update_mod_id is given. Returns the job status."""
+        job = {
+            "id": str(uuid.uuid4()),
+            "name": mod_data.get('_sName'),
+            "kind": "update" if update_mod_id else "install",
+            "status": "queued",
+            "created_at": int(time.time()),
+            "started_at": None,
+            "finished_at": None,
+            "progress": {},
+            "error": None,
+            "mod_id": None,
+            "mod_data": mod_data,
+            "selected_files": selected_files,
+            "update_mod_id": update_mod_id,
+        }
+        self.jobs[job["id"]] = job
+        self._prune()
+        await self._save()
+        self._queue.put_nowait(job["id"])
+        return self.get_status(job["id"])
+
+    async def cancel(self, job_id: str) -> dict:
+        """Cancel a queued or running job"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        if job["status"] in FINISHED_STATES:
+            raise HTTPException(status_code=409, detail=f"Job already {job['status']}")
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            if task.cancelled():
+                # Cancelled before it started running.
+                job["status"] = "cancelled"
+                job["finished_at"] = int(time.time())
+                await self._save()
+        else:
+            job["status"] = "cancelled"
+            job["finished_at"] = int(time.time())
+            await self._save()
+        return self.get_status(job_id)
+
+    def get_status(self, job_id: str) -> dict:
+        """Get the state, progress and error of a job"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        status = {key: value for key, value in job.items() if key not in ("mod_data", "selected_files", "update_mod_id")}
+        if job["status"] == "running":
+            # Bytes progress of the job's downloads.
+            from .gamebanana_service import GameBananaService
+            downloads = GameBananaService.get().downloads
+            files = [downloads[name] for name in job["progress"].get("files", []) if name in downloads]
+            status["progress"] = {
+                **job["progress"],
+                "bytes_done": sum(download["bytes_done"] for download in files),
+                "bytes_total": sum(download["bytes_total"] or 0 for download in files),
+            }
+        return status
+
+    def get_statuses(self) -> List[dict]:
+        return [self.get_status(job_id) for job_id in self.jobs]
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] != "queued":
+                continue
+            task = asyncio.create_task(self._run(job))
+            self._running[job_id] = task
+            try:
+                # Waited, not awaited, so that a cancelled or failed job doesn't stop the worker.
+                await asyncio.wait([task])
+                if not task.cancelled():
+                    task.result()
+            except asyncio.CancelledError:
+                # Worker stopped: stop its job too.
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                raise
+            except Exception as e:
+                print(f"Install job {job_id} ({job['name']}) error: {str(e)}")
+            finally:
+                self._running.pop(job_id, None)
+
+    async def _run(self, job: dict):
+        from .gamebanana_service import GameBananaService
+        job["status"] = "running"
+        job["started_at"] = int(time.time())
+        job["progress"] = {}
+        job["error"] = None
+        try:
+            await self._save()
+            if job.get("update_mod_id"):
+                metadata = await GameBananaService.get().update_from_url(
+                    job["update_mod_id"], job["mod_data"], job["selected_files"], progress=job["progress"]
+                )
+            else:
+                metadata = await GameBananaService.get().install_from_url(
+                    job["mod_data"], job["selected_files"], progress=job["progress"]
+                )
+            job["status"] = "done"
+            job["mod_id"] = metadata["id"]
+        except asyncio.CancelledError:
+            # On shutdown the job is resumed on the next start.
+            job["status"] = "queued" if self._stopping else "cancelled"
+        except HTTPException as e:
+            job["status"] = "failed"
+            job["error"] = e.detail
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+        if job["status"] in FINISHED_STATES:
+            job["finished_at"] = int(time.time())
+        print(f"Install job {job['id']} ({job['name']}): {job['status']}")
+        await self._save()
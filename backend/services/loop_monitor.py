@@ -0,0 +1,56 @@
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+
+
+class EventLoopLagMonitor:
+    """
+    This class is used to measure the asyncio event loop lag: how late a periodic
+    wake-up is scheduled compared to the requested interval. A responsive loop stays
+    close to 0 ms, blocking work on the loop shows up as lag spikes.
+    """
+
+    _instance = None
+
+    @staticmethod
+    def get():
+        if EventLoopLagMonitor._instance is None:
+            EventLoopLagMonitor._instance = EventLoopLagMonitor()
+        return EventLoopLagMonitor._instance
+
+    def __init__(self, interval: float = 0.1, window: int = 600) -> None:
+        self.interval = interval
+        self.samples: deque[float] = deque(maxlen=window)  # Lag samples in seconds.
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _monitor(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - start - self.interval)
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    def start(self):
+        """Start monitoring the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._monitor())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        samples = sorted(self.samples)
+        if not samples:
+            return {"samples": 0, "last_ms": 0.0, "avg_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        return {
+            "samples": len(samples),
+            "last_ms": round(self.samples[-1] * 1000, 2),
+            "avg_ms": round(sum(samples) / len(samples) * 1000, 2),
+            "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 2),
+            "max_ms": round(self.max_lag * 1000, 2),
+        }
@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from .utils import FileUtils
+
+
+DURABILITY_POLICIES = ("per_op", "interval", "shutdown")
+
+
+class MetadataJournal:
+    """
+    This class is used to journal the mods metadata mutations (write-behind).
+
+    Mutations are appended to a compact JSON-lines journal and a background flusher
+    coalesces them into each mod's metadata.json and periodic mods.json snapshots,
+    truncating the journal once everything is on disk. On startup, the journal is
+    replayed so a crash doesn't lose any mutation.
+
+    The metadata.json contents, and the snapshot (at most every `snapshot_interval_s`),
+    are serialized when journaled, on the thread that mutates the mods: the flusher
+    only writes those frozen texts, atomically, and never reads the live mods.
+
+    The journal fsync policy is one of:
+    - "per_op": fsync after every appended mutation.
+    - "interval": fsync at most every `flush_interval_ms`, by the flusher.
+    - "shutdown": only fsync on shutdown.
+    """
+
+    def __init__(
+        self,
+        journal_file: Path,
+        scope: str,
+        metadata_path: Callable[[dict], Path],
+        snapshot_file: Path,
+        build_snapshot: Callable[[], str],
+        durability: str = "interval",
+        flush_interval_ms: int = 500,
+        snapshot_interval_s: float = 5.0,
+    ) -> None:
+        if durability not in DURABILITY_POLICIES:
+            print(f"Invalid journal durability policy '{durability}', using 'interval'")
+            durability = "interval"
+        self.journal_file = journal_file
+        # Journal entries of other scopes (ie. another mods dir) are ignored on replay.
+        self.scope = scope
+        self.metadata_path = metadata_path
+        self.snapshot_file = snapshot_file
+        self.build_snapshot = build_snapshot
+        self.durability = durability
+        self.flush_interval = max(flush_interval_ms, 10) / 1000
+        self.snapshot_interval = snapshot_interval_s
+
+        self._lock = threading.RLock()
+        self._file = None
+        self._pending: dict[str, tuple[Path, str]] = {}  # mod id -> latest metadata.json path and text to write.
+        self._snapshot: Optional[str] = None  # Snapshot text to write.
+        self._snapshot_dirty = False  # Mutations since the snapshot was built.
+        self._last_snapshot = float("-inf")
+        self._needs_fsync = False
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.journal_file, 'a', encoding='utf-8')
+
+    def _append(self, entry: dict):
+        with self._lock:
+            self._open()
+            entry["scope"] = self.scope
+            self._file.write(json.dumps(entry, separators=(',', ':')) + "\n")
+            self._file.flush()
+            if self.durability == "per_op":
+                os.fsync(self._file.fileno())
+            else:
+                self._needs_fsync = True
+
+    def put(self, *mods: dict):
+        """Journal the new state of some mods, their metadata.json will be written by the flusher"""
+        with self._lock:
+            for mod in mods:
+                self._append({"op": "put", "mod": mod})
+                self._pending[mod["id"]] = (self.metadata_path(mod), json.dumps(mod, indent=2))
+            self._mark_dirty()
+
+    def delete(self, mod_id: str):
+        """Journal the removal of a mod"""
+        with self._lock:
+            self._append({"op": "delete", "id": mod_id})
+            self._pending.pop(mod_id, None)
+            self._mark_dirty()
+
+    def _mark_dirty(self):
+        self._snapshot_dirty = True
+        if time.monotonic() - self._last_snapshot >= self.snapshot_interval:
+            self._freeze_snapshot()
+
+    def _freeze_snapshot(self):
+        self._snapshot = self.build_snapshot()
+        self._snapshot_dirty = False
+        self._last_snapshot = time.monotonic()
+
+    def write_snapshot(self):
+        """Build and write the snapshot now (eg. after a full rescan)"""
+        with self._lock:
+            self._freeze_snapshot()
+            FileUtils.write_text(self.snapshot_file, self._snapshot, atomic=True)
+            self._snapshot = None
+
+    def replay(self) -> List[dict]:
+        """Read the journal left by a previous run.
+        Returns the journaled operations, coalesced to the last one per mod id, in order."""
+        if not self.journal_file.exists():
+            return []
+        operations: dict[str, dict] = {}
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn write of the last entry on crash.
+                    continue
+                if entry.get("scope") != self.scope:
+                    continue
+                mod_id = entry["mod"]["id"] if entry["op"] == "put" else entry["id"]
+                operations.pop(mod_id, None)
+                operations[mod_id] = entry
+        return list(operations.values())
+
+    def flush(self, snapshot: bool = True):
+        """Write the pending metadata.json files, and the mods.json snapshot, then truncate the journal.
+        Call it from the thread that mutates the mods: the snapshot is built from them."""
+        with self._lock:
+            if snapshot and self._snapshot_dirty:
+                self._freeze_snapshot()
+            self._write(fsync=self.durability == "interval")
+
+    def _write(self, fsync: bool):
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            for mod_id, (path, text) in pending.items():
+                if not path.parent.is_dir():
+                    print(f"Skipping metadata of missing mod directory: {path.parent}")
+                    continue
+                try:
+                    FileUtils.write_text(path, text, atomic=True)
+                except Exception as e:
+                    print(f"Failed to write metadata of mod {mod_id}: {str(e)}")
+                    # Retry on the next flush, and keep the journal until then.
+                    self._pending.setdefault(mod_id, (path, text))
+
+            if fsync and self._needs_fsync and self._file is not None:
+                os.fsync(self._file.fileno())
+                self._needs_fsync = False
+
+            if self._snapshot is not None and not self._pending:
+                FileUtils.write_text(self.snapshot_file, self._snapshot, atomic=True)
+                self._snapshot = None
+                if not self._snapshot_dirty:
+                    # Everything journaled is now on disk.
+                    if self._file is not None:
+                        self._file.close()
+                        self._file = None
+                    with open(self.journal_file, 'w', encoding='utf-8'):
+                        pass
+                    self._needs_fsync = False
+
+    def _flush_loop(self):
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self._write(fsync=self.durability == "interval")
+            except Exception as e:
+                print(f"Failed to flush metadata journal: {str(e)}")
+
+    def start(self):
+        """Start the background flusher"""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._flush_loop, name="metadata-journal", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background flusher and flush everything to disk"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            if self._snapshot_dirty or self._pending:
+                self._freeze_snapshot()
+            self._write(fsync=True)
+            if self._file is not None:
+                self._file.close()
+                self._file = None
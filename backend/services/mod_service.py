@@ -1,18 +1,95 @@
 import os
 import json
+import asyncio
+import shutil
+import time
+import base64
+import hashlib
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, List
-from fastapi import UploadFile, HTTPException
+from typing import Optional, List, Union
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
 import json
 import uuid
 
-from models import Mod, ModCategory, Settings, ArchiveType, Image, InstalledVersion, GameBananaData
+from models import Mod, ModCategory, Settings, ArchiveType, Image, InstalledVersion, GameBananaData, ModToggleState
 from .categories import get_categories, get_character_categories
 from .character_list import get_characters_list
 from .app_service import AppService
-from .utils import FileUtils
+from .utils import FileUtils, FingerprintCache, ListingCache, StatCache
+from .mod_store import SQLiteModStore
+from .metadata_journal import MetadataJournal
+from .worker_pool import run_blocking
+from .content_store import ContentStore
+from .upload_service import UploadedFile
+from .image_info import ImageInfoService
+
+MOD_SORT_FIELDS = {"name", "created_at", "updated_at", "enabled"}
+MOD_PROJECTION_FIELDS = set(Mod.model_fields) | {"thumbnail"}
+# Bumped when the layout of the pagination cursors changes.
+CURSOR_VERSION = 1
+# Characters not allowed in mod directory names (Windows reserved characters and path separators).
+INVALID_MOD_NAME_CHARS = set('<>:"/\\|?*')
+
+
+def _sort_value(mod: dict, field: str):
+    value = mod.get(field)
+    if field == "name":
+        return (value or "").lower()
+    if field == "enabled":
+        return 1 if value else 0
+    return value or 0
+
+
+def _validate_mod_name(name: Optional[str]) -> str:
+    """Check that a mod name is usable as a single directory name. Returns the stripped name."""
+    name = (name or "").strip()
+    if not name or name in (".", "..") or name.startswith("DISABLED_"):
+        raise HTTPException(status_code=400, detail=f"Invalid mod name: {name!r}")
+    if any(char in INVALID_MOD_NAME_CHARS or ord(char) < 32 for char in name) or name.endswith("."):
+        raise HTTPException(status_code=400, detail=f"Invalid mod name: {name!r}")
+    return name
+
+
+def _encode_cursor(key: list, sort_field: Optional[str], descending: bool) -> str:
+    """Encode the sort key of the last item of a page, with the sort order it belongs to"""
+    cursor = {"v": CURSOR_VERSION, "sort": sort_field, "desc": descending, "key": key}
+    return base64.urlsafe_b64encode(json.dumps(cursor, separators=(',', ':')).encode()).decode()
+
+
+def _decode_cursor(cursor: str, sort_field: Optional[str], descending: bool) -> list:
+    """Get the sort key of a cursor, checking it was made for the same sort order. Raises a 400 otherwise."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(data, dict) or data.get("v") != CURSOR_VERSION:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if data.get("sort") != sort_field or data.get("desc") is not descending:
+        raise HTTPException(status_code=400, detail="Cursor doesn't match the sort order")
+    key = data.get("key")
+    value_type = str if sort_field == "name" else int
+    if (
+        not isinstance(key, list) or len(key) != 2 or not isinstance(key[1], str)
+        or not isinstance(key[0], value_type) or isinstance(key[0], bool)
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key
+
+
+def _project_mod(mod: dict, fields: List[str]) -> dict:
+    """Keep only the given fields of a mod. 'thumbnail' is the first image of the mod."""
+    projected = {}
+    for field in fields:
+        if field == "thumbnail":
+            projected[field] = mod["images"][0] if mod.get("images") else None
+        else:
+            projected[field] = mod.get(field)
+    return projected
+
 
 def _find_mode_images(mode_dirpath: Path) -> List[Image]:
     """Find all images for a mod"""
@@ -38,13 +115,89 @@ class ModService:
         return ModService._instance
 
     def __init__(self):
+        self.listing_cache = ListingCache()
+        # Stat results of the images served by /api/image, dropped on every mod mutation.
+        self.image_stats = StatCache()
+        # Serializes the mutations that run part of their work in the worker pool.
+        self._mutations_lock = asyncio.Lock()
+        # Directories (enabled and disabled names) of the mods being added or installed.
+        self.installing_dirs: set[Path] = set()
         self.init()
 
     def init(self):
-        self.mods_file = AppService.get().mods_dir / "mods.json"
+        if getattr(self, "journal", None) is not None:
+            # Flush the pending mutations of the previous mods dir.
+            self.journal.stop()
+            self.fingerprints.save()
+        app_service = AppService.get()
+        self.mods_file = app_service.mods_dir / "mods.json"
         self.mods_metadata = {}
         self.mods_metadata_id: dict[str, dict] = {}
+        self.fingerprints = FingerprintCache(self.mods_file.with_name("mods_fingerprints.json"))
+        self.last_rescan_report: Optional[dict] = None
+        self._listing_generation = uuid.uuid4().hex
+        self._listing_versions: dict[tuple, int] = {}
+        self.listing_cache.invalidate()
+        self.image_stats.invalidate()
+        if getattr(self, "store", None) is not None:
+            self.store.close()
+        self.store: Optional[SQLiteModStore] = None
+        if AppService.get().settings.get("use_sqlite_store", False):
+            self.mods_file.parent.mkdir(parents=True, exist_ok=True)
+            self.store = SQLiteModStore(self.mods_file.with_name("mods.db"))
+        self.journal = MetadataJournal(
+            app_service.appdata_dir / "metadata_journal.jsonl",
+            scope=str(app_service.mods_dir),
+            metadata_path=self._mod_metadata_path,
+            snapshot_file=self.mods_file,
+            build_snapshot=self._build_mods_snapshot,
+            durability=app_service.settings.get("journal_durability", "interval"),
+            flush_interval_ms=app_service.settings.get("journal_flush_interval_ms", 500),
+        )
         self.load_mods_metadata()
+        self._replay_journal()
+        self.journal.start()
+
+    def shutdown(self):
+        """Flush the pending metadata mutations, save the fingerprints and close the store"""
+        self.journal.stop()
+        self.fingerprints.save()
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def _mod_metadata_path(self, mod: dict) -> Path:
+        return self.get_mod_dirpath(mod) / "metadata.json"
+
+    def _build_mods_snapshot(self) -> str:
+        """Serialize the in-memory mods metadata for mods.json"""
+        return json.dumps(self.mods_metadata, indent=2)
+
+    def _replay_journal(self):
+        """Re-apply the metadata mutations journaled by a previous run that didn't reach the disk"""
+        operations = self.journal.replay()
+        if not operations:
+            return
+        print(f"Replaying {len(operations)} journaled mod metadata operations")
+        for entry in operations:
+            if entry["op"] == "delete":
+                self._remove_mod_metadata(entry["id"])
+                continue
+            mod = entry["mod"]
+            existing = self.mods_metadata_id.get(mod["id"], None)
+            if existing is not None:
+                # Keep the same dict, it is referenced by the listings.
+                existing.clear()
+                existing.update(mod)
+                mod = existing
+            elif self.get_mod_dirpath(mod).is_dir():
+                self._insert_mod_metadata(mod)
+            else:
+                continue
+            self._persist_mods(mod)
+            self.journal.put(mod)
+        # Writes the metadata.json files and mods.json, then truncates the journal.
+        self.journal.flush()
 
     def get_mod_metadata_by_id(self, mod_id: str) -> dict:
         return self.mods_metadata_id.get(mod_id, None)
@@ -57,7 +210,10 @@ class ModService:
 
     def load_mods_metadata(self, force_reload: bool = False):
         """Ensure mods.json exists and contains all mods from the filesystem"""
-        if self.mods_file.exists() and not force_reload:
+        if self.store is not None and not force_reload and self.store.count() > 0:
+            # Load mods metadata from the SQLite store.
+            self.mods_metadata = self._index_mods(self.store.all())
+        elif self.mods_file.exists() and not force_reload:
             # Load mods metadata from mods.json.
             with open(self.mods_file, 'r') as f:
                 self.mods_metadata = json.load(f)
@@ -70,151 +226,451 @@ class ModService:
                 else:
                     for mod in mods:
                         self.mods_metadata_id[mod["id"]] = mod
+            if self.store is not None:
+                self.store.replace_all(self.mods_metadata_id.values())
         else:
             # Scan mods directory and create mods.json if it doesn't exist or if force_reload is True.
-            all_mods_metadata = {}  # by category.
-            all_mods_dir = AppService.get().mods_dir
-
-            # Initialize the nested structure
-            for category in get_categories():
-                if category == "Characters":
-                    all_mods_metadata[category] = {}
-                    for character in get_character_categories():
-                        all_mods_metadata[category][character] = []
-                else:
-                    all_mods_metadata[category] = []
-
-            # Ensure base directories exist
-            self.mods_file.parent.mkdir(parents=True, exist_ok=True)
+            self.rescan_mods()
+
+    def _index_mods(self, mods: List[dict]) -> dict:
+        """Build the nested (category -> character -> mods) structure from a flat list of mods"""
+        all_mods_metadata = {}
+        for category in get_categories():
+            if category == "Characters":
+                all_mods_metadata[category] = {}
+                for character in get_character_categories():
+                    all_mods_metadata[category][character] = []
+            else:
+                all_mods_metadata[category] = []
+        for mod in mods:
+            if mod["category"] == "Characters":
+                all_mods_metadata.setdefault(mod["category"], {}).setdefault(mod["character"], []).append(mod)
+            else:
+                all_mods_metadata.setdefault(mod["category"], []).append(mod)
+            self.mods_metadata_id[mod["id"]] = mod
+        return all_mods_metadata
+
+    def _persist_mods(self, *mods: dict):
+        """Write the given mods to the SQLite store, if enabled, as single-row writes"""
+        if self.store is None:
+            return
+        if len(mods) == 1:
+            self.store.upsert(mods[0])
+        else:
+            self.store.upsert_many(mods)
 
-            # Scan through all categories
-            for category in get_categories():
-                dirpath: Path = all_mods_dir / category
-                if not dirpath.exists():
-                    dirpath.mkdir()
+    def query_mods(
+        self,
+        category: Optional[str] = None,
+        character: Optional[str] = None,
+        enabled: Optional[bool] = None,
+        gamebanana_id: Optional[int] = None,
+        updated_since: Optional[int] = None,
+    ) -> List[dict]:
+        """Get the mods matching all the given filters.
+        Uses the SQLite store indexes when enabled, otherwise scans the in-memory metadata."""
+        if self.store is not None:
+            ids = self.store.query_ids(category, character, enabled, gamebanana_id, updated_since)
+            return [self.mods_metadata_id[mod_id] for mod_id in ids if mod_id in self.mods_metadata_id]
+
+        if category is not None:
+            if category == "Characters" and character is not None:
+                mods = self.get_mods_metadata(category, character)
+            elif category == "Characters":
+                mods = [mod for char_mods in self.mods_metadata.get(category, {}).values() for mod in char_mods]
+            else:
+                mods = self.get_mods_metadata(category)
+        else:
+            mods = self.mods_metadata_id.values()
+        return [
+            mod for mod in mods
+            if (character is None or mod.get("character") == character)
+            and (enabled is None or mod["enabled"] == enabled)
+            and (gamebanana_id is None or (mod.get("gamebanana") or {}).get("id") == gamebanana_id)
+            and (updated_since is None or (mod.get("updated_at") or 0) >= updated_since)
+        ]
+
+    def _iter_parent_dirs(self):
+        """Yield (category, character, dirpath) for every folder that holds mods, creating missing ones"""
+        all_mods_dir = AppService.get().mods_dir
+        for category in get_categories():
+            dirpath: Path = all_mods_dir / category
+            if not dirpath.exists():
+                dirpath.mkdir()
+
+            if category == "Characters":
+                for character in get_character_categories():
+                    char_dirpath = dirpath / character
+                    if not char_dirpath.exists():
+                        char_dirpath.mkdir()
+                    yield category, character, char_dirpath
+            else:
+                yield category, None, dirpath
+
+    def _scan_parent_dir(self, all_mods_dir: Path, category: str, character: Optional[str], dirpath: Path) -> list:
+        """Scan the mod directories inside a category/character folder.
+        Returns a list of (rel_path, metadata, fingerprint, loaded, stat_time, load_time), sorted by folder name."""
+        results = []
+        for mod_dir in sorted(dirpath.iterdir(), key=lambda p: p.name.lower()):
+            if not mod_dir.is_dir():
+                continue
+            rel_path = mod_dir.relative_to(all_mods_dir).as_posix()
+
+            t = time.perf_counter()
+            fingerprint = FingerprintCache.fingerprint(mod_dir)
+            stat_time = time.perf_counter() - t
+
+            metadata = None
+            if self.fingerprints.is_unchanged(rel_path, fingerprint):
+                metadata = self.mods_metadata_id.get(self.fingerprints.get(rel_path)["id"], None)
+
+            loaded = metadata is None
+            load_time = 0.0
+            if loaded:
+                t = time.perf_counter()
+                metadata = self._load_mod_dir(mod_dir, category, character)
+                # metadata.json may have been created or repaired.
+                fingerprint = FingerprintCache.fingerprint(mod_dir)
+                load_time = time.perf_counter() - t
+
+            results.append((rel_path, metadata, fingerprint, loaded, stat_time, load_time))
+        return results
+
+    def _load_mod_dir(self, mod_dir: Path, category: str, character: Optional[str]) -> dict:
+        """Read the metadata.json of a mod directory, repairing or creating it if needed"""
+        enabled = not mod_dir.name.startswith("DISABLED_")
+        name = mod_dir.name if enabled else mod_dir.name[9:]
+        metadata_filepath = mod_dir / "metadata.json"
+        if metadata_filepath.exists():
+            with open(metadata_filepath, 'r') as f:
+                metadata = json.load(f)
+            # The directory location is authoritative (the mod may have been moved or renamed).
+            location = {"name": name, "category": category, "character": character, "enabled": enabled}
+            if any(metadata.get(key) != value for key, value in location.items()):
+                metadata.update(location)
+                metadata["updated_at"] = int(datetime.now().timestamp())
+                with open(metadata_filepath, 'w') as f:
+                    json.dump(metadata, f, indent=2)
+        else:
+            # New mod! Possibly added manually.
+            images = _find_mode_images(mod_dir)
+            current_time = int(datetime.now().timestamp())
+            metadata = {
+                "id": uuid.uuid4().hex,
+                "name": name,
+                "category": category,
+                "character": character,
+                "images": [img.model_dump() for img in images],
+                "created_at": current_time,
+                "updated_at": current_time,
+                "enabled": enabled,
+                "installed_versions": [],
+                "gamebanana": None,
+            }
+            # Write the metadata to the metadata.json file.
+            with open(metadata_filepath, 'w') as f:
+                json.dump(metadata, f, indent=2)
+        return metadata
+
+    def rescan_mods(self, workers: Optional[int] = None) -> dict:
+        """Rescan the mods directory, only re-reading the mod directories whose fingerprint changed.
+        Category/character folders are scanned by a pool of `workers` threads (1 for a serial scan).
+        Returns a report with the added, removed, changed and unchanged counts plus timings."""
+        start_time = time.perf_counter()
+        # metadata.json files must be up to date before re-reading them.
+        self.journal.flush(snapshot=False)
+        all_mods_dir = AppService.get().mods_dir
+        previous_entries = self.fingerprints.entries
+        # Used to detect renamed directories (eg. 'DISABLED_' prefix toggled outside the app).
+        previous_by_inode = {
+            entry["fingerprint"][0][1]: rel_path
+            for rel_path, entry in previous_entries.items()
+            if entry["fingerprint"][0] is not None
+        }
+
+        all_mods_metadata = {}  # by category.
+        all_mods_metadata_id: dict[str, dict] = {}
+        new_entries: dict[str, dict] = {}
+        renamed_from = set()
+        report = {"added": 0, "removed": 0, "changed": 0, "unchanged": 0}
+        stat_time = 0.0
+        load_time = 0.0
+
+        # Initialize the nested structure
+        for category in get_categories():
+            if category == "Characters":
+                all_mods_metadata[category] = {}
+                for character in get_character_categories():
+                    all_mods_metadata[category][character] = []
+            else:
+                all_mods_metadata[category] = []
+
+        # Ensure base directories exist
+        self.mods_file.parent.mkdir(parents=True, exist_ok=True)
+
+        if workers is None:
+            # Serial by default: threads didn't pay off on warm caches (see benchmarks/scan_benchmark.py).
+            workers = AppService.get().settings.get("scan_workers", 1)
+
+        # Fan out the category/character folders to the worker pool,
+        # results are merged below in the same order as the serial scan.
+        parent_dirs = list(self._iter_parent_dirs())
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mods-scan") as executor:
+                scanned = list(executor.map(
+                    lambda parent: self._scan_parent_dir(all_mods_dir, *parent),
+                    parent_dirs
+                ))
+        else:
+            scanned = [self._scan_parent_dir(all_mods_dir, *parent) for parent in parent_dirs]
 
-                if category == "Characters":
-                    for character in get_character_categories():
-                        char_dirpath = dirpath / character
-                        if not char_dirpath.exists():
-                            char_dirpath.mkdir()
-
-                        for mod_dir in char_dirpath.iterdir():
-                            if not mod_dir.is_dir():
-                                continue
-                            
-                            enabled = not mod_dir.name.startswith("DISABLED_")
-                            metadata_filepath = mod_dir / "metadata.json"
-                            if metadata_filepath.exists():
-                                with open(metadata_filepath, 'r') as f:
-                                    metadata = json.load(f)
-                                if metadata["enabled"] != enabled:
-                                    # FIX!
-                                    metadata["enabled"] = enabled
-                                    metadata["updated_at"] = int(datetime.now().timestamp())
-                                    with open(metadata_filepath, 'w') as f:
-                                        json.dump(metadata, f, indent=2)
-                            else:
-                                # New mod! Possibly added manually.
-                                name = mod_dir.name if enabled else mod_dir.name[9:]
-                                images = _find_mode_images(mod_dir)
-                                current_time = int(datetime.now().timestamp())
-                                metadata = {
-                                    "id": uuid.uuid4().hex,
-                                    "name": name,
-                                    "category": category,
-                                    "character": character,
-                                    "images": [img.model_dump() for img in images],
-                                    "created_at": current_time,
-                                    "updated_at": current_time,
-                                    "enabled": enabled,
-                                    "installed_versions": [],
-                                    "gamebanana": None,
-                                }
-                                # Write the metadata to the metadata.json file.
-                                with open(metadata_filepath, 'w') as f:
-                                    json.dump(metadata, f, indent=2)
-                            
-                            all_mods_metadata[category][character].append(metadata)
-                            self.mods_metadata_id[metadata["id"]] = metadata
+        for (category, character, _), results in zip(parent_dirs, scanned):
+            for rel_path, metadata, fingerprint, loaded, mod_stat_time, mod_load_time in results:
+                stat_time += mod_stat_time
+                load_time += mod_load_time
 
+                if not loaded:
+                    report["unchanged"] += 1
                 else:
-                    for mod_dir in dirpath.iterdir():
-                        if not mod_dir.is_dir():
-                            continue
-                        
-                        enabled = not mod_dir.name.startswith("DISABLED_")
-                        metadata_filepath = mod_dir / "metadata.json"
-                        if metadata_filepath.exists():
-                            with open(metadata_filepath, 'r') as f:
-                                metadata = json.load(f)
-                            if metadata["enabled"] != enabled:
-                                # FIX!
-                                metadata["enabled"] = enabled
-                                metadata["updated_at"] = int(datetime.now().timestamp())
-                                with open(metadata_filepath, 'w') as f:
-                                    json.dump(metadata, f, indent=2)
-                        else:
-                            # New mod! Possibly added manually.
-                            name = mod_dir.name if enabled else mod_dir.name[9:]
-                            images = _find_mode_images(mod_dir)
-                            current_time = int(datetime.now().timestamp())
-                            metadata = {
-                                "id": uuid.uuid4().hex,
-                                "name": name,
-                                "category": category,
-                                "character": None,
-                                "images": [img.model_dump() for img in images],
-                                "created_at": current_time,
-                                "updated_at": current_time,
-                                "enabled": enabled,
-                                "installed_versions": [],
-                                "gamebanana": None,
-                            }
-                            # Write the metadata to the metadata.json file.
-                            with open(metadata_filepath, 'w') as f:
-                                json.dump(metadata, f, indent=2)
-                        
-                        all_mods_metadata[category].append(metadata)
-                        self.mods_metadata_id[metadata["id"]] = metadata
-
-            # Write all mods to mods.json
-            FileUtils.write_json(self.mods_file, all_mods_metadata)
-
-            self.mods_metadata = all_mods_metadata
-
-    def add_mod_metadata(self, metadata: dict):
-        """Add a new mod metadata to the mods.json file"""
+                    old_rel_path = previous_by_inode.get(fingerprint[0][1], None) if fingerprint[0] else None
+                    if rel_path in previous_entries:
+                        report["changed"] += 1
+                    elif old_rel_path is not None and not (all_mods_dir / old_rel_path).exists():
+                        renamed_from.add(old_rel_path)
+                        report["changed"] += 1
+                    else:
+                        report["added"] += 1
+
+                if character is not None:
+                    all_mods_metadata[category][character].append(metadata)
+                else:
+                    all_mods_metadata[category].append(metadata)
+                all_mods_metadata_id[metadata["id"]] = metadata
+                new_entries[rel_path] = {"fingerprint": fingerprint, "id": metadata["id"]}
+
+        report["removed"] = len(previous_entries.keys() - new_entries.keys() - renamed_from)
+
+        self.mods_metadata = all_mods_metadata
+        # Write all mods to mods.json
+        self.journal.write_snapshot()
+        self.mods_metadata_id = all_mods_metadata_id
+        self.fingerprints.entries = new_entries
+        self.fingerprints.save()
+        self._listing_generation = uuid.uuid4().hex
+        self._listing_versions.clear()
+        self.listing_cache.invalidate()
+        self.image_stats.invalidate()
+        if self.store is not None:
+            self.store.replace_all(all_mods_metadata_id.values())
+
+        report["total"] = len(new_entries)
+        report["workers"] = workers
+        report["timings"] = {
+            "stat_ms": round(stat_time * 1000, 2),
+            "load_ms": round(load_time * 1000, 2),
+            "total_ms": round((time.perf_counter() - start_time) * 1000, 2),
+        }
+        self.last_rescan_report = report
+        print(f"Rescanned mods: {report}")
+        return report
+
+    def _insert_mod_metadata(self, metadata: dict):
+        """Insert a mod metadata in the in-memory indexes"""
         self.mods_metadata_id[metadata["id"]] = metadata
         if metadata["category"] == "Characters":
-            self.mods_metadata[metadata["category"]][metadata["character"]].append(metadata)
+            self.mods_metadata.setdefault(metadata["category"], {}).setdefault(metadata["character"], []).append(metadata)
         else:
-            self.mods_metadata[metadata["category"]].append(metadata)
+            self.mods_metadata.setdefault(metadata["category"], []).append(metadata)
+        # Not counted as added by the next rescan.
+        mod_dirpath = self.get_mod_dirpath(metadata)
+        self.fingerprints.entries[self._mod_rel_path(metadata)] = {
+            "fingerprint": FingerprintCache.fingerprint(mod_dirpath),
+            "id": metadata["id"],
+        }
+
+    def _remove_mod_metadata(self, mod_id: str) -> Optional[dict]:
+        """Remove a mod metadata from the in-memory indexes and the store"""
+        mod = self.mods_metadata_id.pop(mod_id, None)
+        if mod is None:
+            return None
+        listing = self.get_mods_metadata(mod['category'], mod['character'])
+        listing[:] = [m for m in listing if m['id'] != mod_id]
+        self.fingerprints.entries.pop(self._mod_rel_path(mod), None)
+        if self.store is not None:
+            self.store.delete(mod_id)
+        return mod
+
+    def _mod_rel_path(self, mod: dict) -> str:
+        """Get the directory of a mod relative to the mods dir, as the fingerprint cache keys"""
+        return self.get_mod_dirpath(mod).relative_to(AppService.get().mods_dir).as_posix()
+
+    def _sync_mod_dir(self, category: str, character: Optional[str], name: str) -> Optional[str]:
+        """Apply the on-disk changes of a single mod directory (enabled or 'DISABLED_') to the index.
+        Returns "added", "removed" or "changed", or None when the index was already up to date."""
+        # metadata.json files must be up to date before comparing them.
+        self.journal.flush(snapshot=False)
+        parent_dirpath = AppService.get().mods_dir / category
+        if category == "Characters":
+            parent_dirpath = parent_dirpath / character
+        existing = next((m for m in self.get_mods_metadata(category, character) if m['name'] == name), None)
+        mod_dir = next((d for d in (parent_dirpath / name, parent_dirpath / ('DISABLED_' + name)) if d.is_dir()), None)
+
+        if mod_dir is None:
+            if existing is None:
+                return None
+            self._remove_mod_metadata(existing['id'])
+            self.journal.delete(existing['id'])
+            self._touch_listing(category, character)
+            print(f"Mod removed from disk: {name}")
+            return "removed"
 
-    async def get_mods(self, category: Optional[ModCategory] = None, character: Optional[str] = None) -> List[Mod]:
-        """Get all mods, optionally filtered by category and/or character"""
-        print(f"Getting mods for category: {category}, character: {character}")
         try:
-            if category is None:
+            metadata = self._load_mod_dir(mod_dir, category, character)
+        except (OSError, ValueError, KeyError) as e:
+            # Probably still being copied, a later event will retry.
+            print(f"Failed to read mod directory {mod_dir}: {str(e)}")
+            return None
+
+        if existing is not None and existing['id'] == metadata['id']:
+            if existing == metadata:
+                return None
+            # Keep the same dict, it is referenced by the listings.
+            existing.clear()
+            existing.update(metadata)
+            self._persist_mods(existing)
+            self.journal.put(existing)
+            self._touch_listing(category, character)
+            print(f"Mod changed on disk: {name}")
+            return "changed"
+
+        if existing is not None:
+            # metadata.json was replaced by the one of another mod.
+            self._remove_mod_metadata(existing['id'])
+            self.journal.delete(existing['id'])
+        moved = self._remove_mod_metadata(metadata['id'])
+        if moved is not None:
+            self._touch_listing(moved['category'], moved['character'])
+        self._insert_mod_metadata(metadata)
+        self._persist_mods(metadata)
+        self.journal.put(metadata)
+        self._touch_listing(category, character)
+        print(f"Mod added on disk: {name}")
+        return "changed" if existing is not None else "added"
+
+    async def sync_mod_dir(self, category: str, character: Optional[str], name: str) -> Optional[str]:
+        """Apply the on-disk changes of a single mod directory to the index (see _sync_mod_dir)"""
+        async with self._mutations_lock:
+            result = await run_blocking(self._sync_mod_dir, category, character, name)
+        if result in ("added", "changed"):
+            ImageInfoService.get().schedule()
+        return result
+
+    async def rescan(self) -> dict:
+        """Rescan the mods directory (see rescan_mods), serialized with the other mutations"""
+        async with self._mutations_lock:
+            report = await run_blocking(self.rescan_mods)
+        ImageInfoService.get().schedule()
+        return report
+
+    async def apply_settings(self, settings: dict) -> bool:
+        """Update the app settings and reload the mods metadata if the mods dir or store changed,
+        serialized with the other mutations. Returns True if the mods metadata was reloaded."""
+        async with self._mutations_lock:
+            reload_mods = await run_blocking(AppService.get().update_settings, settings)
+            if reload_mods:
+                await run_blocking(self.init)
+        if reload_mods:
+            ImageInfoService.get().schedule()
+        return reload_mods
+
+    def add_mod_metadata(self, metadata: dict):
+        """Add a new mod metadata to the mods.json file"""
+        self._insert_mod_metadata(metadata)
+        self._persist_mods(metadata)
+        self.journal.put(metadata)
+        self._touch_listing(metadata["category"], metadata["character"])
+        ImageInfoService.get().schedule()
+
+    def update_mod_metadata(self, metadata: dict):
+        """Save the changes made to the metadata of an indexed mod"""
+        self._persist_mods(metadata)
+        self.journal.put(metadata)
+        self._touch_listing(metadata["category"], metadata["character"])
+
+    async def set_images_info(self, mod_id: str, images_info: dict) -> bool:
+        """Add the computed info (size, colour, placeholder) of some images of a mod, by image filename.
+        Returns False if the mod no longer exists."""
+        async with self._mutations_lock:
+            mod = self.mods_metadata_id.get(mod_id)
+            if mod is None:
+                return False
+            changed = False
+            for image in mod.get("images") or []:
+                if image["filename"] in images_info:
+                    image.update(images_info[image["filename"]])
+                    changed = True
+            if changed:
+                self.update_mod_metadata(mod)
+            return True
+
+    def _touch_listing(self, category: str, character: Optional[str] = None):
+        """Bump the version of a (category, character) listing, invalidating its ETags and cached responses"""
+        key = (category, character if category == "Characters" else None)
+        self._listing_versions[key] = self._listing_versions.get(key, 0) + 1
+        self.listing_cache.invalidate(key)
+        self.image_stats.invalidate()
+
+    def get_mods_etag(self, category: Optional[str] = None, character: Optional[str] = None, *query) -> str:
+        """Get the ETag of a mods listing. It changes whenever a mod of that listing changes."""
+        key = (category, character if category == "Characters" else None)
+        version = self._listing_versions.get(key, 0)
+        digest = hashlib.sha1(f"{self._listing_generation}:{key}:{version}:{query}".encode()).hexdigest()
+        return f'"{digest}"'
+
+    def _get_listing_metadata(
+        self,
+        category: Optional[ModCategory] = None,
+        character: Optional[str] = None,
+        enabled: Optional[bool] = None,
+        updated_since: Optional[int] = None
+    ) -> List[dict]:
+        """Get the (validated) metadata of the mods of a listing"""
+        if category is None:
+            mods = []
+        elif category not in get_categories():
+            raise HTTPException(status_code=400, detail="Invalid category")
+        elif category == "Characters":
+            if character is None:
                 mods = []
-            elif category not in get_categories():
-                raise HTTPException(status_code=400, detail="Invalid category")
-            elif category == "Characters":
-                if character is None:
-                    mods = []
-                elif character not in get_character_categories():
-                    raise HTTPException(status_code=400, detail="Invalid character")
-                else:
-                    if category not in self.mods_metadata:
-                        raise HTTPException(status_code=400, detail="Category not found")
-                    category_metadata = self.mods_metadata[category]
-                    if character not in category_metadata:
-                        raise HTTPException(status_code=400, detail="Character not found")
-                    mods = category_metadata[character]
+            elif character not in get_character_categories():
+                raise HTTPException(status_code=400, detail="Invalid character")
             else:
                 if category not in self.mods_metadata:
                     raise HTTPException(status_code=400, detail="Category not found")
-                mods = self.mods_metadata[category]
+                category_metadata = self.mods_metadata[category]
+                if character not in category_metadata:
+                    raise HTTPException(status_code=400, detail="Character not found")
+                mods = category_metadata[character]
+        else:
+            if category not in self.mods_metadata:
+                raise HTTPException(status_code=400, detail="Category not found")
+            mods = self.mods_metadata[category]
+
+        if mods and (enabled is not None or updated_since is not None):
+            mods = self.query_mods(category, character, enabled=enabled, updated_since=updated_since)
+        return mods
+
+    async def get_mods(
+        self,
+        category: Optional[ModCategory] = None,
+        character: Optional[str] = None,
+        enabled: Optional[bool] = None,
+        updated_since: Optional[int] = None
+    ) -> List[Mod]:
+        """Get all mods, optionally filtered by category and/or character, enabled state and update time"""
+        print(f"Getting mods for category: {category}, character: {character}")
+        try:
+            mods = self._get_listing_metadata(category, character, enabled, updated_since)
 
             # Convert to Mod objects
             mods = [Mod(**mod) for mod in mods]
@@ -223,171 +679,340 @@ class ModService:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error loading mods: {str(e)}")
 
+    async def get_mods_page(
+        self,
+        category: Optional[ModCategory] = None,
+        character: Optional[str] = None,
+        enabled: Optional[bool] = None,
+        updated_since: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+        sort: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Union[List, dict]:
+        """Get a sorted, projected and (cursor) paginated mods listing.
+        Returns a plain list when neither `cursor` nor `limit` are given,
+        otherwise a {"items": [...], "next_cursor": ...} page."""
+        if fields:
+            invalid_fields = set(fields) - MOD_PROJECTION_FIELDS
+            if invalid_fields:
+                raise HTTPException(status_code=400, detail=f"Invalid fields: {', '.join(sorted(invalid_fields))}")
+        descending = sort is not None and sort.startswith('-')
+        sort_field = sort.lstrip('-') if sort else None
+        if sort_field is not None and sort_field not in MOD_SORT_FIELDS:
+            raise HTTPException(status_code=400, detail=f"Invalid sort field: {sort_field}")
+        if limit is not None and limit <= 0:
+            raise HTTPException(status_code=400, detail="limit must be greater than 0")
+
+        mods = self._get_listing_metadata(category, character, enabled, updated_since)
+
+        # Keyset pagination: the cursor is the sort key of the last item of the previous page.
+        # Without a sort field, pages are ordered by creation time (a plain listing keeps the stored order).
+        paginated = cursor is not None or limit is not None
+        key_field = sort_field or "created_at"
+        keys = [[_sort_value(mod, key_field), mod["id"]] for mod in mods]
+        if sort_field is None and not paginated:
+            order = list(range(len(mods)))
+        else:
+            order = sorted(range(len(mods)), key=lambda i: keys[i], reverse=descending)
+
+        start = 0
+        if cursor:
+            cursor_key = _decode_cursor(cursor, sort_field, descending)
+            start = next(
+                (pos for pos, i in enumerate(order) if (keys[i] < cursor_key if descending else keys[i] > cursor_key)),
+                len(order)
+            )
+        end = len(order) if limit is None else min(start + limit, len(order))
+        page = [mods[i] for i in order[start:end]]
+
+        if fields:
+            items = [_project_mod(mod, fields) for mod in page]
+        else:
+            items = [Mod(**mod) for mod in page]
+
+        if not paginated:
+            return items
+
+        next_cursor = None
+        if end < len(order):
+            next_cursor = _encode_cursor(keys[order[end - 1]], sort_field, descending)
+        return {"items": items, "next_cursor": next_cursor}
+
+    async def get_mods_json(
+        self,
+        category: Optional[ModCategory] = None,
+        character: Optional[str] = None,
+        enabled: Optional[bool] = None,
+        updated_since: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+        sort: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> bytes:
+        """Get a mods listing as ready-to-send JSON bytes, served from the listing cache when possible"""
+        key = (category, character if category == "Characters" else None)
+        query = (enabled, updated_since, tuple(fields) if fields else None, sort, cursor, limit)
+        data = self.listing_cache.get(key, query)
+        if data is not None:
+            return data
+
+        version = (self._listing_generation, self._listing_versions.get(key, 0))
+        if fields is None and sort is None and cursor is None and limit is None:
+            result = await self.get_mods(category, character, enabled, updated_since)
+        else:
+            result = await self.get_mods_page(category, character, enabled, updated_since, fields, sort, cursor, limit)
+        data = json.dumps(jsonable_encoder(result), separators=(',', ':')).encode()
+
+        # Don't cache a listing that changed while it was being built.
+        if version == (self._listing_generation, self._listing_versions.get(key, 0)):
+            self.listing_cache.put(key, query, data)
+        return data
+
     async def add_mod(
         self,
-        file: UploadFile,
+        file: UploadedFile,
         name: str,
         category: ModCategory,
         character: Optional[str] = None,
-        preview_image: Optional[UploadFile] = None
+        preview_image: Optional[UploadedFile] = None
     ) -> Mod:
-        """Add a new mod"""
+        """Add a new (disabled) mod from an uploaded file.
+        Archives are extracted into the mod directory, other files are moved into it."""
         app_service = AppService.get()
+        category = ModCategory(category).value
+        name = _validate_mod_name(name)
+        if category != "Characters":
+            character = None
+        elif not character:
+            raise HTTPException(status_code=400, detail="Missing character for a Characters mod")
+        elif character not in get_character_categories():
+            raise HTTPException(status_code=400, detail=f"Invalid character: {character}")
+        current_time = int(datetime.now().timestamp())
+        mod_metadata = {
+            "id": str(uuid.uuid4()),
+            "name": name,
+            "category": category,
+            "character": character,
+            "images": [],
+            "created_at": current_time,
+            "updated_at": current_time,
+            "enabled": False,
+            "installed_versions": [],
+            "gamebanana": None,
+        }
+        mod_dirpath = self.get_mod_dirpath(mod_metadata)
+        # Only the directories created here are removed on failure.
+        added_dirpath = await self._reserve_mod_dir(mod_metadata)
         try:
-            # Get mod directory path and create it if it doesn't exist.
-            mod_dirpath = app_service.mods_dir / category
-            if character:
-                mod_dirpath = mod_dirpath / character
-            mod_dirpath = mod_dirpath / name
-            FileUtils.ensure_directory(mod_dirpath, parents=False)
-
-            # Save mod file
-            await app_service.save_upload_file(file, mod_dirpath)
-
-            # Save preview image if provided
-            images = []
-            if preview_image:
-                preview_filename = f"preview{Path(preview_image.filename).suffix}"
-                preview_path = mod_dirpath / preview_filename
-                await app_service.save_upload_file(preview_image, preview_path)
-                images.append(Image(
-                    local=True,
-                    filename=str(preview_path.relative_to(app_service.mods_dir)),
-                    caption=None
-                ))
-
-            # Fill metadata and create Mod object
-            current_time = int(datetime.now().timestamp())
-            mod_metadata = {
-                "id": str(uuid.uuid4()),
-                "name": name,
-                "category": category,
-                "character": character,
-                "images": [img.model_dump() for img in images],
-                "created_at": current_time,
-                "updated_at": current_time,
-                "enabled": False,
-                "installed_versions": [],
-                "gamebanana": None,
-            }
-            mod = Mod(**mod_metadata)
-
-            # Write metadata.json
-            FileUtils.write_json(mod_dirpath / "metadata.json", mod_metadata)
-
-            # Update mods metadata.
-            if character:
-                self.mods_metadata[category][character].append(mod_metadata)
+            # Extract (or move) the uploaded file into the staging directory.
+            if file.path.suffix in ('.zip', '.7z', '.rar'):
+                workers = app_service.settings.get("extract_workers", 1)
+                await run_blocking(FileUtils.extract_archive_staged, file.path, added_dirpath, workers=workers, pool="archive")
             else:
-                self.mods_metadata[category].append(mod_metadata)
-            self.mods_metadata_id[mod_metadata["id"]] = mod_metadata
+                await run_blocking(shutil.move, file.path, added_dirpath / file.filename)
 
-            return mod
-        except Exception as e:
+            # Save preview image if provided, otherwise use the images of the mod.
+            if preview_image:
+                preview_filename = f"preview{Path(preview_image.filename).suffix.lower()}"
+                await run_blocking(shutil.move, preview_image.path, added_dirpath / preview_filename)
+
+            # Hardlink the files already installed by other mods.
+            if ContentStore.get().enabled:
+                try:
+                    await run_blocking(ContentStore.get().dedupe_dir, added_dirpath, pool="archive")
+                except Exception as e:
+                    print(f"Failed to deduplicate mod files: {str(e)}")
+
+            # Move the mod into place, write its metadata.json and index it.
+            async with self._mutations_lock:
+                if mod_dirpath.exists():
+                    raise HTTPException(status_code=409, detail=f"Mod already exists: {name}")
+                await run_blocking(os.replace, added_dirpath, mod_dirpath)
+                added_dirpath = mod_dirpath
+
+                if preview_image:
+                    preview_path = mod_dirpath / preview_filename
+                    images = [Image(local=True, filename=str(preview_path.relative_to(app_service.mods_dir)), caption=None)]
+                else:
+                    images = await run_blocking(_find_mode_images, mod_dirpath)
+                mod_metadata["images"] = [img.model_dump() for img in images]
+                mod = Mod(**mod_metadata)
+
+                await run_blocking(FileUtils.write_json, mod_dirpath / "metadata.json", mod_metadata)
+                self.add_mod_metadata(mod_metadata)
+        except (Exception, asyncio.CancelledError) as e:
+            # Don't leave a partially added mod behind (failed or cancelled).
+            await asyncio.shield(run_blocking(FileUtils.remove_tree, added_dirpath, ignore_errors=True))
+            if isinstance(e, (HTTPException, asyncio.CancelledError)):
+                raise
             raise HTTPException(status_code=500, detail=f"Error adding mod: {str(e)}")
+        finally:
+            self._release_mod_dir(mod_metadata)
+        return mod
+
+    async def _reserve_mod_dir(self, mod: dict) -> Path:
+        """Reserve the directory of a new mod until it is indexed (see _release_mod_dir).
+        Raises 409 if a mod (enabled or disabled) has the same name. Returns an empty staging directory to fill."""
+        mod_dirpath = self.get_mod_dirpath(mod)
+        dirpaths = {mod_dirpath, mod_dirpath.with_name(mod["name"])}
+        async with self._mutations_lock:
+            if dirpaths & self.installing_dirs or any(dirpath.exists() for dirpath in dirpaths):
+                raise HTTPException(status_code=409, detail=f"Mod already exists: {mod['name']}")
+            staging_dirpath = mod_dirpath.with_name(f".{mod_dirpath.name}.adding")
+            try:
+                # Fails if another process is adding the same mod.
+                staging_dirpath.mkdir(parents=True, exist_ok=False)
+            except FileExistsError:
+                raise HTTPException(status_code=409, detail=f"Mod already being added: {mod['name']}")
+            self.installing_dirs.update(dirpaths)
+        return staging_dirpath
+
+    def _release_mod_dir(self, mod: dict):
+        mod_dirpath = self.get_mod_dirpath(mod)
+        self.installing_dirs.difference_update({mod_dirpath, mod_dirpath.with_name(mod["name"])})
 
     async def delete_mod(self, mod_id: str) -> bool:
         """Delete a mod"""
-        try:
-            with open(self.mods_file, 'r') as f:
-                mods = json.load(f)
-            
-            # Find mod
-            mod = next((m for m in mods if m['id'] == mod_id), None)
-            if not mod:
-                raise HTTPException(status_code=404, detail="Mod not found")
-            
-            # Delete files
-            mod_path = AppService.get().mods_dir / mod['category']
-            if mod['character']:
-                mod_path = mod_path / mod['character']
-            mod_path = mod_path / mod['name']
-            if mod_path.exists():
-                mod_path.unlink()
-
-            if mod['preview_image']:
-                preview_path = Path(mod['preview_image'])
-                if preview_path.exists():
-                    preview_path.unlink()
-            
-            # Remove from mods.json
-            mods = [m for m in mods if m['id'] != mod_id]
-            
-            with open(self.mods_file, 'w') as f:
-                json.dump(mods, f, indent=2, default=str)
-            
-            return True
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error deleting mod: {str(e)}")
+        async with self._mutations_lock:
+            try:
+                # Find mod
+                mod = self.mods_metadata_id.get(mod_id, None)
+                if not mod:
+                    raise HTTPException(status_code=404, detail="Mod not found")
+
+                # Delete files
+                mod_dirpath = AppService.get().mods_dir / mod['category']
+                if mod['character']:
+                    mod_dirpath = mod_dirpath / mod['character']
+                for dirname in (mod['name'], 'DISABLED_' + mod['name']):
+                    if (mod_dirpath / dirname).is_dir():
+                        await run_blocking(FileUtils.remove_tree, mod_dirpath / dirname)
+                if ContentStore.get().enabled:
+                    ContentStore.get().forget_mod(mod_dirpath / mod['name'])
+                    await run_blocking(ContentStore.get().collect_garbage)
+
+                # Remove from mods metadata.
+                self._remove_mod_metadata(mod_id)
+                self.journal.delete(mod_id)
+                self._touch_listing(mod['category'], mod['character'])
+
+                return True
+            except HTTPException:
+                raise
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Error deleting mod: {str(e)}")
+
+    def get_mod_dirpath(self, mod: dict) -> Path:
+        """Get the directory of a mod, with the 'DISABLED_' prefix when the mod is disabled"""
+        dirpath = AppService.get().mods_dir / mod['category']
+        if mod['character']:
+            dirpath = dirpath / mod['character']
+        return dirpath / (mod['name'] if mod['enabled'] else 'DISABLED_' + mod['name'])
+
+    def _rename_mod_dir(self, mod: dict, enabled: bool):
+        """Add/Remove the 'DISABLED_' prefix of a mod directory"""
+        src_dirpath = self.get_mod_dirpath(mod)
+        if not src_dirpath.exists():
+            print(f"Mod directory not found: {src_dirpath}")
+            raise HTTPException(status_code=404, detail=f"Mod directory not found: {src_dirpath.name}")
+        dst_dirpath = src_dirpath.with_name(mod['name'] if enabled else 'DISABLED_' + mod['name'])
+        if dst_dirpath.exists():
+            raise HTTPException(status_code=409, detail=f"Mod directory already exists: {dst_dirpath.name}")
+        os.rename(src_dirpath, dst_dirpath)
+
+    def _rename_mod_dirs(self, affected_mods: List[dict], desired: dict[str, bool]) -> tuple:
+        """Rename the directories of the given mods to their desired enabled state (blocking).
+        Returns the renamed mods and the error that stopped the renames, if any."""
+        renamed_mods = []
+        for mod in affected_mods:
+            try:
+                self._rename_mod_dir(mod, desired[mod['id']])
+            except Exception as e:
+                return renamed_mods, e
+            renamed_mods.append(mod)
+        return renamed_mods, None
+
+    def _apply_toggles(self, renamed_mods: List[dict], desired: dict[str, bool]):
+        """Update the enabled state of renamed mods in the index, store and journal"""
+        current_time = int(datetime.now().timestamp())
+        for mod in renamed_mods:
+            mod['enabled'] = desired[mod['id']]
+            mod['updated_at'] = current_time
+        if renamed_mods:
+            self.journal.put(*renamed_mods)
+            self._persist_mods(*renamed_mods)
+            for listing_key in {(mod['category'], mod['character']) for mod in renamed_mods}:
+                self._touch_listing(*listing_key)
+
+    async def toggle_mods(self, states: List[ModToggleState], exclusive: bool = False) -> List[Mod]:
+        """Set the enabled state of several mods in one pass.
+        Only the mods whose state actually changes are renamed and get their metadata.json written (once, by the journal),
+        and a single game mod refresh is requested. If exclusive is True, enabling a character mod
+        disables every other mod of that character that isn't explicitly listed.
+        Returns the list of affected mods."""
+        async with self._mutations_lock:
+            try:
+                # Desired state by mod id (last state wins).
+                desired: dict[str, bool] = {}
+                for state in states:
+                    if state.mod_id not in self.mods_metadata_id:
+                        print(f"Mod not found: {state.mod_id}")
+                        raise HTTPException(status_code=404, detail=f"Mod not found: {state.mod_id}")
+                    desired[state.mod_id] = state.enabled
+
+                if exclusive:
+                    for mod_id, enabled in list(desired.items()):
+                        mod = self.mods_metadata_id[mod_id]
+                        if not enabled or not mod['character']:
+                            continue
+                        for other_mod in self.get_mods_metadata("Characters", mod['character']):
+                            if other_mod['id'] not in desired and other_mod['enabled']:
+                                desired[other_mod['id']] = False
+
+                # Minimal set of renames: skip the mods already in the desired state.
+                affected_mods = [
+                    self.mods_metadata_id[mod_id]
+                    for mod_id, enabled in desired.items()
+                    if self.mods_metadata_id[mod_id]['enabled'] != enabled
+                ]
+                if not affected_mods:
+                    return []
+
+                # Only the renames run in a worker thread, the index is updated here, on the event loop.
+                renamed_mods, error = await run_blocking(self._rename_mod_dirs, affected_mods, desired)
+                # Update every mod that was renamed, even if a later rename failed.
+                self._apply_toggles(renamed_mods, desired)
+                if error is not None:
+                    raise error
+
+                print(f"Toggled {len(affected_mods)} mods")
+
+                # If we're in game mode (exclusive toggle), request a mod refresh
+                if exclusive:
+                    from services.game_state_monitor import GameStateMonitor
+                    GameStateMonitor.get().request_mod_refresh()
+
+                return [Mod(**mod) for mod in affected_mods]
+            except HTTPException:
+                raise
+            except Exception as e:
+                print(f"Error toggling mods: {str(e)}")
+                raise HTTPException(status_code=500, detail=f"Error toggling mods: {str(e)}")
 
     async def toggle_mod(self, mod_id: str, exclusive: bool = False) -> list[Mod]:
         """Toggle mod enabled/disabled state. If exclusive is True, disable all other mods for the same character.
         Returns a list of all affected mods when exclusive is True, or just the toggled mod when exclusive is False."""
-        try:
-            # Find mod
-            mod = self.mods_metadata_id.get(mod_id, None)
-            if not mod:
-                print(f"Mod not found: {mod_id}")
-                raise HTTPException(status_code=404, detail="Mod not found")
-
-            affected_mods = [mod]  # List to track all mods that were affected
-
-            # If we're enabling the mod and exclusive is True, disable all other mods for the same character
-            if exclusive and not mod['enabled'] and mod['character']:
-                # Get all mods for the same character
-                character_mods = self.mods_metadata.get("Characters", {}).get(mod['character'], [])
-                for other_mod in character_mods:
-                    if other_mod['id'] != mod_id and other_mod['enabled']:
-                        # Disable the other mod
-                        other_mod['enabled'] = False
-                        other_mod['updated_at'] = int(datetime.now().timestamp())
-                        affected_mods.append(other_mod)
-                        
-                        # Rename the directory
-                        other_mod_dirpath = AppService.get().mods_dir / other_mod['category'] / other_mod['character']
-                        if other_mod_dirpath.exists():
-                            os.rename(
-                                other_mod_dirpath / other_mod['name'],
-                                other_mod_dirpath / ('DISABLED_' + other_mod['name'])
-                            )
-                            
-                            # Update metadata file
-                            with open(other_mod_dirpath / "metadata.json", 'w') as f:
-                                json.dump(other_mod, f, indent=2)
-
-            # Toggle enabled state
-            mod['enabled'] = not mod['enabled']
-            mod['updated_at'] = int(datetime.now().timestamp())
-            
-            if mod['character']:
-                mod_dirpath = AppService.get().mods_dir / mod['category'] / mod['character']
-            else:
-                mod_dirpath = AppService.get().mods_dir / mod['category']
-
-            if not mod_dirpath.exists():
-                print(f"Mod directory not found: {mod_dirpath}")
-                raise HTTPException(status_code=404, detail="Mod directory not found")
-
-            # Add/Remove 'DISABLED_' prefix if enabled state changed.
-            if mod['enabled']:
-                os.rename(mod_dirpath / ('DISABLED_' + mod['name']), mod_dirpath / mod['name'])
-            else:
-                os.rename(mod_dirpath / mod['name'], mod_dirpath / ('DISABLED_' + mod['name']))
-
-            with open(mod_dirpath / "metadata.json", 'w') as f:
-                json.dump(mod, f, indent=2)
-
-            print(f"Toggled mod: {mod_id}")
-
-            # If we're in game mode (exclusive toggle), request a mod refresh
-            if exclusive:
-                from services.game_state_monitor import GameStateMonitor
-                GameStateMonitor.get().request_mod_refresh()
-
-            # Return all affected mods if exclusive, otherwise just the toggled mod
-            if exclusive:
-                return [Mod(**mod) for mod in affected_mods]
-            return Mod(**mod)
-        except Exception as e:
-            print(f"Error toggling mod: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error toggling mod: {str(e)}")
+        # Find mod
+        mod = self.mods_metadata_id.get(mod_id, None)
+        if not mod:
+            print(f"Mod not found: {mod_id}")
+            raise HTTPException(status_code=404, detail="Mod not found")
+
+        affected_mods = await self.toggle_mods([ModToggleState(mod_id=mod_id, enabled=not mod['enabled'])], exclusive)
+        print(f"Toggled mod: {mod_id}")
+
+        # Return all affected mods if exclusive, otherwise just the toggled mod
+        if exclusive:
+            return affected_mods
+        return affected_mods[0]
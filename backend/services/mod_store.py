@@ -0,0 +1,135 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mods (
+    id TEXT PRIMARY KEY,
+    category TEXT NOT NULL,
+    character TEXT,
+    enabled INTEGER NOT NULL,
+    gamebanana_id INTEGER,
+    updated_at INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_mods_category_character_enabled ON mods (category, character, enabled);
+CREATE INDEX IF NOT EXISTS idx_mods_enabled ON mods (enabled);
+CREATE INDEX IF NOT EXISTS idx_mods_gamebanana_id ON mods (gamebanana_id);
+CREATE INDEX IF NOT EXISTS idx_mods_updated_at ON mods (updated_at);
+"""
+
+
+# Updates the row in place: INSERT OR REPLACE would delete it and insert a new rowid, reordering the listings.
+UPSERT = """
+INSERT INTO mods VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    category = excluded.category,
+    character = excluded.character,
+    enabled = excluded.enabled,
+    gamebanana_id = excluded.gamebanana_id,
+    updated_at = excluded.updated_at,
+    data = excluded.data
+"""
+
+
+def _to_row(metadata: dict) -> tuple:
+    gamebanana = metadata.get("gamebanana") or {}
+    return (
+        metadata["id"],
+        metadata["category"],
+        metadata.get("character"),
+        1 if metadata.get("enabled") else 0,
+        gamebanana.get("id"),
+        int(metadata.get("updated_at") or 0),
+        json.dumps(metadata, separators=(',', ':')),
+    )
+
+
+class SQLiteModStore:
+    """
+    This class is used to store the mods metadata in a SQLite database (WAL mode),
+    indexed by category, character, enabled state, gamebanana id and updated_at.
+    """
+
+    def __init__(self, db_file: Path) -> None:
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_file), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM mods").fetchone()[0]
+
+    def replace_all(self, mods: Iterable[dict]):
+        """Replace the whole table with the given mods in a single transaction"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM mods")
+            self._conn.executemany("INSERT INTO mods VALUES (?, ?, ?, ?, ?, ?, ?)", (_to_row(m) for m in mods))
+
+    def upsert(self, metadata: dict):
+        """Insert or update a single mod row"""
+        with self._lock, self._conn:
+            self._conn.execute(UPSERT, _to_row(metadata))
+
+    def upsert_many(self, mods: Iterable[dict]):
+        """Insert or update several mod rows in a single transaction"""
+        with self._lock, self._conn:
+            self._conn.executemany(UPSERT, (_to_row(m) for m in mods))
+
+    def delete(self, mod_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM mods WHERE id = ?", (mod_id,))
+
+    def get(self, mod_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM mods WHERE id = ?", (mod_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def all(self) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM mods ORDER BY rowid").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def query_ids(
+        self,
+        category: Optional[str] = None,
+        character: Optional[str] = None,
+        enabled: Optional[bool] = None,
+        gamebanana_id: Optional[int] = None,
+        updated_since: Optional[int] = None,
+    ) -> List[str]:
+        """Get the ids of the mods matching all the given filters, using the secondary indexes"""
+        clauses = []
+        params = []
+        if category is not None:
+            clauses.append("category = ?")
+            params.append(category)
+        if character is not None:
+            clauses.append("character = ?")
+            params.append(character)
+        if enabled is not None:
+            clauses.append("enabled = ?")
+            params.append(1 if enabled else 0)
+        if gamebanana_id is not None:
+            clauses.append("gamebanana_id = ?")
+            params.append(gamebanana_id)
+        if updated_since is not None:
+            clauses.append("updated_at >= ?")
+            params.append(updated_since)
+        sql = "SELECT id FROM mods"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY rowid"
+        with self._lock:
+            return [row[0] for row in self._conn.execute(sql, params).fetchall()]
@@ -0,0 +1,192 @@
+import asyncio
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from .app_service import AppService
+from .categories import get_categories, get_character_categories
+from .worker_pool import run_blocking
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+
+class _ModsEventHandler(FileSystemEventHandler):
+    def __init__(self, watcher: 'ModsWatcher') -> None:
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        self.watcher.notify_path(event.src_path)
+        dest_path = getattr(event, 'dest_path', None)
+        if dest_path:
+            self.watcher.notify_path(dest_path)
+
+
+class ModsWatcher:
+    """
+    This class is used to keep the mods index in sync with changes made to the mods directory
+    behind the app's back (XXMI launcher, manual copy-paste...).
+
+    Uses watchdog (inotify/ReadDirectoryChangesW...) when available, otherwise polls the mods
+    directory every settings["watch_poll_interval"] seconds. Events are debounced per mod
+    directory, so a copy of a large mod or a 'DISABLED_' rename only triggers one update.
+    """
+
+    _instance = None
+
+    @staticmethod
+    def get():
+        if ModsWatcher._instance is None:
+            ModsWatcher._instance = ModsWatcher()
+        return ModsWatcher._instance
+
+    def __init__(self) -> None:
+        settings = AppService.get().settings
+        self.debounce = settings.get("watch_debounce_ms", 750) / 1000
+        self.poll_interval = settings.get("watch_poll_interval", 5.0)
+        self.mods_dir: Optional[Path] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._observer = None
+        self._threads: list[threading.Thread] = []
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        # (category, character, mod name) -> time of the last event.
+        self._pending: dict[tuple, float] = {}
+
+    @property
+    def is_running(self) -> bool:
+        return self.loop is not None
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        """Start watching the mods directory, updates are applied on the given event loop"""
+        if self.is_running:
+            return
+        self.loop = loop
+        self.mods_dir = AppService.get().mods_dir
+        self._stop_event.clear()
+
+        if Observer is not None:
+            self._observer = Observer()
+            self._observer.schedule(_ModsEventHandler(self), str(self.mods_dir), recursive=True)
+            self._observer.start()
+            print(f"Watching mods directory: {self.mods_dir}")
+        else:
+            self._threads.append(threading.Thread(target=self._poll_loop, name="mods-watcher-poll", daemon=True))
+            print(f"Polling mods directory every {self.poll_interval}s: {self.mods_dir}")
+        self._threads.append(threading.Thread(target=self._debounce_loop, name="mods-watcher", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        if not self.is_running:
+            return
+        self._stop_event.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+        self._pending.clear()
+        self.loop = None
+
+    async def restart(self):
+        """Restart watching (eg. the mods directory changed), no-op if not running.
+        Must be awaited on the watched event loop, without holding the mod mutations lock: the watcher
+        threads being joined may be waiting for a sync on that loop."""
+        if not self.is_running:
+            return
+        loop = self.loop
+        await run_blocking(self.stop)
+        self.start(loop)
+
+    def _mod_key(self, path: str) -> Optional[tuple]:
+        """Get the (category, character, mod name) of the mod directory containing a path.
+        Staging directories (dot-prefixed) and the mods being added or installed are ignored."""
+        from .mod_service import ModService
+        try:
+            parts = Path(path).relative_to(self.mods_dir).parts
+        except ValueError:
+            return None
+        if len(parts) < 2 or parts[0] not in get_categories():
+            return None
+        if parts[0] == "Characters":
+            if len(parts) < 3 or parts[1] not in get_character_categories():
+                return None
+            category, character, dirname = parts[0], parts[1], parts[2]
+        else:
+            category, character, dirname = parts[0], None, parts[1]
+        if dirname.startswith("."):
+            return None
+        mod_dirpath = self.mods_dir.joinpath(*parts[:3 if character else 2])
+        if mod_dirpath in ModService.get().installing_dirs:
+            return None
+        name = dirname[9:] if dirname.startswith("DISABLED_") else dirname
+        return category, character, name
+
+    def notify_path(self, path: str):
+        """Schedule an update of the mod directory containing the given path"""
+        key = self._mod_key(path)
+        if key is None:
+            return
+        with self._lock:
+            self._pending[key] = time.monotonic()
+
+    def _debounce_loop(self):
+        while not self._stop_event.wait(min(0.1, self.debounce)):
+            now = time.monotonic()
+            with self._lock:
+                ready = [key for key, last_event in self._pending.items() if now - last_event >= self.debounce]
+                for key in ready:
+                    del self._pending[key]
+            for key in ready:
+                self._apply(key)
+
+    def _apply(self, key: tuple):
+        from .mod_service import ModService
+        future = asyncio.run_coroutine_threadsafe(ModService.get().sync_mod_dir(*key), self.loop)
+        try:
+            future.result()
+        except Exception as e:
+            print(f"Failed to sync mod directory {key}: {str(e)}")
+
+    def _snapshot(self) -> dict:
+        """Get the (mtime, size) of every mod directory and its metadata.json"""
+        snapshot = {}
+        for category in get_categories():
+            parent_dirs = [self.mods_dir / category]
+            if category == "Characters":
+                parent_dirs = [self.mods_dir / category / character for character in get_character_categories()]
+            for parent_dir in parent_dirs:
+                try:
+                    entries = list(os.scandir(parent_dir))
+                except OSError:
+                    continue
+                for entry in entries:
+                    if not entry.is_dir():
+                        continue
+                    try:
+                        st = entry.stat()
+                        meta_st = os.stat(os.path.join(entry.path, "metadata.json"))
+                        meta = (meta_st.st_mtime_ns, meta_st.st_size)
+                    except OSError:
+                        meta = None
+                    snapshot[entry.path] = (st.st_mtime_ns, meta)
+        return snapshot
+
+    def _poll_loop(self):
+        previous = self._snapshot()
+        while not self._stop_event.wait(self.poll_interval):
+            current = self._snapshot()
+            for path in previous.keys() | current.keys():
+                if previous.get(path) != current.get(path):
+                    self.notify_path(path)
+            previous = current
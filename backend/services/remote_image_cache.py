@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import mimetypes
+from pathlib import PurePosixPath
+from typing import Dict, Iterable, Set, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from fastapi import HTTPException
+
+from .app_service import AppService
+from .http_client import get_http_client
+from .utils import DiskCache
+from .worker_pool import run_blocking
+
+GAMEBANANA_IMAGE_BASE = "https://images.gamebanana.com/img/ss/mods/"
+
+
+def gamebanana_image_url(filename: str) -> str:
+    """Get the URL of a GameBanana mod image (stored as a filename in the mods metadata)"""
+    return f"{GAMEBANANA_IMAGE_BASE}{filename}"
+
+
+class RemoteImageCache:
+    """
+    This class is used to proxy the remote images shown in the UI (GameBanana mod previews and
+    prydwen.gg character icons), so they are fetched once and still shown when offline.
+
+    Images are cached in the 'remote_images' dir of the app data dir, bounded by
+    settings["remote_image_cache_max_size"] bytes (least recently used first). Concurrent requests
+    for the same URL trigger a single fetch. Only images from ALLOWED_HOSTS are proxied.
+    """
+
+    _instance = None
+
+    ALLOWED_HOSTS = {"images.gamebanana.com", "www.prydwen.gg", "prydwen.gg"}
+    MAX_IMAGE_SIZE = 20 * 1024 * 1024
+    PREFETCH_CONCURRENCY = 4
+
+    @staticmethod
+    def get():
+        if RemoteImageCache._instance is None:
+            RemoteImageCache._instance = RemoteImageCache()
+        return RemoteImageCache._instance
+
+    def __init__(self) -> None:
+        self.cache = DiskCache(
+            AppService.get().appdata_dir / 'remote_images',
+            lambda: AppService.get().settings.get("remote_image_cache_max_size", 512 * 1024 ** 2)
+        )
+        self.headers = {
+            "User-Agent": "NiceWuWaModsSelector/1.0"
+        }
+        # Images being fetched: cache key -> task
+        self._pending: Dict[str, asyncio.Task] = {}
+        # Background prefetches (kept referenced until done).
+        self._prefetch_tasks: Set[asyncio.Task] = set()
+        self.fetched = 0
+        self.coalesced = 0
+
+    def key(self, url: str) -> str:
+        """Get the cache key of an image URL. Raises if the URL can't be proxied."""
+        parts = urlsplit(url)
+        if parts.scheme != "https" or parts.hostname not in self.ALLOWED_HOSTS:
+            raise HTTPException(status_code=400, detail=f"Image URL not allowed: {url}")
+        suffix = PurePosixPath(parts.path).suffix.lower()
+        if suffix not in {'.jpg', '.jpeg', '.png', '.gif', '.webp'}:
+            suffix = ".img"
+        return f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}{suffix}"
+
+    def _store(self, key: str, content: bytes):
+        tmp_path = self.cache.tmp_path(key)
+        tmp_path.write_bytes(content)
+        return self.cache.put(key, tmp_path)
+
+    async def _fetch(self, url: str, key: str):
+        file_path = await run_blocking(self.cache.get, key)
+        if file_path is not None:
+            return file_path
+        try:
+            async with get_http_client().stream("GET", url, headers=self.headers, follow_redirects=True) as response:
+                response.raise_for_status()
+                content_type = response.headers.get("Content-Type", "")
+                if not content_type.startswith("image/"):
+                    raise HTTPException(status_code=502, detail=f"Not an image: {url} ({content_type})")
+                content = bytearray()
+                async for chunk in response.aiter_bytes():
+                    content += chunk
+                    if len(content) > self.MAX_IMAGE_SIZE:
+                        raise HTTPException(status_code=502, detail=f"Image too large: {url}")
+        except httpx.HTTPError as e:
+            raise HTTPException(status_code=502, detail=f"Failed to fetch image {url}: {str(e)}")
+        self.fetched += 1
+        return await run_blocking(self._store, key, bytes(content))
+
+    async def fetch(self, url: str) -> Tuple[str, str]:
+        """Get the cached copy of a remote image, fetched if needed. Returns its (path, media type)."""
+        key = self.key(url)
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(url, key))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shielded: a client going away doesn't cancel a fetch other requests wait for.
+        file_path = await asyncio.shield(task)
+        media_type = mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
+        return str(file_path), media_type
+
+    async def _prefetch(self, urls: Iterable[str]):
+        semaphore = asyncio.Semaphore(self.PREFETCH_CONCURRENCY)
+
+        async def prefetch_url(url: str):
+            async with semaphore:
+                try:
+                    await self.fetch(url)
+                except HTTPException as e:
+                    print(f"Failed to prefetch image: {e.detail}")
+
+        await asyncio.gather(*(prefetch_url(url) for url in dict.fromkeys(urls)))
+
+    def prefetch(self, urls: Iterable[str]):
+        """Fetch remote images into the cache in the background"""
+        task = asyncio.create_task(self._prefetch(list(urls)))
+        self._prefetch_tasks.add(task)
+        task.add_done_callback(self._prefetch_tasks.discard)
+
+    async def stop(self):
+        for task in list(self._prefetch_tasks):
+            task.cancel()
+        await asyncio.gather(*self._prefetch_tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            **self.cache.stats(),
+            "fetched": self.fetched,
+            "coalesced": self.coalesced,
+            "pending": len(self._pending),
+        }
@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from PIL import Image, ImageOps
+
+from .app_service import AppService
+from .utils import DiskCache
+from .worker_pool import run_blocking
+
+
+class ThumbnailService:
+    """
+    This class is used to serve downsized variants of the mods preview images (often 2-8MB PNGs).
+
+    Requested widths are rounded up to a few size buckets, and thumbnails are generated on first
+    request in the "image" worker pool, as WebP or JPEG. They are cached in the 'thumbnails' dir of
+    the app data dir, keyed by the original path, modification time and size (so edited images get
+    new thumbnails), bounded by settings["thumbnail_cache_max_size"] bytes (least recently used first).
+    Concurrent requests for the same thumbnail generate it once.
+    """
+
+    _instance = None
+
+    WIDTHS = (128, 256, 512, 1024)
+    FORMATS = {
+        "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+        "jpeg": ("JPEG", "image/jpeg", {"quality": 85, "optimize": True, "progressive": True}),
+    }
+
+    @staticmethod
+    def get():
+        if ThumbnailService._instance is None:
+            ThumbnailService._instance = ThumbnailService()
+        return ThumbnailService._instance
+
+    def __init__(self) -> None:
+        self.cache = DiskCache(
+            AppService.get().appdata_dir / 'thumbnails',
+            lambda: AppService.get().settings.get("thumbnail_cache_max_size", 256 * 1024 ** 2)
+        )
+        # Thumbnails being generated: key -> task
+        self._pending: Dict[str, asyncio.Task] = {}
+        self.generated = 0
+
+    @classmethod
+    def bucket(cls, width: int) -> int:
+        """Round a requested width up to a size bucket"""
+        return next((bucket for bucket in cls.WIDTHS if bucket >= width), cls.WIDTHS[-1])
+
+    @classmethod
+    def _generate(cls, image_path: Path, width: int, image_format: str, output_path: Path):
+        pil_format, _, save_options = cls.FORMATS[image_format]
+        with Image.open(image_path) as image:
+            # Let JPEG decoding downscale by itself (much faster for large photos).
+            image.draft('RGB', (width, width * image.height // max(image.width, 1)))
+            image = ImageOps.exif_transpose(image)
+            if image.width > width:
+                height = max(1, round(image.height * width / image.width))
+                image = image.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=2.0)
+            has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+            if image_format == "webp" and has_alpha:
+                image = image.convert('RGBA')
+            elif has_alpha:
+                # JPEG has no alpha: flatten on the app background.
+                background = Image.new('RGB', image.size, (0, 0, 0))
+                background.paste(image.convert('RGBA'), mask=image.convert('RGBA').getchannel('A'))
+                image = background
+            else:
+                image = image.convert('RGB')
+            image.save(output_path, pil_format, **save_options)
+
+    def _get_or_generate(self, key: str, image_path: Path, width: int, image_format: str) -> Path:
+        thumbnail_path = self.cache.get(key)
+        if thumbnail_path is not None:
+            return thumbnail_path
+        tmp_path = self.cache.tmp_path(key)
+        try:
+            self._generate(image_path, width, image_format, tmp_path)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        self.generated += 1
+        return self.cache.put(key, tmp_path)
+
+    async def get_thumbnail(
+        self, image_path: Path, width: int, image_format: str = "webp", stat_result: Optional[os.stat_result] = None
+    ) -> Tuple[Path, str]:
+        """Get the thumbnail of an image (generated if not cached). Returns its (path, media type)."""
+        if image_format not in self.FORMATS:
+            raise HTTPException(status_code=400, detail=f"Invalid thumbnail format: {image_format}")
+        if width <= 0:
+            raise HTTPException(status_code=400, detail=f"Invalid thumbnail width: {width}")
+        width = self.bucket(width)
+        st = stat_result or image_path.stat()
+        digest = hashlib.sha1(f"{image_path}|{st.st_mtime_ns}|{st.st_size}".encode('utf-8')).hexdigest()
+        key = f"{digest}_{width}.{image_format}"
+
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                run_blocking(self._get_or_generate, key, image_path, width, image_format, pool="image")
+            )
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        try:
+            # Shielded: a client going away doesn't cancel a generation other requests wait for.
+            thumbnail_path = await asyncio.shield(task)
+        except (OSError, Image.DecompressionBombError) as e:
+            raise HTTPException(status_code=422, detail=f"Failed to generate thumbnail: {str(e)}")
+        return thumbnail_path, self.FORMATS[image_format][1]
+
+    def stats(self) -> dict:
+        return {**self.cache.stats(), "generated": self.generated, "pending": len(self._pending)}
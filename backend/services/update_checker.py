@@ -0,0 +1,240 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+
+import httpx
+
+from .app_service import AppService
+from .http_client import get_http_client
+from .utils import FileUtils, RateLimiter
+from .worker_pool import run_blocking
+
+
+def _parse_files(item) -> Optional[List[dict]]:
+    """Get the files of a mod from a Core API item ({file id: file} or [file, ...]), None if invalid"""
+    if isinstance(item, list) and len(item) == 1 and not (isinstance(item[0], dict) and '_idRow' in item[0]):
+        # Field values of the item.
+        item = item[0]
+    if isinstance(item, dict):
+        item = list(item.values())
+    if not isinstance(item, list):
+        return None
+    return [
+        {
+            "id": file['_idRow'],
+            "name": file.get('_sFile'),
+            "date": file.get('_tsDateAdded', 0),
+            "size": file.get('_nFilesize'),
+            "description": file.get('_sDescription', ''),
+        }
+        for file in item if isinstance(file, dict) and '_idRow' in file
+    ]
+
+
+class UpdateChecker:
+    """
+    This class is used to check for new files of the mods installed from GameBanana.
+
+    The mods are checked in batches (settings["update_check_batch_size"] mods per request) using
+    the GameBanana Core API multi-item endpoint, with conditional requests (ETag/Last-Modified)
+    and a client-side rate limit (settings["update_check_rate"] requests per second). Requests that fail
+    with a 429/5xx or a connection error are retried (settings["update_check_max_retries"] times), after the
+    server's Retry-After or an exponential backoff from settings["update_check_retry_delay"] seconds.
+    Results are cached for settings["update_check_ttl"] seconds and persisted to 'update_checks.json'
+    in the app data dir. When settings["check_updates"] is enabled, checks also run in the background.
+    """
+
+    _instance = None
+
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+    MAX_RETRY_DELAY = 60.0
+
+    @staticmethod
+    def get():
+        if UpdateChecker._instance is None:
+            UpdateChecker._instance = UpdateChecker()
+        return UpdateChecker._instance
+
+    def __init__(self) -> None:
+        self.headers = {
+            "User-Agent": "NiceWuWaModsSelector/1.0"
+        }
+        self.cache_file = AppService.get().appdata_dir / "update_checks.json"
+        cache = FileUtils.read_json(self.cache_file) if self.cache_file.exists() else {}
+        # GameBanana mod id -> {"checked_at", "files"}
+        self.results: Dict[str, dict] = cache.get("results", {})
+        # Batch (comma separated mod ids) -> {"etag", "last_modified"}
+        self.validators: Dict[str, dict] = cache.get("validators", {})
+        self.last_check: Optional[dict] = None
+        self.retries = 0
+        self._check_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def settings(self) -> dict:
+        return AppService.get().settings
+
+    @property
+    def api_url(self) -> str:
+        return self.settings.get("gamebanana_core_api_url", "https://api.gamebanana.com")
+
+    @property
+    def ttl(self) -> float:
+        return self.settings.get("update_check_ttl", 6 * 3600)
+
+    def _installed_mods(self) -> List[dict]:
+        from .mod_service import ModService
+        return [mod for mod in ModService.get().mods_metadata_id.values() if (mod.get("gamebanana") or {}).get("id")]
+
+    def retry_delay(self, response: Optional[httpx.Response], attempt: int) -> float:
+        """Seconds to wait before retrying a failed request: the Retry-After of the response (seconds or
+        HTTP date) if any, otherwise an exponential backoff with jitter. Capped at MAX_RETRY_DELAY."""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return min(max(delay, 0.0), self.MAX_RETRY_DELAY)
+        delay = self.settings.get("update_check_retry_delay", 1.0) * 2 ** attempt
+        return min(delay * random.uniform(0.5, 1.0), self.MAX_RETRY_DELAY)
+
+    async def _check_batch(self, mod_ids: List[int], limiter: RateLimiter, semaphore: asyncio.Semaphore) -> int:
+        """Get the files of a batch of GameBanana mods. Returns the number of mods updated."""
+        batch_key = ",".join(str(mod_id) for mod_id in mod_ids)
+        params = []
+        for mod_id in mod_ids:
+            params += [("itemtype[]", "Mod"), ("itemid[]", mod_id), ("fields[]", "Files().aFiles()")]
+        headers = dict(self.headers)
+        validators = self.validators.get(batch_key, {})
+        if all(str(mod_id) in self.results for mod_id in mod_ids):
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        max_retries = self.settings.get("update_check_max_retries", 3)
+        for attempt in range(max_retries + 1):
+            try:
+                async with semaphore, limiter:
+                    response = await get_http_client().get(f"{self.api_url}/Core/Item/Data", params=params, headers=headers)
+            except httpx.TransportError:
+                if attempt == max_retries:
+                    raise
+                response = None
+            else:
+                if response.status_code not in self.RETRY_STATUS_CODES or attempt == max_retries:
+                    break
+            # Waited outside of the semaphore, the other batches go on meanwhile.
+            self.retries += 1
+            await asyncio.sleep(self.retry_delay(response, attempt))
+        checked_at = int(time.time())
+        if response.status_code == 304:
+            for mod_id in mod_ids:
+                self.results[str(mod_id)]["checked_at"] = checked_at
+            return 0
+
+        response.raise_for_status()
+        items = response.json()
+        if not isinstance(items, list) or len(items) != len(mod_ids):
+            raise ValueError(f"Unexpected response for mods {batch_key}")
+        for mod_id, item in zip(mod_ids, items):
+            files = _parse_files(item)
+            if files is not None:
+                self.results[str(mod_id)] = {"checked_at": checked_at, "files": files}
+        self.validators[batch_key] = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        return len(mod_ids)
+
+    async def check(self, force: bool = False) -> dict:
+        """Check the installed GameBanana mods whose cached result is older than the TTL (all of them if force)"""
+        async with self._check_lock:
+            start_time = time.perf_counter()
+            retries = self.retries
+            now = time.time()
+            mod_ids = sorted({mod["gamebanana"]["id"] for mod in self._installed_mods()})
+            stale_ids = [
+                mod_id for mod_id in mod_ids
+                if force or now - self.results.get(str(mod_id), {}).get("checked_at", 0) >= self.ttl
+            ]
+            batch_size = max(1, self.settings.get("update_check_batch_size", 50))
+            batches = [stale_ids[i:i + batch_size] for i in range(0, len(stale_ids), batch_size)]
+
+            limiter = RateLimiter(self.settings.get("update_check_rate", 5), burst=2)
+            semaphore = asyncio.Semaphore(self.settings.get("update_check_concurrency", 4))
+            results = await asyncio.gather(
+                *(self._check_batch(batch, limiter, semaphore) for batch in batches), return_exceptions=True
+            )
+            errors = [str(result) for result in results if isinstance(result, Exception)]
+            for error in errors:
+                print(f"Failed to check for mod updates: {error}")
+
+            if batches:
+                cache = {"results": dict(self.results), "validators": dict(self.validators)}
+                await run_blocking(FileUtils.write_json, self.cache_file, cache, atomic=True)
+
+            self.last_check = {
+                "checked_at": int(now),
+                "mods": len(mod_ids),
+                "checked": len(stale_ids),
+                "requests": len(batches),
+                "modified": sum(result for result in results if isinstance(result, int)),
+                "errors": errors,
+                "retries": self.retries - retries,
+                "seconds": round(time.perf_counter() - start_time, 3),
+                "updates": len(self.get_updates()),
+            }
+            print(f"Checked for mod updates: {self.last_check}")
+            return self.last_check
+
+    def get_updates(self) -> List[dict]:
+        """Get the installed mods with newer files on GameBanana (from the cached check results)"""
+        updates = []
+        for mod in self._installed_mods():
+            result = self.results.get(str(mod["gamebanana"]["id"]))
+            if result is None:
+                continue
+            installed_versions = mod.get("installed_versions") or []
+            installed_ids = {version["id"] for version in installed_versions}
+            latest_date = max((version["date"] for version in installed_versions), default=0)
+            new_files = [
+                file for file in result["files"]
+                if file["id"] not in installed_ids and file["date"] > latest_date
+            ]
+            if new_files:
+                updates.append({
+                    "mod_id": mod["id"],
+                    "name": mod["name"],
+                    "gamebanana_id": mod["gamebanana"]["id"],
+                    "page_url": mod["gamebanana"].get("page_url"),
+                    "checked_at": result["checked_at"],
+                    "new_files": sorted(new_files, key=lambda file: file["date"], reverse=True),
+                })
+        return updates
+
+    async def _check_loop(self):
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                print(f"Failed to check for mod updates: {str(e)}")
+            await asyncio.sleep(self.settings.get("update_check_interval", 3600))
+
+    def start(self):
+        """Start checking for updates in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._check_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,189 @@
+import hashlib
+import uuid
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+from .app_service import AppService
+from .utils import FileUtils
+from .worker_pool import run_blocking
+
+try:
+    from python_multipart.exceptions import FormParserError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:
+    from multipart.exceptions import FormParserError
+    from multipart.multipart import MultipartParser, parse_options_header
+
+
+class UploadedFile:
+    """ This class is used to hold a file received by the UploadService, written to a temporary file. """
+
+    def __init__(self, field: str, filename: str, path: Path, hash_algorithm: Optional[str]) -> None:
+        self.field = field
+        self.filename = filename
+        self.path = path
+        self.size = 0
+        self._file = open(path, 'wb')
+        self._hasher = hashlib.new(hash_algorithm) if hash_algorithm else None
+
+    @property
+    def digest(self) -> Optional[str]:
+        return self._hasher.hexdigest() if self._hasher else None
+
+    def write(self, data: bytes):
+        self._file.write(data)
+        if self._hasher is not None:
+            self._hasher.update(data)
+
+    def close(self):
+        self._file.close()
+
+    def unlink(self):
+        self._file.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class UploadService:
+    """
+    This class is used to receive the mods uploaded from the UI (multipart/form-data).
+
+    The request body is parsed as it streams in: file parts are written chunk by chunk
+    to temporary files in the 'uploads' dir of the app data dir (optionally hashed on the fly),
+    so memory use doesn't depend on the size of the upload, which is limited to
+    settings["max_upload_size"] bytes. The temporary files can then be extracted in place.
+    """
+
+    _instance = None
+
+    # Buffered body bytes before flushing them to the temporary files.
+    WRITE_BUFFER_SIZE = 1024 * 1024
+    # Max size of a (non-file) form field, they are kept in memory.
+    MAX_FIELD_SIZE = 64 * 1024
+
+    @staticmethod
+    def get():
+        if UploadService._instance is None:
+            UploadService._instance = UploadService()
+        return UploadService._instance
+
+    def __init__(self) -> None:
+        self.upload_dir = AppService.get().appdata_dir / 'uploads'
+        FileUtils.ensure_directory(self.upload_dir, parents=False)
+        # Leftovers of uploads interrupted by a crash.
+        for file_path in self.upload_dir.iterdir():
+            file_path.unlink()
+
+    @property
+    def max_size(self) -> int:
+        return AppService.get().settings.get("max_upload_size", 4 * 1024 ** 3)
+
+    @property
+    def hash_algorithm(self) -> Optional[str]:
+        return AppService.get().settings.get("upload_hash_algorithm", None)
+
+    async def receive(self, request: Request) -> Tuple[Dict[str, str], Dict[str, UploadedFile]]:
+        """Receive a multipart/form-data request. Returns its (fields, files).
+        The temporary files must be removed with UploadedFile.unlink() by the caller."""
+        content_type, params = parse_options_header(request.headers.get("Content-Type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise HTTPException(status_code=400, detail="Expected a multipart/form-data request")
+        content_length = request.headers.get("Content-Length")
+        if content_length is not None and int(content_length) > self.max_size:
+            raise HTTPException(status_code=413, detail=f"Upload too large (max {self.max_size} bytes)")
+
+        fields: Dict[str, str] = {}
+        files: Dict[str, UploadedFile] = {}
+        # State of the part being parsed, the parser callbacks are synchronous.
+        state = {"header_field": b"", "header_value": b"", "headers": {}, "part": None, "data": bytearray()}
+        # Parsed (file, data) chunks, written to disk off the event loop.
+        pending = []
+
+        def on_part_begin():
+            state["headers"] = {}
+            state["part"] = None
+            state["data"] = bytearray()
+
+        def on_header_field(data: bytes, start: int, end: int):
+            state["header_field"] += data[start:end]
+
+        def on_header_value(data: bytes, start: int, end: int):
+            state["header_value"] += data[start:end]
+
+        def on_header_end():
+            state["headers"][state["header_field"].lower()] = state["header_value"]
+            state["header_field"] = state["header_value"] = b""
+
+        def on_headers_finished():
+            _, options = parse_options_header(state["headers"].get(b"content-disposition", b""))
+            name = options.get(b"name", b"").decode('utf-8')
+            if b"filename" in options:
+                filename = Path(options[b"filename"].decode('utf-8')).name
+                path = self.upload_dir / f"{uuid.uuid4().hex}{Path(filename).suffix.lower()}"
+                state["part"] = UploadedFile(name, filename, path, self.hash_algorithm)
+                files[name] = state["part"]
+            else:
+                state["part"] = name
+
+        def on_part_data(data: bytes, start: int, end: int):
+            part = state["part"]
+            if isinstance(part, UploadedFile):
+                part.size += end - start
+                if part.size > self.max_size:
+                    raise HTTPException(status_code=413, detail=f"Upload too large (max {self.max_size} bytes)")
+                pending.append((part, data[start:end]))
+            else:
+                if len(state["data"]) + end - start > self.MAX_FIELD_SIZE:
+                    raise HTTPException(status_code=413, detail=f"Form field too large (max {self.MAX_FIELD_SIZE} bytes)")
+                state["data"] += data[start:end]
+
+        def on_part_end():
+            part = state["part"]
+            if isinstance(part, UploadedFile):
+                pending.append((part, None))
+            elif part is not None:
+                fields[part] = state["data"].decode('utf-8')
+
+        parser = MultipartParser(params[b"boundary"], {
+            "on_part_begin": on_part_begin,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+        })
+
+        def flush(chunks: list):
+            for part, data in chunks:
+                if data is None:
+                    part.close()
+                else:
+                    part.write(data)
+
+        try:
+            buffered = 0
+            async for chunk in request.stream():
+                parser.write(chunk)
+                buffered += len(chunk)
+                if buffered >= self.WRITE_BUFFER_SIZE:
+                    chunks = pending[:]
+                    pending.clear()
+                    buffered = 0
+                    await run_blocking(flush, chunks)
+            parser.finalize()
+            await run_blocking(flush, pending)
+        except BaseException as e:
+            for part in files.values():
+                part.unlink()
+            if isinstance(e, FormParserError):
+                raise HTTPException(status_code=400, detail=f"Invalid multipart body: {str(e)}")
+            raise
+        for part in files.values():
+            digest = f", {self.hash_algorithm}: {part.digest}" if part.digest else ""
+            print(f"Received upload: {part.filename} ({part.size} bytes{digest})")
+        return fields, files
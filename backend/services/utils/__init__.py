@@ -1,4 +1,8 @@
+from .disk_cache import DiskCache
 from .file import FileUtils
+from .fingerprint import FingerprintCache
+from .listing_cache import ListingCache
+from .rate_limiter import RateLimiter
+from .stat_cache import StatCache
 
-__all__ = ["FileUtils"]
-
+__all__ = ["DiskCache", "FileUtils", "FingerprintCache", "ListingCache", "RateLimiter", "StatCache"]
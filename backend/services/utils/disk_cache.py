@@ -0,0 +1,95 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional
+
+
+class DiskCache:
+    """
+    This class is used to keep generated or downloaded files in a directory bounded in size,
+    evicting the least recently used files first. Entries are files named by their key.
+
+    The recency order is rebuilt from the files modification times when the cache is created,
+    and hits touch their file, so the order survives restarts. Methods do blocking filesystem work.
+    """
+
+    def __init__(self, cache_dir: Path, max_size: Callable[[], int]) -> None:
+        self.cache_dir = cache_dir
+        # Read on every put, so settings changes apply without restarting.
+        self.max_size = max_size
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # key -> file size
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        files = []
+        for file_path in self.cache_dir.iterdir():
+            if file_path.suffix == '.tmp':
+                # Leftover of an interrupted write.
+                file_path.unlink()
+            elif file_path.is_file():
+                st = file_path.stat()
+                files.append((st.st_mtime, file_path.name, st.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+        self.size = sum(self._entries.values())
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key: str) -> Path:
+        return self.cache_dir / key
+
+    def get(self, key: str) -> Optional[Path]:
+        """Get the path of a cached file, None on a miss"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        file_path = self.path(key)
+        try:
+            os.utime(file_path)
+        except FileNotFoundError:
+            with self._lock:
+                self.size -= self._entries.pop(key, 0)
+                self.hits -= 1
+                self.misses += 1
+            return None
+        return file_path
+
+    def tmp_path(self, key: str) -> Path:
+        """Get a temporary path to write a file to before adding it with put()"""
+        return self.cache_dir / f"{key}.{threading.get_ident()}.tmp"
+
+    def put(self, key: str, file_path: Path) -> Path:
+        """Move a file into the cache, evicting the least recently used files over the size limit"""
+        target = self.path(key)
+        os.replace(file_path, target)
+        size = target.stat().st_size
+        evicted = []
+        with self._lock:
+            self.size += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            max_size = max(self.max_size(), 0)
+            while self.size > max_size and len(self._entries) > 1:
+                old_key, old_size = self._entries.popitem(last=False)
+                self.size -= old_size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                self.path(old_key).unlink()
+            except FileNotFoundError:
+                pass
+        return target
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_size": self.max_size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -1,12 +1,52 @@
 import zipfile
 import rarfile
 import py7zr
+import py7zr.io
 import shutil
+import stat
 from pathlib import Path
 from typing import Optional
 from fastapi import HTTPException
 import json
 import os
+import heapq
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Archives with less uncompressed data than this are always extracted serially,
+# the process pool overhead isn't worth it.
+PARALLEL_EXTRACT_MIN_SIZE = 32 * 1024 * 1024
+
+
+def _extract_zip_members(file_path: str, dest: str, names: list) -> None:
+    """Extract some members of a zip archive (process pool worker)"""
+    with zipfile.ZipFile(file_path, 'r') as zip_ref:
+        for name in names:
+            target = os.path.join(dest, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # ZipExtFile checks the CRC-32 once the member is fully read.
+            with zip_ref.open(name) as src, open(target, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+
+
+def _extract_7z_members(file_path: str, dest: str, names: list) -> None:
+    """Extract some members of a 7z archive (process pool worker)"""
+    with py7zr.SevenZipFile(file_path, 'r') as sz:
+        sz.extract(dest, targets=names)
+
+
+def _partition(items: list, workers: int) -> list:
+    """Split (weight, names) items in `workers` groups of similar total weight"""
+    bins = [(0, i, []) for i in range(workers)]
+    for weight, names in sorted(items, key=lambda item: item[0], reverse=True):
+        total, i, group = heapq.heappop(bins)
+        group.extend(names)
+        heapq.heappush(bins, (total + weight, i, group))
+    return [group for _, _, group in bins if group]
 
 
 class FileUtils:
@@ -14,6 +54,37 @@ class FileUtils:
     This class is used to manage files and directories.
     """
 
+    _process_pool: Optional[ProcessPoolExecutor] = None
+    _process_pool_workers = 0
+    _process_pool_lock = threading.Lock()
+
+    @staticmethod
+    def _get_process_pool(workers: int) -> ProcessPoolExecutor:
+        """Get the (shared) process pool used for parallel archive extraction"""
+        with FileUtils._process_pool_lock:
+            if FileUtils._process_pool is None or FileUtils._process_pool_workers != workers:
+                if FileUtils._process_pool is not None:
+                    FileUtils._process_pool.shutdown(wait=False)
+                FileUtils._process_pool = ProcessPoolExecutor(max_workers=workers)
+                FileUtils._process_pool_workers = workers
+            return FileUtils._process_pool
+
+    @staticmethod
+    def shutdown_process_pool():
+        with FileUtils._process_pool_lock:
+            if FileUtils._process_pool is not None:
+                FileUtils._process_pool.shutdown(wait=True)
+                FileUtils._process_pool = None
+                FileUtils._process_pool_workers = 0
+
+    @staticmethod
+    def _extract_parallel(func, file_path: Path, staging_path: Path, groups: list, workers: int):
+        """Extract groups of archive members across the process pool"""
+        pool = FileUtils._get_process_pool(workers)
+        futures = [pool.submit(func, str(file_path), str(staging_path), names) for names in groups]
+        for future in futures:
+            future.result()
+
     @staticmethod
     def _check_unrar():
         """Check if unrar is installed"""
@@ -58,6 +129,340 @@ class FileUtils:
             print(f"Failed to extract archive: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Failed to extract archive: {str(e)}")
 
+    @staticmethod
+    def _safe_member_path(root: Path, name: str) -> Path:
+        """Get the extraction path of an archive member, refusing paths that escape the root"""
+        target = (root / name).resolve()
+        if not target.is_relative_to(root.resolve()):
+            raise HTTPException(status_code=400, detail=f"Unsafe path in archive: {name}")
+        return target
+
+    @staticmethod
+    def _check_cancelled(cancel_event: Optional[threading.Event]):
+        if cancel_event is not None and cancel_event.is_set():
+            raise HTTPException(status_code=409, detail="Extraction cancelled")
+
+    @staticmethod
+    def _commit_staging(staging_path: Path, extract_path: Path):
+        """Move a staging directory into place: renamed atomically when the target doesn't exist (or is empty),
+        otherwise merged into it file by file (each file replaced atomically)."""
+        if extract_path.exists() and not any(extract_path.iterdir()):
+            extract_path.rmdir()
+        if not extract_path.exists():
+            os.replace(staging_path, extract_path)
+            return
+        for src in sorted(staging_path.rglob('*')):
+            dst = extract_path / src.relative_to(staging_path)
+            if src.is_dir():
+                dst.mkdir(exist_ok=True)
+            else:
+                FileUtils.replace_file(src, dst)
+
+    @staticmethod
+    def _make_writable(file_path: Path):
+        os.chmod(file_path, os.stat(file_path).st_mode | stat.S_IWRITE)
+
+    @staticmethod
+    def replace_file(src: Path, dst: Path):
+        """os.replace() that also replaces read-only targets (eg. deduplicated files, see ContentStore).
+        The target is a hardlink: only the link is replaced, the shared content isn't written."""
+        try:
+            os.replace(src, dst)
+        except PermissionError:
+            if not dst.is_file():
+                raise
+            FileUtils._make_writable(dst)
+            os.replace(src, dst)
+
+    @staticmethod
+    def remove_file(file_path: Path):
+        """Remove a file, even if read-only (eg. a deduplicated file, see ContentStore)"""
+        try:
+            file_path.unlink()
+        except PermissionError:
+            FileUtils._make_writable(file_path)
+            file_path.unlink()
+
+    @staticmethod
+    def remove_tree(path: Path, ignore_errors: bool = False):
+        """shutil.rmtree() that also removes read-only files (eg. deduplicated files, see ContentStore)"""
+        def on_error(func, failed_path, exc_info):
+            if func in (os.unlink, os.remove) and os.path.isfile(failed_path):
+                try:
+                    FileUtils._make_writable(Path(failed_path))
+                    func(failed_path)
+                    return
+                except OSError:
+                    pass
+            if not ignore_errors:
+                raise exc_info[1]
+        shutil.rmtree(path, onerror=on_error)
+
+    @staticmethod
+    def extract_archive_staged(
+        file_path: Path, extract_path: Path, workers: int = 1, only: Optional[set] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> dict:
+        """Validate and extract an archive in a single pass into a staging directory next to the target,
+        which is moved into place once every member has been extracted and CRC-checked.
+        With workers > 1, large zip archives and 7z archives with several solid blocks are decompressed
+        across a process pool (members, or solid blocks, split between the workers).
+        If `only` is given, only these members (file names) are extracted.
+        If `cancel_event` is set before the staging directory is moved into place, nothing is written (409).
+        Returns a report with the member count, uncompressed bytes, workers used and throughput (MB/s),
+        and the extracted "files" ({member name: [uncompressed size, CRC-32]}, as list_archive_members)."""
+        suffix = file_path.suffix.lower()
+        if suffix not in ('.zip', '.7z', '.rar'):
+            print(f"Unsupported archive format: {file_path.suffix}")
+            raise HTTPException(status_code=400, detail=f"Unsupported archive format: {file_path.suffix}")
+
+        print(f"Extracting {file_path} to {extract_path} (staged)")
+        staging_path = extract_path.parent / f".{extract_path.name}.staging-{uuid.uuid4().hex[:8]}"
+        start_time = time.perf_counter()
+        members = 0
+        total_bytes = 0
+        used_workers = 1
+        member_files = {}
+        try:
+            staging_path.mkdir(parents=True)
+            if suffix == '.zip':
+                with zipfile.ZipFile(file_path, 'r') as zip_ref:
+                    infos = zip_ref.infolist()
+                    files = []
+                    for info in infos:
+                        target = FileUtils._safe_member_path(staging_path, info.filename)
+                        if info.is_dir():
+                            if only is None:
+                                target.mkdir(parents=True, exist_ok=True)
+                        elif only is None or info.filename in only:
+                            files.append(info)
+                    members = len(files)
+                    total_bytes = sum(info.file_size for info in files)
+                    member_files = {info.filename: [info.file_size, info.CRC] for info in files}
+
+                    if workers > 1 and members > 1 and total_bytes >= PARALLEL_EXTRACT_MIN_SIZE:
+                        groups = _partition([(info.compress_size, [info.filename]) for info in files], workers)
+                        used_workers = len(groups)
+                        FileUtils._extract_parallel(_extract_zip_members, file_path, staging_path, groups, workers)
+                    else:
+                        for info in files:
+                            FileUtils._check_cancelled(cancel_event)
+                            target = FileUtils._safe_member_path(staging_path, info.filename)
+                            target.parent.mkdir(parents=True, exist_ok=True)
+                            # ZipExtFile checks the CRC-32 once the member is fully read.
+                            with zip_ref.open(info) as src, open(target, 'wb') as dst:
+                                shutil.copyfileobj(src, dst, 1024 * 1024)
+            elif suffix == '.7z':
+                with py7zr.SevenZipFile(file_path, 'r') as sz:
+                    infos = sz.list()
+                    for info in infos:
+                        FileUtils._safe_member_path(staging_path, info.filename)
+                    if only is not None:
+                        infos = [info for info in infos if not info.is_directory and info.filename in only]
+                    files = [info for info in infos if not info.is_directory]
+                    members = len(files)
+                    total_bytes = sum(info.uncompressed for info in files)
+                    member_files = {info.filename: [info.uncompressed, info.crc32 or 0] for info in files}
+
+                    # Group the members by solid block (folder), blocks can be decompressed independently.
+                    blocks: dict[int, tuple] = {}
+                    for archive_file in sz.files:
+                        if archive_file.is_directory or archive_file.folder is None:
+                            continue
+                        if only is not None and archive_file.filename not in only:
+                            continue
+                        weight, names = blocks.get(id(archive_file.folder), (0, []))
+                        names.append(archive_file.filename)
+                        blocks[id(archive_file.folder)] = (weight + archive_file.uncompressed, names)
+
+                    if workers > 1 and len(blocks) > 1 and total_bytes >= PARALLEL_EXTRACT_MIN_SIZE:
+                        groups = _partition(list(blocks.values()), workers)
+                        used_workers = len(groups)
+                    else:
+                        # Solid (single block) or small archive: serial path.
+                        # py7zr checks the CRCs while decompressing.
+                        if only is None:
+                            sz.extractall(staging_path)
+                        elif files:
+                            sz.extract(staging_path, targets=[info.filename for info in files])
+                if used_workers > 1:
+                    FileUtils._extract_parallel(_extract_7z_members, file_path, staging_path, groups, workers)
+                    # Empty files and directories don't belong to any block.
+                    for info in infos:
+                        target = staging_path / info.filename
+                        if info.is_directory:
+                            target.mkdir(parents=True, exist_ok=True)
+                        elif not target.exists():
+                            target.parent.mkdir(parents=True, exist_ok=True)
+                            target.touch()
+            else:
+                FileUtils._check_unrar()
+                with rarfile.RarFile(file_path, 'r') as rar:
+                    infos = rar.infolist()
+                    for info in infos:
+                        FileUtils._safe_member_path(staging_path, info.filename)
+                    if only is not None:
+                        infos = [info for info in infos if not info.is_dir() and info.filename in only]
+                    # unrar checks the CRCs while extracting.
+                    if only is None:
+                        rar.extractall(staging_path)
+                    elif infos:
+                        rar.extractall(staging_path, members=infos)
+                files = [info for info in infos if not info.is_dir()]
+                members = len(files)
+                total_bytes = sum(info.file_size for info in files)
+                member_files = {info.filename: [info.file_size, info.CRC] for info in files}
+
+            FileUtils._check_cancelled(cancel_event)
+            FileUtils._commit_staging(staging_path, extract_path)
+        except HTTPException:
+            raise
+        except (zipfile.BadZipFile, py7zr.Bad7zFile, rarfile.Error) as e:
+            print(f"Invalid archive: {str(e)}")
+            raise HTTPException(status_code=400, detail=f"Invalid archive {file_path.name}: {str(e)}")
+        except Exception as e:
+            print(f"Failed to extract archive: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Failed to extract archive: {str(e)}")
+        finally:
+            if staging_path.exists():
+                shutil.rmtree(staging_path, ignore_errors=True)
+
+        elapsed = time.perf_counter() - start_time
+        report = {
+            "archive": file_path.name,
+            "members": members,
+            "bytes": total_bytes,
+            "workers": used_workers,
+            "seconds": round(elapsed, 3),
+            "mb_per_s": round(total_bytes / (1024 * 1024) / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+        print(f"Extraction completed successfully: {report}")
+        report["files"] = member_files
+        return report
+
+    @staticmethod
+    def list_archive_members(file_path: Path) -> dict:
+        """List the files of an archive from its headers (nothing is decompressed).
+        Returns {member name: [uncompressed size, CRC-32]}."""
+        suffix = file_path.suffix.lower()
+        try:
+            if suffix == '.zip':
+                with zipfile.ZipFile(file_path, 'r') as zip_ref:
+                    return {info.filename: [info.file_size, info.CRC] for info in zip_ref.infolist() if not info.is_dir()}
+            elif suffix == '.7z':
+                with py7zr.SevenZipFile(file_path, 'r') as sz:
+                    return {info.filename: [info.uncompressed, info.crc32 or 0] for info in sz.list() if not info.is_directory}
+            elif suffix == '.rar':
+                FileUtils._check_unrar()
+                with rarfile.RarFile(file_path, 'r') as rar:
+                    return {info.filename: [info.file_size, info.CRC] for info in rar.infolist() if not info.is_dir()}
+        except (zipfile.BadZipFile, py7zr.Bad7zFile, rarfile.Error) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid archive {file_path.name}: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Unsupported archive format: {file_path.suffix}")
+
+    @staticmethod
+    def inspect_archive(file_path: Path) -> dict:
+        """Describe the content of an archive from its headers (nothing is decompressed):
+        member tree, file count, total (un)compressed size, .ini files and preview images."""
+        start_time = time.perf_counter()
+        suffix = file_path.suffix.lower()
+        # (name, is_dir, size, compressed size)
+        entries = []
+        try:
+            if suffix == '.zip':
+                with zipfile.ZipFile(file_path, 'r') as zip_ref:
+                    entries = [(i.filename, i.is_dir(), i.file_size, i.compress_size) for i in zip_ref.infolist()]
+            elif suffix == '.7z':
+                with py7zr.SevenZipFile(file_path, 'r') as sz:
+                    entries = [(i.filename, i.is_directory, i.uncompressed, i.compressed or 0) for i in sz.list()]
+            elif suffix == '.rar':
+                FileUtils._check_unrar()
+                with rarfile.RarFile(file_path, 'r') as rar:
+                    entries = [(i.filename, i.is_dir(), i.file_size, i.compress_size) for i in rar.infolist()]
+            else:
+                raise HTTPException(status_code=400, detail=f"Unsupported archive format: {file_path.suffix}")
+        except (zipfile.BadZipFile, py7zr.Bad7zFile, rarfile.Error) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid archive {file_path.name}: {str(e)}")
+
+        tree = {"name": "", "type": "dir", "children": {}}
+        files = []
+        for name, is_dir, size, _ in entries:
+            node = tree
+            parts = [part for part in name.replace('\\', '/').split('/') if part]
+            for i, part in enumerate(parts):
+                if i == len(parts) - 1 and not is_dir:
+                    node["children"][part] = {"name": part, "type": "file", "path": "/".join(parts), "size": size}
+                else:
+                    node = node["children"].setdefault(part, {"name": part, "type": "dir", "children": {}})
+            if not is_dir:
+                files.append("/".join(parts))
+
+        def sorted_tree(node: dict) -> dict:
+            if node["type"] == "dir":
+                children = sorted(node["children"].values(), key=lambda child: (child["type"] != "dir", child["name"].lower()))
+                node["children"] = [sorted_tree(child) for child in children]
+            return node
+
+        image_extensions = {'.png', '.jpg', '.jpeg', '.webp', '.gif', '.bmp'}
+        return {
+            "archive": file_path.name,
+            "format": suffix[1:],
+            "archive_size": file_path.stat().st_size,
+            "files": len(files),
+            "total_size": sum(size for _, is_dir, size, _ in entries if not is_dir),
+            "compressed_size": sum(compressed for _, is_dir, _, compressed in entries if not is_dir),
+            "ini_files": [name for name in files if name.lower().endswith('.ini')],
+            "preview_images": [name for name in files if Path(name).suffix.lower() in image_extensions],
+            "tree": sorted_tree(tree)["children"],
+            "seconds": round(time.perf_counter() - start_time, 4),
+        }
+
+    @staticmethod
+    def read_archive_member(file_path: Path, name: str, max_size: int = 32 * 1024 * 1024) -> bytes:
+        """Decompress a single member of an archive in memory (eg. a preview image)"""
+        suffix = file_path.suffix.lower()
+        try:
+            if suffix == '.zip':
+                with zipfile.ZipFile(file_path, 'r') as zip_ref:
+                    info = zip_ref.getinfo(name)
+                    if info.file_size > max_size:
+                        raise HTTPException(status_code=413, detail=f"Archive member too large: {name}")
+                    return zip_ref.read(info)
+            elif suffix == '.7z':
+                with py7zr.SevenZipFile(file_path, 'r') as sz:
+                    info = next((i for i in sz.list() if i.filename == name and not i.is_directory), None)
+                    if info is None:
+                        raise KeyError(name)
+                    if info.uncompressed > max_size:
+                        raise HTTPException(status_code=413, detail=f"Archive member too large: {name}")
+                    factory = py7zr.io.BytesIOFactory(max_size)
+                    sz.reset()
+                    sz.extract(targets=[name], factory=factory)
+                    member = factory.get(name)
+                    member.seek(0)
+                    return member.read()
+            elif suffix == '.rar':
+                FileUtils._check_unrar()
+                with rarfile.RarFile(file_path, 'r') as rar:
+                    info = rar.getinfo(name)
+                    if info.file_size > max_size:
+                        raise HTTPException(status_code=413, detail=f"Archive member too large: {name}")
+                    return rar.read(info)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Archive member not found: {name}")
+        except (zipfile.BadZipFile, py7zr.Bad7zFile, rarfile.Error) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid archive {file_path.name}: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Unsupported archive format: {file_path.suffix}")
+
+    @staticmethod
+    def crc32_file(file_path: Path) -> int:
+        """Get the CRC-32 of a file"""
+        crc = 0
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                crc = zlib.crc32(chunk, crc)
+        return crc
+
     @staticmethod
     def find_preview_image(directory: Path) -> Optional[Path]:
         """Find a preview image in the directory"""
@@ -119,7 +524,24 @@ class FileUtils:
             return json.load(f)
         
     @staticmethod
-    def write_json(file_path: Path, data: dict):
-        """Write a JSON file"""
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=2)
+    def write_json(file_path: Path, data: dict, atomic: bool = False):
+        """Write a JSON file. If atomic, write to a temporary file that then replaces the target."""
+        if not atomic:
+            with open(file_path, 'w') as f:
+                json.dump(data, f, indent=2)
+            return
+        FileUtils.write_text(file_path, json.dumps(data, indent=2), atomic=True)
+
+    @staticmethod
+    def write_text(file_path: Path, text: str, atomic: bool = False):
+        """Write a text file. If atomic, write to a temporary file that then replaces the target."""
+        if not atomic:
+            with open(file_path, 'w') as f:
+                f.write(text)
+            return
+        tmp_path = file_path.with_name(file_path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
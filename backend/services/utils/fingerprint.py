@@ -0,0 +1,60 @@
+import os
+from pathlib import Path
+from typing import Optional
+
+from .file import FileUtils
+
+
+class FingerprintCache:
+    """
+    This class is used to persist a stat fingerprint (mtime, inode, size) for each mod directory
+    and its metadata.json, so rescans can skip the directories that did not change.
+    """
+
+    def __init__(self, cache_file: Path) -> None:
+        self.cache_file = cache_file
+        # Mod directory path (relative to the mods dir) -> {"fingerprint": [...], "id": mod_id}
+        self.entries: dict[str, dict] = {}
+        self.load()
+
+    @staticmethod
+    def stat_entry(path: Path) -> Optional[list]:
+        """Get the [mtime, inode, size] fingerprint of a path, None if it doesn't exist"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return [st.st_mtime_ns, st.st_ino, st.st_size]
+
+    @staticmethod
+    def fingerprint(mod_dirpath: Path) -> list:
+        """Get the fingerprint of a mod directory and its metadata.json"""
+        return [
+            FingerprintCache.stat_entry(mod_dirpath),
+            FingerprintCache.stat_entry(mod_dirpath / "metadata.json"),
+        ]
+
+    def load(self):
+        """Load the fingerprints from disk, starting empty if the file is missing or corrupt"""
+        if not self.cache_file.exists():
+            self.entries = {}
+            return
+        try:
+            self.entries = FileUtils.read_json(self.cache_file)
+        except Exception as e:
+            print(f"Failed to load fingerprint cache: {str(e)}")
+            self.entries = {}
+
+    def save(self):
+        """Write the fingerprints to disk"""
+        try:
+            FileUtils.write_json(self.cache_file, self.entries)
+        except Exception as e:
+            print(f"Failed to save fingerprint cache: {str(e)}")
+
+    def get(self, rel_path: str) -> Optional[dict]:
+        return self.entries.get(rel_path, None)
+
+    def is_unchanged(self, rel_path: str, fingerprint: list) -> bool:
+        entry = self.entries.get(rel_path, None)
+        return entry is not None and entry["fingerprint"] == fingerprint
@@ -0,0 +1,61 @@
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+class ListingCache:
+    """
+    This class is used to cache ready-to-send JSON bytes of mods listings,
+    keyed by (category, character) and the listing query (projection, sort, page...).
+    """
+
+    def __init__(self, max_entries: int = 512) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, listing_key: tuple, query: tuple) -> Optional[bytes]:
+        """Get the cached bytes of a listing query, None on a miss"""
+        key = (listing_key, query)
+        with self._lock:
+            data = self._entries.get(key, None)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, listing_key: tuple, query: tuple, data: bytes):
+        """Cache the bytes of a listing query, evicting the least recently used entries"""
+        key = (listing_key, query)
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, listing_key: Optional[tuple] = None):
+        """Drop the cached queries of a (category, character) listing, or everything if no key is given"""
+        with self._lock:
+            if listing_key is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == listing_key]:
+                    del self._entries[key]
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(len(data) for data in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "invalidations": self.invalidations,
+            }
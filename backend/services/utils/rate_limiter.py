@@ -0,0 +1,35 @@
+import asyncio
+import time
+
+
+class RateLimiter:
+    """
+    This class is used to limit the rate of the requests made to an external API (client side):
+    at most `rate` requests per second, with bursts of up to `burst` requests (token bucket).
+    """
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate = max(rate, 0.001)
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a request can be made"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *args):
+        return False
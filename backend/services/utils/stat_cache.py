@@ -0,0 +1,60 @@
+import os
+import stat
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+
+class StatCache:
+    """
+    This class is used to cache the stat results of hot files (eg. the mods preview images served to the UI),
+    so repeated requests don't hit the filesystem. Entries expire after `ttl` seconds, as a safety net
+    for changes made outside the app, and are dropped on every mod mutation.
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl: float = 30) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def stat(self, file_path: Path) -> Optional[os.stat_result]:
+        """Get the stat result of a regular file, None if it doesn't exist or isn't a file (not cached)"""
+        key = str(file_path)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        try:
+            stat_result = os.stat(file_path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(stat_result.st_mode):
+            return None
+        with self._lock:
+            self._entries[key] = (stat_result, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return stat_result
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
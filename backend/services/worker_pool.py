@@ -0,0 +1,48 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from .app_service import AppService
+
+
+class WorkerPool:
+    """
+    This class is used to run blocking filesystem and archive work off the asyncio event loop.
+
+    There are separate bounded thread pools, so that long archive extractions and image processing
+    can't starve the short filesystem operations (renames, JSON writes...):
+    - "io": settings["io_workers"] threads (default 4).
+    - "archive": settings["archive_workers"] threads (default 2).
+    - "image": settings["image_workers"] threads (default 2), Pillow releases the GIL while decoding/resizing.
+    """
+
+    _instance = None
+
+    @staticmethod
+    def get():
+        if WorkerPool._instance is None:
+            WorkerPool._instance = WorkerPool()
+        return WorkerPool._instance
+
+    def __init__(self) -> None:
+        settings = AppService.get().settings
+        self.pools = {
+            "io": ThreadPoolExecutor(max_workers=settings.get("io_workers", 4), thread_name_prefix="io-worker"),
+            "archive": ThreadPoolExecutor(max_workers=settings.get("archive_workers", 2), thread_name_prefix="archive-worker"),
+            "image": ThreadPoolExecutor(max_workers=settings.get("image_workers", 2), thread_name_prefix="image-worker"),
+        }
+
+    async def run(self, func: Callable, *args, pool: str = "io", **kwargs):
+        """Run a blocking function in one of the worker pools and await its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pools[pool], functools.partial(func, *args, **kwargs))
+
+    def shutdown(self):
+        for executor in self.pools.values():
+            executor.shutdown(wait=True)
+
+
+async def run_blocking(func: Callable, *args, pool: str = "io", **kwargs):
+    """Run a blocking function in one of the worker pools and await its result"""
+    return await WorkerPool.get().run(func, *args, pool=pool, **kwargs)
@@ -0,0 +1,52 @@
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+# Run from the backend directory layout: `python -m pytest` in backend/.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services import app_service as app_service_module  # noqa: E402
+from services.app_service import AppService  # noqa: E402
+from services.content_store import ContentStore  # noqa: E402
+from services.download_cache import DownloadCache  # noqa: E402
+from services.gamebanana_service import GameBananaService  # noqa: E402
+from services.http_client import HttpClient  # noqa: E402
+from services.mod_service import ModService  # noqa: E402
+from services.update_checker import UpdateChecker  # noqa: E402
+from services.worker_pool import WorkerPool  # noqa: E402
+
+SINGLETONS = [AppService, WorkerPool, HttpClient, DownloadCache, ContentStore, GameBananaService, ModService, UpdateChecker]
+
+
+@pytest.fixture
+def app_service(tmp_path, monkeypatch):
+    """An AppService using a temporary app data dir and mods dir, with fresh service singletons"""
+    appdata_dir = tmp_path / "appdata"
+    monkeypatch.setattr(app_service_module.appdirs, "user_data_dir", lambda *args, **kwargs: str(appdata_dir))
+    for singleton in SINGLETONS:
+        monkeypatch.setattr(singleton, "_instance", None)
+    app_service = AppService.get()
+    mods_root = tmp_path / "Mods"
+    app_service.settings["mods_dir"] = str(mods_root)
+    app_service.mods_dir.mkdir(parents=True)
+    yield app_service
+    if WorkerPool._instance is not None:
+        WorkerPool._instance.shutdown()
+
+
+@pytest.fixture
+def mock_http(monkeypatch):
+    """Serve the requests of a service module (its get_http_client) from a handler(request) -> httpx.Response.
+    Use as mock_http(module, handler), returns the list of requests made."""
+    def install(module, handler):
+        requests = []
+
+        def record(request):
+            requests.append(request)
+            return handler(request)
+        client = httpx.AsyncClient(transport=httpx.MockTransport(record))
+        monkeypatch.setattr(module, "get_http_client", lambda: client)
+        return requests
+    return install
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from services.mod_service import ModService
+from services.upload_service import UploadedFile
+
+
+def upload(tmp_path, filename: str, content: bytes) -> UploadedFile:
+    uploaded = UploadedFile("file", filename, tmp_path / f"upload-{filename}", None)
+    uploaded.write(content)
+    uploaded.close()
+    return uploaded
+
+
+def leftovers(parent):
+    return sorted(path.name for path in parent.iterdir())
+
+
+def test_existing_mod_is_kept(app_service, tmp_path):
+    mod_dir = app_service.mods_dir / "Other" / "My Mod"
+    mod_dir.mkdir(parents=True)
+    (mod_dir / "mod.ini").write_text("installed")
+    mod_service = ModService.get()
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(mod_service.add_mod(upload(tmp_path, "mod.ini", b"new"), "My Mod", "Other"))
+
+    assert error.value.status_code == 409
+    assert (mod_dir / "mod.ini").read_text() == "installed"
+    assert leftovers(mod_dir.parent) == ["My Mod"]
+    mod_service.shutdown()
+
+
+def test_concurrent_adds_of_a_name(app_service, tmp_path):
+    mod_service = ModService.get()
+
+    async def add_both():
+        return await asyncio.gather(
+            mod_service.add_mod(upload(tmp_path, "a.ini", b"a"), "My Mod", "Other"),
+            mod_service.add_mod(upload(tmp_path, "b.ini", b"b"), "My Mod", "Other"),
+            return_exceptions=True,
+        )
+    results = asyncio.run(add_both())
+
+    errors = [result for result in results if isinstance(result, HTTPException)]
+    assert len(errors) == 1 and errors[0].status_code == 409
+    mod_dir = app_service.mods_dir / "Other" / "DISABLED_My Mod"
+    assert leftovers(mod_dir.parent) == ["DISABLED_My Mod"]
+    assert len(leftovers(mod_dir)) == 2  # The uploaded file and metadata.json
+    assert mod_service.installing_dirs == set()
+    mod_service.shutdown()
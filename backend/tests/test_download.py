@@ -0,0 +1,120 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from services import gamebanana_service as gamebanana_service_module
+from services.gamebanana_service import GameBananaService
+
+CONTENT = bytes(range(256)) * 64
+URL = "https://gamebanana.com/dl/1"
+
+
+class ChunkedBody(httpx.AsyncByteStream):
+    """A streamed response body (httpx reads plain bytes bodies eagerly, which would skip aiter_raw)"""
+
+    def __init__(self, content: bytes, chunk_size: int = 4096) -> None:
+        self.content = content
+        self.chunk_size = chunk_size
+
+    async def __aiter__(self):
+        for start in range(0, len(self.content), self.chunk_size):
+            yield self.content[start:start + self.chunk_size]
+
+
+def response(status_code: int, content: bytes = b"", headers: dict = None) -> httpx.Response:
+    headers = {"Content-Length": str(len(content)), **(headers or {})}
+    return httpx.Response(status_code, headers=headers, stream=ChunkedBody(content))
+
+
+@pytest.fixture
+def serve(app_service, mock_http):
+    """Serve the downloads from a handler(request) -> httpx.Response, returns the list of requests made"""
+    return lambda handler: mock_http(gamebanana_service_module, handler)
+
+
+def download(save_path):
+    return asyncio.run(GameBananaService.get().download_file(URL, save_path))
+
+
+def test_download(serve, tmp_path):
+    requests = serve(lambda request: response(200, CONTENT))
+    save_path = tmp_path / "mod.zip"
+
+    assert download(save_path)
+    assert save_path.read_bytes() == CONTENT
+    assert not save_path.with_name("mod.zip.part").exists()
+    assert "Range" not in requests[0].headers
+    assert requests[0].headers["Accept-Encoding"] == "identity"
+    assert GameBananaService.get().downloads["mod.zip"]["status"] == "done"
+
+
+def test_download_resumes_partial_file(serve, tmp_path):
+    def handler(request):
+        assert request.headers["Range"] == "bytes=1000-"
+        return response(206, CONTENT[1000:])
+    serve(handler)
+    save_path = tmp_path / "mod.zip"
+    save_path.with_name("mod.zip.part").write_bytes(CONTENT[:1000])
+
+    assert download(save_path)
+    assert save_path.read_bytes() == CONTENT
+    progress = GameBananaService.get().downloads["mod.zip"]
+    assert progress["resumed_from"] == 1000
+    assert progress["bytes_done"] == progress["bytes_total"] == len(CONTENT)
+
+
+def test_download_starts_over_when_range_is_ignored(serve, tmp_path):
+    serve(lambda request: response(200, CONTENT))
+    save_path = tmp_path / "mod.zip"
+    save_path.with_name("mod.zip.part").write_bytes(b"stale")
+
+    assert download(save_path)
+    assert save_path.read_bytes() == CONTENT
+
+
+def test_download_restarts_once_on_416(serve, tmp_path):
+    def handler(request):
+        if "Range" in request.headers:
+            return response(416)
+        return response(200, CONTENT)
+    requests = serve(handler)
+    save_path = tmp_path / "mod.zip"
+    save_path.with_name("mod.zip.part").write_bytes(b"x" * (len(CONTENT) + 10))
+
+    assert download(save_path)
+    assert save_path.read_bytes() == CONTENT
+    assert len(requests) == 2
+
+
+def test_download_416_restart_is_bounded(serve, tmp_path):
+    requests = serve(lambda request: response(416))
+    save_path = tmp_path / "mod.zip"
+    save_path.with_name("mod.zip.part").write_bytes(b"partial")
+
+    with pytest.raises(HTTPException):
+        download(save_path)
+    assert len(requests) == 2
+    assert not save_path.exists()
+
+
+def test_download_counts_raw_bytes(serve, tmp_path):
+    # A server compressing the response anyway: the stored bytes are the ones counted against Content-Length.
+    encoded = b"\x1f\x8b" + CONTENT[:500]
+    serve(lambda request: response(200, encoded, headers={"Content-Encoding": "gzip"}))
+    save_path = tmp_path / "mod.zip"
+
+    assert download(save_path)
+    assert save_path.read_bytes() == encoded
+
+
+def test_incomplete_download_keeps_part_file(serve, tmp_path):
+    serve(lambda request: response(200, CONTENT[:100], headers={"Content-Length": str(len(CONTENT))}))
+    save_path = tmp_path / "mod.zip"
+
+    with pytest.raises(HTTPException):
+        download(save_path)
+    assert not save_path.exists()
+    assert save_path.with_name("mod.zip.part").read_bytes() == CONTENT[:100]
+    assert GameBananaService.get().downloads["mod.zip"]["status"] == "failed"
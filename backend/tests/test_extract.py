@@ -0,0 +1,105 @@
+import threading
+import zipfile
+
+import pytest
+from fastapi import HTTPException
+
+from services.utils import FileUtils
+
+
+def make_zip(file_path, members: dict, compression=zipfile.ZIP_STORED):
+    with zipfile.ZipFile(file_path, 'w', compression=compression) as zip_ref:
+        for name, content in members.items():
+            zip_ref.writestr(name, content)
+    return file_path
+
+
+def leftovers(parent):
+    return sorted(path.name for path in parent.iterdir())
+
+
+def test_extract(tmp_path):
+    archive = make_zip(tmp_path / "mod.zip", {"mod.ini": "[TextureOverride]", "textures/a.dds": b"a" * 100})
+    target = tmp_path / "mods" / "Mod"
+    target.parent.mkdir()
+
+    report = FileUtils.extract_archive_staged(archive, target)
+
+    assert (target / "mod.ini").read_text() == "[TextureOverride]"
+    assert (target / "textures" / "a.dds").read_bytes() == b"a" * 100
+    assert report["members"] == 2 and report["bytes"] == 117
+    assert report["files"] == FileUtils.list_archive_members(archive)
+    assert leftovers(target.parent) == ["Mod"]
+
+
+@pytest.mark.parametrize("name", ["../evil.ini", "textures/../../evil.ini", "/tmp/evil.ini"])
+def test_zip_slip_is_rejected(tmp_path, name):
+    archive = make_zip(tmp_path / "mod.zip", {"mod.ini": "ok", name: "evil"})
+    target = tmp_path / "mods" / "Mod"
+    target.parent.mkdir()
+
+    with pytest.raises(HTTPException) as error:
+        FileUtils.extract_archive_staged(archive, target)
+
+    assert error.value.status_code == 400
+    assert "Unsafe path" in error.value.detail
+    # Nothing extracted: no target, no staging dir, nothing next to the mods dir.
+    assert leftovers(target.parent) == []
+    assert leftovers(tmp_path) == ["mod.zip", "mods"]
+
+
+def test_zip_slip_is_rejected_when_merging(tmp_path):
+    archive = make_zip(tmp_path / "mod.zip", {"../evil.ini": "evil"})
+    target = tmp_path / "mods" / "Mod"
+    target.mkdir(parents=True)
+    (target / "mod.ini").write_text("installed")
+
+    with pytest.raises(HTTPException):
+        FileUtils.extract_archive_staged(archive, target, only={"../evil.ini"})
+
+    assert leftovers(target) == ["mod.ini"]
+    assert leftovers(target.parent) == ["Mod"]
+
+
+def test_corrupted_member_is_rejected(tmp_path):
+    archive = make_zip(tmp_path / "mod.zip", {"mod.ini": "ok", "a.dds": b"a" * 1000})
+    data = bytearray(archive.read_bytes())
+    offset = data.index(b"a" * 1000)
+    data[offset + 500] = ord("b")
+    archive.write_bytes(bytes(data))
+    target = tmp_path / "mods" / "Mod"
+    target.parent.mkdir()
+
+    with pytest.raises(HTTPException) as error:
+        FileUtils.extract_archive_staged(archive, target)
+
+    assert error.value.status_code == 400
+    assert leftovers(target.parent) == []
+
+
+def test_only_merges_the_given_members(tmp_path):
+    archive = make_zip(tmp_path / "mod.zip", {"mod.ini": "new", "a.dds": b"new"})
+    target = tmp_path / "mods" / "Mod"
+    target.mkdir(parents=True)
+    (target / "mod.ini").write_text("old")
+    (target / "a.dds").write_bytes(b"old")
+
+    FileUtils.extract_archive_staged(archive, target, only={"a.dds"})
+
+    assert (target / "mod.ini").read_text() == "old"
+    assert (target / "a.dds").read_bytes() == b"new"
+    assert leftovers(target.parent) == ["Mod"]
+
+
+def test_cancelled_extraction_writes_nothing(tmp_path):
+    archive = make_zip(tmp_path / "mod.zip", {"mod.ini": "ok"})
+    target = tmp_path / "mods" / "Mod"
+    target.parent.mkdir()
+    cancel_event = threading.Event()
+    cancel_event.set()
+
+    with pytest.raises(HTTPException) as error:
+        FileUtils.extract_archive_staged(archive, target, cancel_event=cancel_event)
+
+    assert error.value.status_code == 409
+    assert leftovers(target.parent) == []
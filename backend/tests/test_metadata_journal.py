@@ -0,0 +1,151 @@
+import json
+
+import pytest
+
+from services import metadata_journal as metadata_journal_module
+from services.metadata_journal import MetadataJournal
+from services.mod_service import ModService
+from services.utils import FileUtils
+
+
+def make_journal(journal_file, scope="mods", build_snapshot=lambda: "{}", durability="per_op"):
+    return MetadataJournal(
+        journal_file,
+        scope=scope,
+        metadata_path=lambda mod: journal_file.parent / mod["id"] / "metadata.json",
+        snapshot_file=journal_file.with_name("mods.json"),
+        build_snapshot=build_snapshot,
+        durability=durability,
+    )
+
+
+def leftovers(parent):
+    return sorted(path.name for path in parent.iterdir())
+
+
+def crash(journal: MetadataJournal):
+    """Drop a journal without flushing it, like a killed process"""
+    if journal._file is not None:
+        journal._file.close()
+        journal._file = None
+
+
+def test_replay_coalesces_operations(tmp_path):
+    journal = make_journal(tmp_path / "journal.jsonl")
+    journal.put({"id": "a", "enabled": True})
+    journal.put({"id": "b", "enabled": True})
+    journal.put({"id": "a", "enabled": False})
+    journal.delete("b")
+    journal.put({"id": "c", "enabled": True})
+    crash(journal)
+
+    operations = make_journal(tmp_path / "journal.jsonl").replay()
+
+    assert operations == [
+        {"op": "put", "mod": {"id": "a", "enabled": False}, "scope": "mods"},
+        {"op": "delete", "id": "b", "scope": "mods"},
+        {"op": "put", "mod": {"id": "c", "enabled": True}, "scope": "mods"},
+    ]
+
+
+def test_replay_skips_torn_entries_and_other_scopes(tmp_path):
+    journal_file = tmp_path / "journal.jsonl"
+    journal = make_journal(journal_file, scope="old mods dir")
+    journal.put({"id": "a"})
+    crash(journal)
+    journal = make_journal(journal_file)
+    journal.put({"id": "b"})
+    crash(journal)
+    with open(journal_file, 'a', encoding='utf-8') as f:
+        f.write('{"op":"put","mod":{"id":"c"')
+
+    operations = make_journal(journal_file).replay()
+
+    assert [entry["mod"]["id"] for entry in operations] == ["b"]
+
+
+def test_flush_writes_and_truncates(tmp_path):
+    (tmp_path / "a").mkdir()
+    journal = make_journal(tmp_path / "journal.jsonl")
+    journal.put({"id": "a", "enabled": True})
+    journal.put({"id": "a", "enabled": False})
+    # No directory, skipped.
+    journal.put({"id": "b", "enabled": True})
+
+    journal.flush()
+
+    assert FileUtils.read_json(tmp_path / "a" / "metadata.json") == {"id": "a", "enabled": False}
+    assert not (tmp_path / "b").exists()
+    assert (tmp_path / "mods.json").read_text() == "{}"
+    assert journal.replay() == []
+
+
+def test_flusher_writes_the_journaled_state(tmp_path):
+    (tmp_path / "a").mkdir()
+    mods = {"a": {"id": "a", "enabled": True}}
+    journal = make_journal(tmp_path / "journal.jsonl", build_snapshot=lambda: json.dumps(mods))
+    journal.put(mods["a"])
+
+    # Mutated after being journaled, not journaled again yet.
+    mods["a"]["enabled"] = False
+    mods["b"] = {"id": "b"}
+    journal._write(fsync=False)
+
+    assert FileUtils.read_json(tmp_path / "a" / "metadata.json") == {"id": "a", "enabled": True}
+    assert json.loads((tmp_path / "mods.json").read_text()) == {"a": {"id": "a", "enabled": True}}
+    assert leftovers(tmp_path) == ["a", "journal.jsonl", "mods.json"]
+
+
+@pytest.mark.parametrize("durability, after_puts, after_flush, after_stop", [
+    ("per_op", 2, 2, 2),
+    ("interval", 0, 1, 1),
+    ("shutdown", 0, 0, 1),
+])
+def test_durability_policies(tmp_path, monkeypatch, durability, after_puts, after_flush, after_stop):
+    journal = make_journal(tmp_path / "journal.jsonl", durability=durability)
+    fsync = metadata_journal_module.os.fsync
+    journal_fsyncs = []
+
+    def count_fsync(fd):
+        if journal._file is not None and fd == journal._file.fileno():
+            journal_fsyncs.append(fd)
+        fsync(fd)
+    monkeypatch.setattr(metadata_journal_module.os, "fsync", count_fsync)
+
+    journal.put({"id": "a"})
+    journal.put({"id": "b"})
+    assert len(journal_fsyncs) == after_puts
+    journal.flush(snapshot=False)
+    assert len(journal_fsyncs) == after_flush
+    journal.stop()
+    assert len(journal_fsyncs) == after_stop
+
+
+def test_mod_service_replays_journal_after_crash(app_service):
+    app_service.settings["journal_durability"] = "per_op"
+    mod_dir = app_service.mods_dir / "Other" / "My Mod"
+    mod_dir.mkdir(parents=True)
+    mod_service = ModService.get()
+    mod_service.init()
+    mod = next(iter(mod_service.mods_metadata_id.values()))
+    assert FileUtils.read_json(mod_dir / "metadata.json")["enabled"] is True
+
+    # Mutation journaled, but the flusher never ran (crash).
+    mod_service.journal.stop = lambda: None
+    mod_service.journal._stop_event.set()
+    mod_service.journal._thread.join()
+    mod["installed_versions"] = [{"id": 1, "date": 1, "name": "f.zip", "url": "", "description": "", "size": 1}]
+    mod_service.update_mod_metadata(mod)
+    crash(mod_service.journal)
+    assert FileUtils.read_json(mod_dir / "metadata.json")["installed_versions"] == []
+
+    ModService._instance = None
+    mod_service = ModService.get()
+
+    metadata = FileUtils.read_json(mod_dir / "metadata.json")
+    assert metadata["installed_versions"][0]["name"] == "f.zip"
+    assert mod_service.mods_metadata_id[mod["id"]]["installed_versions"][0]["name"] == "f.zip"
+    snapshot = json.loads((app_service.mods_dir / "mods.json").read_text())
+    assert snapshot["Other"][0]["installed_versions"][0]["name"] == "f.zip"
+    assert mod_service.journal.replay() == []
+    mod_service.shutdown()
@@ -0,0 +1,37 @@
+import asyncio
+
+from services.mod_service import ModService
+from services.upload_service import UploadedFile
+from services.utils import FileUtils
+
+
+def test_renamed_mod_takes_its_location(app_service):
+    mod_dir = app_service.mods_dir / "Other" / "My Mod"
+    mod_dir.mkdir(parents=True)
+    mod_service = ModService.get()
+    mod_id = next(iter(mod_service.mods_metadata_id))
+
+    mod_dir.rename(mod_dir.parent.parent / "UI" / "DISABLED_Renamed")
+    report = mod_service.rescan_mods()
+
+    assert report["added"] == 0 and report["removed"] == 0 and report["changed"] == 1
+    mod = mod_service.get_mod_metadata_by_id(mod_id)
+    assert (mod["name"], mod["category"], mod["character"], mod["enabled"]) == ("Renamed", "UI", None, False)
+    metadata = FileUtils.read_json(app_service.mods_dir / "UI" / "DISABLED_Renamed" / "metadata.json")
+    assert metadata["name"] == "Renamed" and metadata["category"] == "UI"
+    mod_service.shutdown()
+
+
+def test_added_mod_is_not_rescanned_as_added(app_service, tmp_path):
+    mod_service = ModService.get()
+    uploaded = UploadedFile("file", "mod.ini", tmp_path / "upload.ini", None)
+    uploaded.write(b"[TextureOverride]")
+    uploaded.close()
+    mod = asyncio.run(mod_service.add_mod(uploaded, "My Mod", "Other"))
+    mod_service.journal.flush()
+
+    report = mod_service.rescan_mods()
+
+    assert report["added"] == 0 and report["removed"] == 0 and report["total"] == 1
+    assert mod.id in mod_service.mods_metadata_id
+    mod_service.shutdown()
@@ -0,0 +1,142 @@
+import asyncio
+import time
+from email.utils import formatdate
+
+import httpx
+import pytest
+
+from services import update_checker as update_checker_module
+from services.update_checker import UpdateChecker
+
+
+def make_mod(gamebanana_id: int, installed_file_id: int = 1, installed_date: int = 100) -> dict:
+    return {
+        "id": f"mod-{gamebanana_id}",
+        "name": f"Mod {gamebanana_id}",
+        "gamebanana": {"id": gamebanana_id, "page_url": None},
+        "installed_versions": [{"id": installed_file_id, "date": installed_date}],
+    }
+
+
+def item(file_id: int, date: int) -> list:
+    return [{str(file_id): {"_idRow": file_id, "_sFile": f"{file_id}.zip", "_tsDateAdded": date}}]
+
+
+@pytest.fixture
+def checker(app_service, monkeypatch):
+    app_service.settings.update(update_check_rate=1000, update_check_retry_delay=0.001)
+    checker = UpdateChecker.get()
+    mods = []
+    monkeypatch.setattr(checker, "_installed_mods", lambda: mods)
+    checker.mods = mods
+    return checker
+
+
+@pytest.fixture
+def serve(mock_http):
+    """Serve the Core API from a handler(request) -> httpx.Response, returns the list of requests made"""
+    return lambda handler: mock_http(update_checker_module, handler)
+
+
+def batch_items(request) -> list:
+    """One item per requested mod, with a newer file (id = mod id * 10)"""
+    mod_ids = [int(mod_id) for mod_id in request.url.params.get_list("itemid[]")]
+    return [item(mod_id * 10, 200) for mod_id in mod_ids]
+
+
+def test_mods_are_checked_in_batches(checker, serve, app_service):
+    app_service.settings["update_check_batch_size"] = 50
+    checker.mods.extend(make_mod(mod_id) for mod_id in range(1, 121))
+    requests = serve(lambda request: httpx.Response(200, json=batch_items(request), headers={"ETag": '"v1"'}))
+
+    report = asyncio.run(checker.check())
+
+    assert [len(request.url.params.get_list("itemid[]")) for request in requests] == [50, 50, 20]
+    assert report["requests"] == 3 and report["checked"] == 120 and report["modified"] == 120
+    assert report["errors"] == [] and report["retries"] == 0
+    assert len(checker.get_updates()) == 120
+    assert checker.get_updates()[0]["new_files"][0]["id"] == 10
+
+
+def test_fresh_results_are_not_checked_again(checker, serve):
+    checker.mods.extend(make_mod(mod_id) for mod_id in range(1, 4))
+    requests = serve(lambda request: httpx.Response(200, json=batch_items(request)))
+
+    asyncio.run(checker.check())
+    report = asyncio.run(checker.check())
+
+    assert len(requests) == 1
+    assert report["requests"] == 0
+
+
+def test_forced_check_is_conditional(checker, serve):
+    checker.mods.extend(make_mod(mod_id) for mod_id in range(1, 4))
+
+    def handler(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json=batch_items(request), headers={"ETag": '"v1"'})
+    requests = serve(handler)
+
+    asyncio.run(checker.check())
+    report = asyncio.run(checker.check(force=True))
+
+    assert len(requests) == 2
+    assert report["modified"] == 0
+    assert len(checker.get_updates()) == 3
+
+
+def test_rate_limited_requests_are_retried(checker, serve):
+    checker.mods.append(make_mod(1))
+    responses = [httpx.Response(429, headers={"Retry-After": "0"}), httpx.Response(503)]
+
+    def handler(request):
+        return responses.pop(0) if responses else httpx.Response(200, json=batch_items(request))
+    requests = serve(handler)
+
+    report = asyncio.run(checker.check())
+
+    assert len(requests) == 3
+    assert report["retries"] == 2 and report["errors"] == []
+    assert len(checker.get_updates()) == 1
+
+
+def test_connection_errors_are_retried(checker, serve):
+    checker.mods.append(make_mod(1))
+    failures = [1]
+
+    def handler(request):
+        if failures:
+            failures.pop()
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, json=batch_items(request))
+    serve(handler)
+
+    report = asyncio.run(checker.check())
+
+    assert report["retries"] == 1 and report["errors"] == []
+
+
+def test_retries_are_bounded(checker, serve, app_service):
+    app_service.settings["update_check_max_retries"] = 2
+    checker.mods.append(make_mod(1))
+    requests = serve(lambda request: httpx.Response(503))
+
+    report = asyncio.run(checker.check())
+
+    assert len(requests) == 3
+    assert report["retries"] == 2
+    assert len(report["errors"]) == 1
+
+
+def test_retry_delay(checker):
+    request = httpx.Request("GET", "https://api.gamebanana.com/Core/Item/Data")
+    assert checker.retry_delay(httpx.Response(429, headers={"Retry-After": "7"}, request=request), 0) == 7
+    assert checker.retry_delay(httpx.Response(429, headers={"Retry-After": "3600"}, request=request), 0) == UpdateChecker.MAX_RETRY_DELAY
+    http_date = formatdate(time.time() + 30, usegmt=True)
+    assert 25 <= checker.retry_delay(httpx.Response(503, headers={"Retry-After": http_date}, request=request), 0) <= 30
+
+    checker.settings["update_check_retry_delay"] = 1.0
+    for attempt in range(4):
+        assert 2 ** attempt * 0.5 <= checker.retry_delay(None, attempt) <= 2 ** attempt
+    assert checker.retry_delay(httpx.Response(503, request=request), 10) <= UpdateChecker.MAX_RETRY_DELAY
@@ -12,6 +12,12 @@ const nextConfig = {
         hostname: 'www.prydwen.gg',
         pathname: '/**',
       },
+      {
+        protocol: 'http',
+        hostname: 'localhost',
+        port: '8000',
+        pathname: '/api/**',
+      },
     ],
   },
   async rewrites() {
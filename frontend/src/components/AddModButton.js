@@ -41,15 +41,15 @@ export default function AddModButton() {
   };
 
   const handleFiles = async (files) => {
-    for (const file of files) {
+    // Upload the dropped files concurrently
+    await Promise.all(files.map(file => {
       const formData = new FormData();
       formData.append('file', file);
-      formData.append('name', file.name);
+      formData.append('name', file.name.replace(/\.(zip|7z|rar)$/i, ''));
       formData.append('category', 'Other');
-      formData.append('wuwa_version', '1.0.0');
-      
-      await addMod(formData);
-    }
+
+      return addMod(formData);
+    }));
   };
 
   const handleGamebananaSubmit = async (e) => {
@@ -9,6 +9,7 @@ import { IoGrid, IoList, IoApps } from "react-icons/io5";
 import { GiSwitchWeapon } from "react-icons/gi";
 import { GiSwordsEmblem } from "react-icons/gi";
 import { GiOrbital } from "react-icons/gi";
+import { API_URL, getRemoteImageUrl } from '@/store/modStore';
 
 
 const weaponMapIcons = {
@@ -73,9 +74,40 @@ const renderIcon = (type, value, style = 'default') => {
   );
 };
 
+// Character icon drawn from the icons sprite atlas (one request for all the characters),
+// falling back to the icon itself while the atlas is loading or if it doesn't have the character
+const CharacterIcon = ({ character, atlas, className = '' }) => {
+  const sprite = atlas?.sprites?.[character.id];
+  if (!sprite) {
+    return (
+      <Image
+        src={getRemoteImageUrl(character.icon)}
+        alt={character.name}
+        fill
+        className={`object-cover ${className}`}
+      />
+    );
+  }
+  const [x, y, width, height] = sprite;
+  const percent = (offset, size, total) => total > size ? `${offset / (total - size) * 100}%` : '0%';
+  return (
+    <div
+      role="img"
+      aria-label={character.name}
+      className={`absolute inset-0 ${className}`}
+      style={{
+        backgroundImage: `url(${API_URL}${atlas.image.replace(/^\/api/, '')})`,
+        backgroundSize: `${atlas.width / width * 100}% ${atlas.height / height * 100}%`,
+        backgroundPosition: `${percent(x, width, atlas.width)} ${percent(y, height, atlas.height)}`,
+      }}
+    />
+  );
+};
+
 export default function CharacterSidebar({ onCharacterChange, selectedCharacter, isInGameMode }) {
   const [viewMode, setViewMode] = useState(2); // 0: cards, 1: list, 2: grid
   const [characters, setCharacters] = useState([]);
+  const [atlas, setAtlas] = useState(null);
   const [loading, setLoading] = useState(true);
   const [rarityFilter, setRarityFilter] = useState("All");
   const [elementFilter, setElementFilter] = useState("All");
@@ -99,7 +131,17 @@ export default function CharacterSidebar({ onCharacterChange, selectedCharacter,
       }
     };
 
+    const fetchAtlas = async () => {
+      try {
+        const response = await fetch(`${API_URL}/characters/atlas`);
+        if (response.ok) setAtlas(await response.json());
+      } catch (error) {
+        console.error('Error fetching character atlas:', error);
+      }
+    };
+
     fetchCharacters();
+    fetchAtlas();
   }, []);
 
   const toggleFavorite = (characterId) => {
@@ -351,7 +393,7 @@ export default function CharacterSidebar({ onCharacterChange, selectedCharacter,
                       }}
                     >
                       <Image
-                        src={character.cardImage}
+                        src={getRemoteImageUrl(character.cardImage)}
                         alt={character.name}
                         fill
                         className="object-cover"
@@ -386,12 +428,7 @@ export default function CharacterSidebar({ onCharacterChange, selectedCharacter,
                         backgroundColor: character.rarity === "5" ? "#ccbf48" : "#9b68d4"
                       }}
                     >
-                      <Image
-                        src={character.icon}
-                        alt={character.name}
-                        fill
-                        className="object-cover"
-                      />
+                      <CharacterIcon character={character} atlas={atlas} />
                     </div>
                     <div className="flex-1 min-w-0">
                       <div className="text-lg text-left font-medium truncate mb-[4px]">{character.name}</div>
@@ -414,11 +451,10 @@ export default function CharacterSidebar({ onCharacterChange, selectedCharacter,
                         backgroundColor: character.rarity === "5" ? "#ccbf48" : "#9b68d4"
                       }}
                     >
-                      <Image
-                        src={character.icon}
-                        alt={character.name}
-                        fill
-                        className={`transition-all duration-200 object-cover ${selectedCharacter?.name === character.name ? 'scale-110' : ''}`}
+                      <CharacterIcon
+                        character={character}
+                        atlas={atlas}
+                        className={`transition-all duration-200 ${selectedCharacter?.name === character.name ? 'scale-110' : ''}`}
                       />
                       <div className="absolute top-1 left-1 right-1 flex justify-between">
                         {renderIcon('element', character.element, 'grid')}
@@ -41,7 +41,7 @@ const loaderStyles = `
 }
 `;
 
-const ImageDisplay = ({ filePath, relative = false, alt = 'Image', className = '', deferredEffect = false, ...props }) => {
+const ImageDisplay = ({ filePath, relative = false, alt = 'Image', className = '', deferredEffect = false, placeholder = null, ...props }) => {
   const { settings, isLoading: settingsLoading, error: settingsError } = useSettingsStore();
   const [error, setError] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -81,11 +81,22 @@ const ImageDisplay = ({ filePath, relative = false, alt = 'Image', className = '
   if (deferredEffect) {
     return (
       <div className="relative w-full h-full image-zoom-container">
-        {loading && (
+        {loading && (placeholder ? (
+          // Dominant colour and tiny blurred image, painted before the image loads
+          <div
+            className="absolute inset-0 z-10 scale-110 blur-md"
+            style={{
+              backgroundColor: placeholder.color,
+              backgroundImage: placeholder.image ? `url(${placeholder.image})` : undefined,
+              backgroundSize: 'cover',
+              backgroundPosition: 'center',
+            }}
+          />
+        ) : (
           <div className="animate-pulse bg-gray-200 dark:bg-gray-800 absolute inset-0 z-10 flex items-center justify-center">
             <span className="loader"></span>
           </div>
-        )}
+        ))}
         <img
           src={imageUrl}
           alt={alt}
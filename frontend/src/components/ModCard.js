@@ -27,6 +27,7 @@ export default function ModCard({ mod, isSelected, onSelect, uiSettings, isInGam
 
   // Use preview prop for image src
   const previewImage = mod.preview;
+  const previewPlaceholder = mod.previewPlaceholder;
   // Get caption from first image if available
   const imageCaption = mod.images && mod.images.length > 0 ? mod.images[0].caption : null;
 
@@ -49,6 +50,7 @@ export default function ModCard({ mod, isSelected, onSelect, uiSettings, isInGam
             relative={false}
             alt={mod.name}
             deferredEffect={true}
+            placeholder={previewPlaceholder}
             fill
             className="image-zoom w-full h-full"
             unoptimized
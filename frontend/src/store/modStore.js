@@ -1,22 +1,44 @@
 import { create } from 'zustand';
 
-const API_URL = 'http://localhost:8000/api';
+export const API_URL = 'http://localhost:8000/api';
 
 const GAMEBANANA_IMAGE_BASE = 'https://images.gamebanana.com/img/ss/mods/';
 
+// Remote images go through the backend image cache (fetched once, available offline)
+export const getRemoteImageUrl = (url) => url ? `${API_URL}/remote-image?url=${encodeURIComponent(url)}` : url;
+
+// Width of the thumbnails shown in the mods grid (the backend rounds it to a size bucket)
+const PREVIEW_THUMBNAIL_WIDTH = 512;
+
 const getPreviewUrl = (mod) => {
   if (!mod.images || mod.images.length === 0) return null;
   const img = mod.images[0];
   if (img.local) {
-    // Use backend API to fetch local image
+    // Use backend API to fetch a thumbnail of the local image
     // The filename should already be relative to the mods directory
-    return `${API_URL}/image/${encodeURIComponent(img.filename)}`;
+    return `${API_URL}/image/${encodeURIComponent(img.filename)}?w=${PREVIEW_THUMBNAIL_WIDTH}`;
   } else {
     // Use GameBanana base URL
-    return `${GAMEBANANA_IMAGE_BASE}${img.filename}`;
+    return getRemoteImageUrl(`${GAMEBANANA_IMAGE_BASE}${img.filename}`);
   }
 };
 
+// Placeholder painted while the preview loads (dominant colour and tiny blurred image computed by the backend)
+const getPreviewPlaceholder = (mod) => {
+  const img = mod.images && mod.images[0];
+  if (!img || (!img.color && !img.placeholder)) return null;
+  return {
+    color: img.color,
+    image: img.placeholder,
+  };
+};
+
+const withPreview = (mod) => ({
+  ...mod,
+  preview: getPreviewUrl(mod),
+  previewPlaceholder: getPreviewPlaceholder(mod),
+});
+
 const useModStore = create((set, get) => ({
   mods: [],
   isLoading: false,
@@ -34,10 +56,7 @@ const useModStore = create((set, get) => ({
       
       const mods = await response.json();
       // Transform the mods data to include preview URLs
-      const transformedMods = mods.map(mod => ({
-        ...mod,
-        preview: getPreviewUrl(mod),
-      }));
+      const transformedMods = mods.map(withPreview);
       console.log(transformedMods.map(mod => mod.preview));
       set({ mods: transformedMods, isLoading: false });
     } catch (error) {
@@ -56,10 +75,7 @@ const useModStore = create((set, get) => ({
       
       const newMod = await response.json();
       // Transform the new mod data to include preview URL
-      const transformedMod = {
-        ...newMod,
-        preview: getPreviewUrl(newMod),
-      };
+      const transformedMod = withPreview(newMod);
       set(state => ({ mods: [...state.mods, transformedMod], isLoading: false }));
     } catch (error) {
       set({ error: error.message, isLoading: false });
@@ -97,10 +113,7 @@ const useModStore = create((set, get) => ({
       // If exclusive toggle, result will contain all affected mods
       if (exclusive && Array.isArray(result)) {
         // Transform all mods to include preview URLs
-        const transformedMods = result.map(mod => ({
-          ...mod,
-          preview: getPreviewUrl(mod),
-        }));
+        const transformedMods = result.map(withPreview);
         
         set(state => ({
           mods: state.mods.map(mod => {
@@ -112,10 +125,7 @@ const useModStore = create((set, get) => ({
         }));
       } else {
         // Single mod toggle
-        const transformedMod = {
-          ...result,
-          preview: getPreviewUrl(result),
-        };
+        const transformedMod = withPreview(result);
         set(state => ({
           mods: state.mods.map(mod => 
             mod.id === modId ? transformedMod : mod
@@ -152,7 +162,17 @@ const useModStore = create((set, get) => ({
         console.error('Error response:', errorData);
         throw new Error('Failed to install from GameBanana');
       }
-      
+
+      // The install runs in the background, wait for its job to finish
+      let job = await response.json();
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        const jobResponse = await fetch(`${API_URL}/jobs/${job.id}`);
+        if (!jobResponse.ok) throw new Error('Failed to get install status');
+        job = await jobResponse.json();
+      }
+      if (job.status === 'failed') throw new Error(job.error || 'Failed to install from GameBanana');
+
       await get().loadMods();
     } catch (error) {
       set({ error: error.message, isLoading: false });